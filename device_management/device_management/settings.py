@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "corsheaders",
@@ -111,13 +112,14 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWTAuthentication; с JWT_STATELESS_USER - пользователь из claims токена
+        "users.authentication.StatelessJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "devices.pagination.PageOrCursorPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
@@ -141,6 +143,9 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Роль пользователя в claim access-токена (users.roles.get_role)
+    "TOKEN_OBTAIN_SERIALIZER": "users.tokens.RoleTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.tokens.RoleTokenRefreshSerializer",
 }
 
 AUTHENTICATION_BACKENDS = [
@@ -173,3 +178,54 @@ DBBACKUP_CLEANUP_KEEP_MEDIA = 10
 
 DBBACKUP_FILENAME_TEMPLATE = "backup_{databasename}_{datetime}.{extension}"
 DBBACKUP_MEDIA_FILENAME_TEMPLATE = "media_{datetime}.{extension}"
+
+
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", default=2000, cast=int)
+EXPORT_SPOOL_MAX_SIZE = config("EXPORT_SPOOL_MAX_SIZE", default=8 * 1024 * 1024, cast=int)
+EXPORT_JSON_ENCODER = config("EXPORT_JSON_ENCODER", default="auto")
+EXPORT_JOBS_SPAWN_WORKER = config("EXPORT_JOBS_SPAWN_WORKER", default=True, cast=bool)
+# Сколько задач выгрузки рендерится одновременно; сверх этого задачи ждут в очереди
+EXPORT_JOBS_MAX_WORKERS = config("EXPORT_JOBS_MAX_WORKERS", default=2, cast=int)
+EXPORT_JOBS_RETENTION_HOURS = config("EXPORT_JOBS_RETENTION_HOURS", default=24, cast=int)
+# RUNNING-задача без обновлений дольше этого срока считается упавшей, минуты
+EXPORT_JOBS_STALE_MINUTES = config("EXPORT_JOBS_STALE_MINUTES", default=30, cast=int)
+
+# Запас водяного знака дельта-выгрузок (since=...), секунды
+EXPORT_DELTA_SAFETY_MARGIN = config("EXPORT_DELTA_SAFETY_MARGIN", default=300, cast=int)
+# Срок хранения журнала удалений, дни: с since старше него нужна полная выгрузка
+EXPORT_DELTA_RETENTION_DAYS = config("EXPORT_DELTA_RETENTION_DAYS", default=30, cast=int)
+
+EXPORT_CACHE_ENABLED = config("EXPORT_CACHE_ENABLED", default=True, cast=bool)
+EXPORT_CACHE_DIR = config("EXPORT_CACHE_DIR", default=str(BASE_DIR / "export_cache"))
+EXPORT_CACHE_MAX_SIZE = config("EXPORT_CACHE_MAX_SIZE", default=512 * 1024 * 1024, cast=int)
+
+PAGINATION_ESTIMATE_THRESHOLD = config("PAGINATION_ESTIMATE_THRESHOLD", default=10000, cast=int)
+PAGINATION_COUNT_CACHE_TIMEOUT = config("PAGINATION_COUNT_CACHE_TIMEOUT", default=30, cast=int)
+
+FUZZY_LOOKUP_THRESHOLD = config("FUZZY_LOOKUP_THRESHOLD", default=0.5, cast=float)
+BATCH_LOOKUP_MAX_CODES = config("BATCH_LOOKUP_MAX_CODES", default=5000, cast=int)
+BULK_DEVICES_MAX_ROWS = config("BULK_DEVICES_MAX_ROWS", default=10000, cast=int)
+DEVICE_IMPORT_CHUNK_SIZE = config("DEVICE_IMPORT_CHUNK_SIZE", default=5000, cast=int)
+
+REFERENCE_CACHE_ENABLED = config("REFERENCE_CACHE_ENABLED", default=True, cast=bool)
+REFERENCE_CACHE_ALIAS = config("REFERENCE_CACHE_ALIAS", default="default")
+REFERENCE_CACHE_TIMEOUT = config("REFERENCE_CACHE_TIMEOUT", default=60, cast=int)
+
+# Общий для воркеров кэш версий claims JWT. По умолчанию - файловый кэш
+# (общий для процессов одного хоста); при нескольких хостах укажите алиас
+# redis/memcached. Пусто или locmem - версия читается из базы на каждый
+# запрос, с JWT_STATELESS_USER это ошибка проверки users.E001
+CLAIMS_CACHE_ALIAS = config("CLAIMS_CACHE_ALIAS", default="claims")
+CLAIMS_CACHE_DIR = config("CLAIMS_CACHE_DIR", default=str(BASE_DIR / "claims_cache"))
+CLAIMS_CACHE_TIMEOUT = config("CLAIMS_CACHE_TIMEOUT", default=300, cast=int)
+
+JWT_STATELESS_USER = config("JWT_STATELESS_USER", default=False, cast=bool)
+USER_ROW_CACHE_TIMEOUT = config("USER_ROW_CACHE_TIMEOUT", default=30, cast=int)
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "claims": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": CLAIMS_CACHE_DIR,
+    },
+}
@@ -9,6 +9,8 @@ from .models import (
     Reservation,
     Loan,
     Return,
+    ExportJob,
+    DeletedRecord,
 )
 
 
@@ -113,3 +115,26 @@ class ReturnAdmin(admin.ModelAdmin):
     search_fields = ["loan__user__username", "loan__device__name"]
     list_filter = ["condition", "returned_at"]
     readonly_fields = ["returned_at", "created_at"]
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "resource",
+        "export_format",
+        "status",
+        "progress",
+        "created_by",
+        "created_at",
+    ]
+    search_fields = ["created_by__username", "fingerprint"]
+    list_filter = ["resource", "export_format", "status", "created_at"]
+    readonly_fields = ["fingerprint", "created_at", "updated_at"]
+
+
+@admin.register(DeletedRecord)
+class DeletedRecordAdmin(admin.ModelAdmin):
+    list_display = ["model_label", "object_id", "deleted_at"]
+    search_fields = ["model_label"]
+    list_filter = ["model_label", "deleted_at"]
@@ -0,0 +1,227 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from .exports.cache import data_changed
+from .models import Brand, Category, Device, Location, Spec
+from .serializers import BulkDeviceSerializer
+
+BULK_BATCH_SIZE = 1000
+# Столько строк с одинаковыми изменениями пишутся одним UPDATE ... WHERE id IN
+BULK_UPDATE_GROUP_MIN_SIZE = 50
+
+# Внешние ключи строки: поле сериализатора, атрибут модели, модель
+BULK_REFERENCES = [
+    ("category", "category_id", Category),
+    ("brand", "brand_id", Brand),
+    ("location", "location_id", Location),
+]
+UNIQUE_FIELDS = ["serial_number", "inventory_number"]
+
+
+def add_error(errors, index, field, message):
+    errors.setdefault(index, {}).setdefault(field, []).append(message)
+
+
+def validate_rows(rows, partial=False):
+    """
+    Построчная проверка полей без запросов к БД: один экземпляр
+    сериализатора на всю пачку, как в ListSerializer.
+    Возвращает ({индекс: validated_data}, {индекс: ошибки}).
+    """
+    child = BulkDeviceSerializer(partial=partial)
+    valid, errors = {}, {}
+    seen_ids = set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[index] = {"non_field_errors": ["Expected an object"]}
+            continue
+        try:
+            data = child.run_validation(row)
+        except serializers.ValidationError as exc:
+            errors[index] = exc.detail
+            continue
+        if partial:
+            pk = row.get("id")
+            if not isinstance(pk, int) or isinstance(pk, bool):
+                errors[index] = {"id": ["This field is required."]}
+                continue
+            if pk in seen_ids:
+                errors[index] = {"id": [f'Duplicate id "{pk}" in batch.']}
+                continue
+            seen_ids.add(pk)
+            data["id"] = pk
+        valid[index] = data
+    return valid, errors
+
+
+def check_references(valid, errors):
+    # Одна выборка id на каждую справочную таблицу
+    for field, attname, model in BULK_REFERENCES:
+        wanted = {data[attname] for data in valid.values() if data.get(attname)}
+        if not wanted:
+            continue
+        existing = set(
+            model._base_manager.filter(pk__in=wanted).values_list("pk", flat=True)
+        )
+        for index, data in valid.items():
+            pk = data.get(attname)
+            if pk is not None and pk not in existing:
+                add_error(
+                    errors, index, field, f'Invalid pk "{pk}" - object does not exist.'
+                )
+
+
+def check_unique(valid, errors):
+    """
+    Уникальность номеров множествами: дубликаты внутри пачки и одна
+    выборка совпадений из БД на оба поля. При обновлении совпадение
+    с самим собой конфликтом не считается.
+    """
+    seen = {field: defaultdict(list) for field in UNIQUE_FIELDS}
+    for index, data in valid.items():
+        for field in UNIQUE_FIELDS:
+            if field in data:
+                seen[field][data[field]].append(index)
+
+    for field in UNIQUE_FIELDS:
+        for value, indexes in seen[field].items():
+            if len(indexes) > 1:
+                for index in indexes:
+                    add_error(
+                        errors, index, field, f'Duplicate value "{value}" in batch.'
+                    )
+
+    condition = Q()
+    for field in UNIQUE_FIELDS:
+        if seen[field]:
+            condition |= Q(**{f"{field}__in": list(seen[field])})
+    if not condition:
+        return
+
+    existing = Device._base_manager.filter(condition)
+    taken = {field: {} for field in UNIQUE_FIELDS}
+    for pk, serial, inventory in existing.values_list(
+        "pk", "serial_number", "inventory_number"
+    ):
+        taken["serial_number"][serial] = pk
+        taken["inventory_number"][inventory] = pk
+
+    for field in UNIQUE_FIELDS:
+        for value, indexes in seen[field].items():
+            owner = taken[field].get(value)
+            if owner is None:
+                continue
+            for index in indexes:
+                if valid[index].get("id") != owner:
+                    add_error(
+                        errors,
+                        index,
+                        field,
+                        f"Device with this {field.replace('_', ' ')} already exists.",
+                    )
+
+
+def prepare(rows, partial):
+    valid, errors = validate_rows(rows, partial=partial)
+    check_references(valid, errors)
+    check_unique(valid, errors)
+    return {index: data for index, data in valid.items() if index not in errors}, errors
+
+
+def build_results(count, saved, errors):
+    results = []
+    for index in range(count):
+        if index in errors:
+            results.append({"index": index, "errors": errors[index]})
+        else:
+            results.append({"index": index, "id": saved[index]})
+    return results
+
+
+def bulk_create_devices(rows):
+    """
+    Создание пачки устройств со вложенными specifications: строки с
+    ошибками пропускаются, остальные пишутся bulk_create в одной транзакции.
+    """
+    valid, errors = prepare(rows, partial=False)
+
+    devices, specs = {}, []
+    for index, data in valid.items():
+        spec_rows = data.pop("specifications", [])
+        devices[index] = Device(**data)
+        specs.extend((devices[index], spec) for spec in spec_rows)
+
+    with transaction.atomic():
+        Device.objects.bulk_create(devices.values(), batch_size=BULK_BATCH_SIZE)
+        Spec.objects.bulk_create(
+            (Spec(device=device, **spec) for device, spec in specs),
+            batch_size=BULK_BATCH_SIZE,
+        )
+        # bulk_create и update() не шлют сигналов
+        data_changed(Device)
+
+    saved = {index: device.pk for index, device in devices.items()}
+    return build_results(len(rows), saved, errors)
+
+
+def bulk_update_devices(rows):
+    """
+    Частичное обновление пачки по id. Переданные specifications заменяют
+    характеристики устройства целиком. Строки с одинаковым набором
+    изменений пишутся общим UPDATE, остальные - bulk_update по объединению
+    изменённых полей (CASE по id дорого собирать на каждую строку).
+    """
+    valid, errors = prepare(rows, partial=True)
+
+    now = timezone.now()
+    specs = []
+    groups = defaultdict(list)
+    with transaction.atomic():
+        locked = (
+            Device.objects.select_for_update()
+            .defer("search_vector")
+            .in_bulk([data["id"] for data in valid.values()])
+        )
+        saved = {}
+        for index, data in valid.items():
+            device = locked.get(data.pop("id"))
+            if device is None:
+                add_error(errors, index, "id", "Device not found.")
+                continue
+            spec_rows = data.pop("specifications", None)
+            if spec_rows is not None:
+                specs.append((device, spec_rows))
+            for attname, value in data.items():
+                setattr(device, attname, value)
+            device.updated_at = now
+            groups[tuple(sorted(data.items()))].append(device)
+            saved[index] = device.pk
+
+        single, fields = [], {"updated_at"}
+        for changes, devices in groups.items():
+            if len(devices) < BULK_UPDATE_GROUP_MIN_SIZE:
+                single.extend(devices)
+                fields.update(attname for attname, _ in changes)
+                continue
+            Device.objects.filter(pk__in=[device.pk for device in devices]).update(
+                updated_at=now, **dict(changes)
+            )
+        Device.objects.bulk_update(single, sorted(fields), batch_size=BULK_BATCH_SIZE)
+        data_changed(Device)
+
+        if specs:
+            Spec.objects.filter(device__in=[device for device, _ in specs]).delete()
+            Spec.objects.bulk_create(
+                (
+                    Spec(device=device, **spec)
+                    for device, spec_rows in specs
+                    for spec in spec_rows
+                ),
+                batch_size=BULK_BATCH_SIZE,
+            )
+
+    return build_results(len(rows), saved, errors)
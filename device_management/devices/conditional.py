@@ -0,0 +1,124 @@
+import hashlib
+import json
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.exceptions import ValidationError
+from django.db.models import CharField, Count, Max, OuterRef
+from django.db.models.functions import MD5, Cast
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import DeletedRecord
+
+
+def list_state(queryset):
+    """
+    Версия выборки по агрегатам без чтения строк: правка двигает max(updated_at),
+    вставка и удаление - число строк и хеш id (он же ловит замену одной
+    строки другой при том же count, например при смене фильтра).
+    """
+    state = queryset.order_by().aggregate(
+        last_modified=Max("updated_at"),
+        count=Count("pk"),
+        ids=MD5(StringAgg(Cast("pk", CharField()), ",", order_by="pk")),
+    )
+    # Удаление не меняет max(updated_at) - для If-Modified-Since берём и его время
+    deleted = DeletedRecord.objects.filter(
+        model_label=queryset.model._meta.label
+    ).aggregate(last=Max("deleted_at"))["last"]
+    last_modified = max(filter(None, [state["last_modified"], deleted]), default=None)
+    return last_modified, [state["count"], state["ids"], str(last_modified)]
+
+
+def object_state(queryset, related=(), children=()):
+    """
+    Версия одного объекта одним запросом: его updated_at, updated_at
+    связанных объектов, поля которых попадают в ответ (category_name,
+    ?expand=...), и id вложенных списков - их удаление updated_at не меняет.
+    """
+    fields = ["updated_at", *(f"{name}__updated_at" for name in related)]
+    arrays = {}
+    for name in children:
+        relation = queryset.model._meta.get_field(name)
+        ids = (
+            relation.related_model._base_manager.filter(
+                **{relation.field.name: OuterRef("pk")}
+            )
+            .order_by("pk")
+            .values("pk")
+        )
+        arrays[f"{name}_ids"] = ArraySubquery(ids)
+
+    row = (
+        queryset.select_related(None)
+        .prefetch_related(None)
+        .order_by()
+        .annotate(**arrays)
+        .values_list(*fields, *arrays)[:1]
+    )
+    row = next(iter(row), None)
+    if row is None:
+        return None
+    timestamps, ids = row[: len(fields)], list(row[len(fields) :])
+    version = [str(value) for value in timestamps] + ids
+    return max(filter(None, timestamps)), version
+
+
+def make_etag(request, version):
+    # Ответ зависит и от query string (страница, поиск, ?fields=), и от формата
+    payload = json.dumps(
+        [request.get_full_path(), request.accepted_media_type, version]
+    )
+    return quote_etag(hashlib.sha256(payload.encode("utf8")).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    ETag и Last-Modified для list и retrieve: совпавший If-None-Match или
+    If-Modified-Since отвечает 304 по дешёвому агрегату, без выборки и
+    сериализации строк.
+    """
+
+    # FK и обратные связи (вложенные списки), выводимые в ответе retrieve
+    conditional_related = ()
+    conditional_children = ()
+
+    def list(self, request, *args, **kwargs):
+        state = list_state(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(state, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+            state = object_state(
+                queryset, self.conditional_related, self.conditional_children
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Некорректный id: 404 отдаст get_object обработчика
+            state = None
+        return self.conditional_response(state, super().retrieve, *args, **kwargs)
+
+    def conditional_response(self, state, handler, *args, **kwargs):
+        if state is None:
+            # Объекта нет - 404 отдаст сам обработчик
+            return handler(self.request, *args, **kwargs)
+
+        last_modified, version = state
+        etag = make_etag(self.request, version)
+        # HTTP-дата с точностью до секунды, If-Modified-Since сравнивается с ней
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(self.request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,103 @@
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+
+from . import cache
+from .delta import delta_export, is_delta_requested
+from .negotiation import ExportContentNegotiation
+from .spec import Column, ExportSpec, Group
+from .streaming import iter_queryset
+
+# Рендереры тянут тяжёлые зависимости (openpyxl, reportlab + регистрация
+# шрифта), поэтому модуль формата импортируется только при первой выгрузке
+# в этом формате, а не при старте воркера.
+EXPORT_BACKENDS = {
+    "csv": "devices.exports.streaming.render_csv",
+    "xlsx": "devices.exports.xlsx.render_xlsx",
+    "json": "devices.exports.json_stream.render_json",
+    "ndjson": "devices.exports.json_stream.render_ndjson",
+    "pdf": "devices.exports.pdf.render_pdf",
+}
+
+# Нужны для отдачи готового файла из кэша без импорта модуля формата
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "pdf": "application/pdf",
+}
+
+
+def register_backend(format_type, renderer_path, content_type):
+    EXPORT_BACKENDS[format_type] = renderer_path
+    EXPORT_CONTENT_TYPES[format_type] = content_type
+
+
+def get_backend(format_type):
+    try:
+        renderer_path = EXPORT_BACKENDS[format_type]
+    except KeyError:
+        raise ValueError(f"Unknown export format: {format_type}")
+    return import_string(renderer_path)
+
+
+def render_export(spec, queryset, format_type):
+    return get_backend(format_type)(spec, queryset)
+
+
+def cached_export(request, spec, queryset, format_type):
+    if not cache.is_cache_enabled():
+        return render_export(spec, queryset, format_type)
+
+    # Версия данных входит в ключ, поэтому устаревшие файлы никогда не
+    # отдаются: после любой правки ключ меняется, а старые записи уходят по LRU.
+    version = cache.data_version(spec.depends_on or [queryset.model])
+    params = cache.normalize_params(request.query_params)
+    key = cache.export_cache_key(spec, format_type, params, version)
+    etag = cache.make_etag(key)
+
+    if cache.etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        path = cache.cache_path(key, format_type)
+        fileobj = cache.open_cached(path)
+        if fileobj is not None:
+            response = FileResponse(
+                fileobj,
+                as_attachment=True,
+                filename=f"{spec.filename}.{format_type}",
+                content_type=EXPORT_CONTENT_TYPES[format_type],
+            )
+        else:
+            response = render_export(spec, queryset, format_type)
+            response.streaming_content = cache.store_streaming(
+                response.streaming_content, path
+            )
+
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def invalid_format_message():
+    formats = list(EXPORT_BACKENDS)
+    return f"Invalid format. Use {', '.join(formats[:-1])}, or {formats[-1]}"
+
+
+__all__ = [
+    "Column",
+    "EXPORT_BACKENDS",
+    "EXPORT_CONTENT_TYPES",
+    "ExportContentNegotiation",
+    "ExportSpec",
+    "Group",
+    "cached_export",
+    "delta_export",
+    "get_backend",
+    "invalid_format_message",
+    "is_delta_requested",
+    "iter_queryset",
+    "register_backend",
+    "render_export",
+]
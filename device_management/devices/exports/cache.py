@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.http import parse_etags, quote_etag
+
+from ..models import DataVersion
+
+# Параметры, которые управляют самой выгрузкой и не влияют на выборку
+CONTROL_PARAMS = {"async", "format"}
+
+
+def is_cache_enabled():
+    return getattr(settings, "EXPORT_CACHE_ENABLED", True)
+
+
+def get_cache_dir():
+    cache_dir = str(
+        getattr(settings, "EXPORT_CACHE_DIR", settings.BASE_DIR / "export_cache")
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_cache_max_size():
+    return getattr(settings, "EXPORT_CACHE_MAX_SIZE", 512 * 1024 * 1024)
+
+
+def normalize_params(query_params):
+    params = {}
+    for key in sorted(query_params.keys()):
+        if key in CONTROL_PARAMS:
+            continue
+        values = sorted(value for value in query_params.getlist(key) if value != "")
+        if values:
+            params[key] = values
+    return params
+
+
+def bump_data_version(*models):
+    # UPDATE ... version + 1 атомарен; строка появляется при первой правке
+    for label in {model._meta.label for model in models}:
+        updated = DataVersion.objects.filter(label=label).update(
+            version=F("version") + 1
+        )
+        if not updated:
+            DataVersion.objects.get_or_create(label=label, defaults={"version": 1})
+
+
+def data_changed(*models):
+    """
+    Поднимает версию таблиц после коммита текущей транзакции. Зовётся
+    сигналами post_save/post_delete (devices.signals) и явно из путей
+    записи в обход сигналов: QuerySet.update(), bulk_create, COPY.
+
+    Выгрузка, прочитавшая данные до коммита, сохраняется под прежней
+    версией и после подъёма больше не отдаётся; прочитавшая новые данные
+    до подъёма - лишь кладёт свежий файл под старый ключ.
+    """
+    transaction.on_commit(lambda: bump_data_version(*models))
+
+
+def data_version(models):
+    # Один запрос к маленькой таблице вместо COUNT/MAX по каждой зависимости
+    labels = sorted({model._meta.label for model in models})
+    versions = dict(
+        DataVersion.objects.filter(label__in=labels).values_list("label", "version")
+    )
+    return [[label, versions.get(label, 0)] for label in labels]
+
+
+def export_cache_key(spec, format_type, params, version):
+    payload = json.dumps([spec.filename, format_type, params, version], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags
+
+
+def make_etag(key):
+    return quote_etag(key)
+
+
+def cache_path(key, format_type):
+    return os.path.join(get_cache_dir(), f"{key}.{format_type}")
+
+
+def open_cached(path):
+    try:
+        fileobj = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    # mtime служит отметкой последнего обращения для LRU-вытеснения
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return fileobj
+
+
+def store_streaming(chunks, path):
+    # Отдаём чанки клиенту и параллельно пишем их во временный файл;
+    # в кэш он попадает атомарным переименованием только после полной выгрузки.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    stored = False
+    try:
+        with os.fdopen(fd, "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+                yield chunk
+        os.replace(tmp_path, path)
+        stored = True
+    finally:
+        if not stored:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    evict(get_cache_max_size())
+
+
+def evict(max_size):
+    entries = []
+    total_size = 0
+    with os.scandir(get_cache_dir()) as it:
+        for entry in it:
+            if not entry.is_file() or entry.name.endswith(".part"):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+    # Самые давно не запрашивавшиеся выгрузки удаляются первыми
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
@@ -0,0 +1,125 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def stdlib_encoder():
+    encoder = json.JSONEncoder(
+        ensure_ascii=False, separators=(",", ":"), default=_default
+    )
+
+    def encode(record):
+        return encoder.encode(record).encode("utf8")
+
+    return encode
+
+
+def orjson_encoder():
+    import orjson
+
+    def encode(record):
+        return orjson.dumps(record, default=_default)
+
+    return encode
+
+
+JSON_ENCODERS = {
+    "json": stdlib_encoder,
+    "orjson": orjson_encoder,
+}
+
+
+def get_encoder(name=None):
+    # По умолчанию берём orjson, если он установлен, иначе стандартный json
+    name = name or getattr(settings, "EXPORT_JSON_ENCODER", "auto")
+    if name == "auto":
+        try:
+            return orjson_encoder()
+        except ImportError:
+            return stdlib_encoder()
+    return JSON_ENCODERS[name]()
+
+
+def iter_ndjson(records, batch_size=500):
+    encode = get_encoder()
+    buffer = []
+    for record in records:
+        buffer.append(encode(record))
+        if len(buffer) >= batch_size:
+            yield b"\n".join(buffer) + b"\n"
+            buffer = []
+    if buffer:
+        yield b"\n".join(buffer) + b"\n"
+
+
+def iter_json_array(records, batch_size=500):
+    # Массив собирается по одной записи: "[", затем записи через ",\n", затем "]"
+    encode = get_encoder()
+    yield b"["
+    separator = b"\n"
+    buffer = []
+    for record in records:
+        buffer.append(separator)
+        buffer.append(encode(record))
+        separator = b",\n"
+        if len(buffer) >= batch_size * 2:
+            yield b"".join(buffer)
+            buffer = []
+    if separator != b"\n":
+        buffer.append(b"\n")
+    buffer.append(b"]")
+    yield b"".join(buffer)
+
+
+def iter_json_delta(header, changed, deleted):
+    # {"watermark": ..., "since": ..., "changed": [...], "deleted": [...]}
+    encode = get_encoder()
+    yield encode(header)[:-1] + b',"changed":'
+    yield from iter_json_array(changed)
+    yield b',"deleted":'
+    yield from iter_json_array(deleted)
+    yield b"}"
+
+
+def iter_ndjson_delta(header, changed, deleted):
+    # Построчно: изменённые записи, удаления и в конце новый водяной знак
+    yield from iter_ndjson({"op": "upsert", "record": record} for record in changed)
+    yield from iter_ndjson({"op": "delete", "id": object_id} for object_id in deleted)
+    yield from iter_ndjson([{"op": "watermark", **header}])
+
+
+def streaming_json_response(filename, records):
+    response = StreamingHttpResponse(
+        iter_json_array(records), content_type="application/json"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def streaming_ndjson_response(filename, records):
+    response = StreamingHttpResponse(
+        iter_ndjson(records), content_type="application/x-ndjson"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def render_json(spec, queryset):
+    return streaming_json_response(f"{spec.filename}.json", spec.iter_records(queryset))
+
+
+def render_ndjson(spec, queryset):
+    return streaming_ndjson_response(
+        f"{spec.filename}.ndjson", spec.iter_records(queryset)
+    )
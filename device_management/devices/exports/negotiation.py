@@ -0,0 +1,8 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    # В export-экшенах ?format= задаёт формат файла (csv, xlsx, ...),
+    # а не рендерер DRF, поэтому рендереры по нему не фильтруем
+    def filter_renderers(self, renderers, format):
+        return renderers
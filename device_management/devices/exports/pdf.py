@@ -0,0 +1,121 @@
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from reportlab.lib import colors
+from reportlab.lib.fonts import addMapping
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+from .streaming import iter_file, spooled_file
+
+font_path = os.path.join(settings.BASE_DIR, "static", "fonts", "arial.ttf")
+font_name = "RusFont"
+
+
+def register_fonts():
+    # Разбор TTF занимает заметное время, поэтому шрифт регистрируется
+    # при первой PDF-выгрузке в процессе, а не при импорте
+    if font_name in pdfmetrics.getRegisteredFontNames():
+        return
+    pdfmetrics.registerFont(TTFont(font_name, font_path))
+    addMapping(font_name, 0, 0, font_name)
+    addMapping(font_name, 0, 1, font_name)
+    addMapping(font_name, 1, 0, font_name)
+    addMapping(font_name, 1, 1, font_name)
+
+
+PAGE_SIZE = landscape(A4)
+MARGIN = 30
+TITLE_HEIGHT = 40
+FOOTER_HEIGHT = 20
+ROW_HEIGHT = 18
+
+TABLE_STYLE = TableStyle(
+    [
+        ("FONTNAME", (0, 0), (-1, -1), font_name),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+    ]
+)
+
+
+def rows_per_page():
+    page_height = PAGE_SIZE[1]
+    available = page_height - 2 * MARGIN - TITLE_HEIGHT - FOOTER_HEIGHT
+    # Одна строка уходит на повторяющийся заголовок таблицы
+    return int(available // ROW_HEIGHT) - 1
+
+
+def write_pdf(fileobj, title, headers, rows, col_widths=None):
+    # Вместо одной огромной Table, которую platypus раскладывает целиком,
+    # режем строки на блоки ровно по странице: у каждой строки фиксированная
+    # высота, поэтому блок всегда помещается, а раскладка стоит O(строк на странице).
+    page_width, page_height = PAGE_SIZE
+    if col_widths is None:
+        col_widths = [(page_width - 2 * MARGIN) / len(headers)] * len(headers)
+    table_width = sum(col_widths)
+    block_size = rows_per_page()
+    register_fonts()
+
+    pdf = canvas.Canvas(fileobj, pagesize=PAGE_SIZE, pageCompression=1)
+    pdf.setTitle(title)
+
+    rows = iter(rows)
+    page_number = 0
+    while True:
+        block = list(islice(rows, block_size))
+        if not block and page_number:
+            break
+        page_number += 1
+
+        pdf.setFont(font_name, 14)
+        pdf.drawCentredString(page_width / 2, page_height - MARGIN - 14, title)
+
+        data = [headers] + block
+        table = Table(data, colWidths=col_widths, rowHeights=ROW_HEIGHT)
+        table.setStyle(TABLE_STYLE)
+        _, table_height = table.wrapOn(pdf, table_width, page_height)
+        table.drawOn(
+            pdf,
+            (page_width - table_width) / 2,
+            page_height - MARGIN - TITLE_HEIGHT - table_height,
+        )
+
+        pdf.setFont(font_name, 9)
+        pdf.drawRightString(page_width - MARGIN, MARGIN, f"Стр. {page_number}")
+        pdf.showPage()
+
+    pdf.save()
+
+
+def iter_pdf(title, headers, rows, col_widths=None):
+    with spooled_file() as output:
+        write_pdf(output, title, headers, rows, col_widths)
+        yield from iter_file(output)
+
+
+def streaming_pdf_response(filename, title, headers, rows, col_widths=None):
+    response = StreamingHttpResponse(
+        iter_pdf(title, headers, rows, col_widths), content_type="application/pdf"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def render_pdf(spec, queryset):
+    return streaming_pdf_response(
+        f"{spec.filename}.pdf",
+        spec.pdf_title,
+        spec.headers(spec.pdf_columns),
+        spec.iter_rows(queryset, spec.pdf_columns),
+        spec.pdf_col_widths,
+    )
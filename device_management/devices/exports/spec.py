@@ -0,0 +1,148 @@
+from .streaming import iter_queryset
+
+# --- TRANSFORMS ---
+# Преобразования считаются один раз при объявлении спецификации и
+# на каждой строке сводятся к вызову простой функции над значением.
+
+
+def choice_display(model, field_name):
+    labels = dict(model._meta.get_field(field_name).flatchoices)
+
+    def transform(value):
+        return labels.get(value, value)
+
+    return transform
+
+
+def or_empty(value):
+    return "" if value is None else value
+
+
+def strftime(fmt):
+    def transform(value):
+        return value.strftime(fmt)
+
+    return transform
+
+
+def isoformat(value):
+    return value.isoformat()
+
+
+def str_or_none(value):
+    return str(value) if value else None
+
+
+def truncate(length):
+    def transform(value):
+        return str(value)[:length]
+
+    return transform
+
+
+DATETIME = strftime("%Y-%m-%d %H:%M:%S")
+DATE = strftime("%Y-%m-%d")
+
+
+class Column:
+    def __init__(self, header, source, transform=None):
+        self.header = header
+        self.source = source
+        self.transform = transform
+
+
+class Group:
+    """Вложенный объект в JSON; None, если поле when пустое (nullable FK)."""
+
+    def __init__(self, when, fields):
+        self.when = when
+        self.fields = fields
+
+
+class ExportSpec:
+    def __init__(
+        self,
+        filename,
+        columns,
+        json_fields,
+        sheet_title=None,
+        pdf_title=None,
+        pdf_columns=None,
+        pdf_col_widths=None,
+        depends_on=None,
+    ):
+        self.filename = filename
+        self.columns = columns
+        self.json_fields = json_fields
+        self.sheet_title = sheet_title or filename
+        self.pdf_title = pdf_title or self.sheet_title
+        self.pdf_columns = pdf_columns or columns
+        self.pdf_col_widths = pdf_col_widths
+        # Таблицы, от которых зависит содержимое выгрузки (для кэша); их правки
+        # должны поднимать версию через devices.exports.cache.data_changed
+        self.depends_on = depends_on
+
+    def headers(self, columns):
+        return [column.header for column in columns]
+
+    def iter_rows(self, queryset, columns):
+        sources = _Sources()
+        getters = [
+            (sources.index(column.source), column.transform) for column in columns
+        ]
+
+        for values in iter_queryset(queryset.values_list(*sources.paths)):
+            yield [
+                transform(values[index]) if transform else values[index]
+                for index, transform in getters
+            ]
+
+    def iter_records(self, queryset):
+        sources = _Sources()
+        layout = _compile_layout(self.json_fields, sources)
+
+        for values in iter_queryset(queryset.values_list(*sources.paths)):
+            yield _build_record(layout, values)
+
+
+class _Sources:
+    """Уникальные пути для values_list() и их позиции в кортеже строки."""
+
+    def __init__(self):
+        self.paths = []
+        self.positions = {}
+
+    def index(self, path):
+        if path not in self.positions:
+            self.positions[path] = len(self.paths)
+            self.paths.append(path)
+        return self.positions[path]
+
+
+def _compile_layout(fields, sources):
+    # Поле JSON: (ключ, путь), (ключ, путь, преобразование) или (ключ, Group)
+    layout = []
+    for key, field, *transform in fields:
+        if isinstance(field, Group):
+            layout.append(
+                (key, sources.index(field.when), _compile_layout(field.fields, sources))
+            )
+        else:
+            layout.append(
+                (key, sources.index(field), transform[0] if transform else None)
+            )
+    return layout
+
+
+def _build_record(layout, values):
+    record = {}
+    for key, index, inner in layout:
+        if isinstance(inner, list):
+            record[key] = (
+                _build_record(inner, values) if values[index] is not None else None
+            )
+        elif inner is None:
+            record[key] = values[index]
+        else:
+            record[key] = inner(values[index])
+    return record
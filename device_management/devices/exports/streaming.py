@@ -0,0 +1,90 @@
+import csv
+import tempfile
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+
+def get_chunk_size():
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+def get_spool_max_size():
+    return getattr(settings, "EXPORT_SPOOL_MAX_SIZE", 8 * 1024 * 1024)
+
+
+def spooled_file():
+    return tempfile.SpooledTemporaryFile(max_size=get_spool_max_size())
+
+
+def iter_file(fileobj, block_size=64 * 1024):
+    fileobj.seek(0)
+    while True:
+        block = fileobj.read(block_size)
+        if not block:
+            break
+        yield block
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+# Колбэк прогресса выставляет фоновый воркер выгрузок (devices.jobs),
+# в обычном запросе он не задан и строки отдаются без обёртки
+export_progress = ContextVar("export_progress", default=None)
+
+
+def iter_queryset(queryset, chunk_size=None):
+    # На PostgreSQL iterator() читает строки серверным курсором порциями,
+    # поэтому в памяти воркера одновременно находится не больше chunk_size объектов.
+    # Вложенные prefetch для выгрузок не нужны — сбрасываем их.
+    chunk_size = chunk_size or get_chunk_size()
+    iterator = queryset.prefetch_related(None).iterator(chunk_size=chunk_size)
+
+    report = export_progress.get()
+    if report is None:
+        return iterator
+    return _iter_with_progress(iterator, chunk_size, report)
+
+
+def _iter_with_progress(iterator, chunk_size, report):
+    count = 0
+    for count, obj in enumerate(iterator, 1):
+        yield obj
+        if count % chunk_size == 0:
+            report(count)
+    report(count)
+
+
+def iter_csv(headers, rows, batch_size=500):
+    writer = csv.writer(Echo())
+    # Заголовок отдаём сразу, чтобы первый байт ушёл до выполнения запроса
+    yield ("\ufeff" + writer.writerow(headers)).encode("utf8")
+
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= batch_size:
+            yield "".join(buffer).encode("utf8")
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode("utf8")
+
+
+def streaming_csv_response(filename, headers, rows):
+    response = StreamingHttpResponse(iter_csv(headers, rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def render_csv(spec, queryset):
+    return streaming_csv_response(
+        f"{spec.filename}.csv",
+        spec.headers(spec.columns),
+        spec.iter_rows(queryset, spec.columns),
+    )
@@ -0,0 +1,92 @@
+import pickle
+
+from django.http import StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from .streaming import iter_file, spooled_file
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+
+
+class ColumnWidthTracker:
+    def __init__(self, headers):
+        self.widths = [len(str(header)) for header in headers]
+
+    def update(self, row):
+        widths = self.widths
+        for index, value in enumerate(row):
+            if value is None:
+                continue
+            length = len(value) if isinstance(value, str) else len(str(value))
+            if length > widths[index]:
+                widths[index] = length
+
+    def apply(self, ws):
+        for index, width in enumerate(self.widths, 1):
+            ws.column_dimensions[get_column_letter(index)].width = width + 2
+
+
+def write_xlsx(fileobj, title, headers, rows):
+    # В write-only режиме ширины колонок пишутся в XML до первой строки,
+    # поэтому сначала сбрасываем строки во временный файл и считаем ширины,
+    # а затем вторым проходом пишем лист. Память не зависит от числа строк.
+    tracker = ColumnWidthTracker(headers)
+    row_count = 0
+
+    with spooled_file() as spool:
+        pickler = pickle.Pickler(spool, protocol=pickle.HIGHEST_PROTOCOL)
+        for row in rows:
+            tracker.update(row)
+            pickler.dump(row)
+            pickler.clear_memo()
+            row_count += 1
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title)
+        tracker.apply(ws)
+
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.fill = HEADER_FILL
+            cell.font = HEADER_FONT
+            cell.alignment = HEADER_ALIGNMENT
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        spool.seek(0)
+        unpickler = pickle.Unpickler(spool)
+        for _ in range(row_count):
+            ws.append(unpickler.load())
+
+        wb.save(fileobj)
+
+
+def iter_xlsx(title, headers, rows):
+    with spooled_file() as output:
+        write_xlsx(output, title, headers, rows)
+        yield from iter_file(output)
+
+
+def streaming_xlsx_response(filename, title, headers, rows):
+    response = StreamingHttpResponse(
+        iter_xlsx(title, headers, rows), content_type=XLSX_CONTENT_TYPE
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def render_xlsx(spec, queryset):
+    return streaming_xlsx_response(
+        f"{spec.filename}.xlsx",
+        spec.sheet_title,
+        spec.headers(spec.columns),
+        spec.iter_rows(queryset, spec.columns),
+    )
@@ -0,0 +1,265 @@
+import csv
+import io
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils.module_loading import import_string
+
+from ..bulk import check_unique, validate_rows
+from ..exports.cache import data_changed
+from ..models import Brand, Category, Device, Location
+from .readers import ImportFileError
+
+# openpyxl импортируется только при первом импорте XLSX, как и в выгрузках
+IMPORT_READERS = {
+    "csv": "devices.imports.readers.read_csv",
+    "xlsx": "devices.imports.xlsx.read_xlsx",
+}
+
+# Колонки файла, которые переносятся в сериализатор как есть
+IMPORT_FIELDS = [
+    "name",
+    "serial_number",
+    "inventory_number",
+    "status",
+    "condition",
+    "purchase_date",
+    "purchase_price",
+    "warranty_until",
+    "notes",
+]
+# Справочники в файле указаны по имени (как в выгрузке devices.csv)
+IMPORT_REFERENCES = [
+    ("category", Category),
+    ("brand", Brand),
+    ("location", Location),
+]
+# В выгрузке статус и состояние - подписи ("In Service"), принимаем и коды
+IMPORT_CHOICES = ["status", "condition"]
+
+REPORT_HEADERS = ["line", "serial_number", "field", "error"]
+
+MISSING = object()
+
+
+class Rollback(Exception):
+    pass
+
+
+def get_chunk_size():
+    return getattr(settings, "DEVICE_IMPORT_CHUNK_SIZE", 5000)
+
+
+def get_reader(format_type):
+    try:
+        reader_path = IMPORT_READERS[format_type]
+    except KeyError:
+        raise ValueError(f"Unknown import format: {format_type}")
+    return import_string(reader_path)
+
+
+def choice_codes(field_name):
+    codes = {}
+    for code, label in Device._meta.get_field(field_name).flatchoices:
+        codes[str(label).lower()] = code
+        codes[code.lower()] = code
+    return codes
+
+
+def iter_chunks(records, size):
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+
+def resolve_names(model, names):
+    # Одна выборка на справочник и чанк. Location.name не уникально:
+    # неоднозначное имя отображается в None
+    lookup = {}
+    for pk, name in model._base_manager.filter(name__in=names).values_list(
+        "pk", "name"
+    ):
+        lookup[name] = None if name in lookup else pk
+    return lookup
+
+
+def flatten_errors(detail):
+    for field, messages in detail.items():
+        if isinstance(messages, dict):
+            messages = [f"{key}: {value}" for key, value in messages.items()]
+        elif not isinstance(messages, list):
+            messages = [messages]
+        for message in messages:
+            yield field, str(message)
+
+
+def copy_devices(devices):
+    """
+    Запись чанка через COPY ... FROM STDIN (PostgreSQL): один поток CSV
+    вместо INSERT. Значения auto_now/auto_now_add заполняет pre_save,
+    search_vector по-прежнему считает БД.
+    """
+    fields = [
+        field
+        for field in Device._meta.concrete_fields
+        if not field.primary_key and not field.generated
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for device in devices:
+        writer.writerow([field.pre_save(device, add=True) for field in fields])
+    buffer.seek(0)
+
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(quote_name(field.column) for field in fields)
+    sql = (
+        f"COPY {quote_name(Device._meta.db_table)} ({columns}) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def write_devices(devices):
+    if connection.vendor == "postgresql":
+        copy_devices(devices)
+    else:
+        Device.objects.bulk_create(devices, batch_size=1000)
+    # COPY и bulk_create не шлют post_save
+    data_changed(Device)
+
+
+class ImportResult:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        # Ошибка чтения файла: импорт остановлен, чанки до неё уже записаны
+        self.error = None
+
+    def as_dict(self):
+        return {
+            "dry_run": self.dry_run,
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "error": self.error,
+        }
+
+
+class DeviceImporter:
+    """
+    Потоковый импорт устройств из CSV/XLSX. Файл читается чанками по
+    chunk_size строк: справочники разрешаются одной выборкой на чанк,
+    строки проверяются так же, как в bulk_create, годные пишутся COPY,
+    ошибки построчно уходят в CSV-отчёт report. Каждый чанк - своя
+    транзакция; при dry_run весь импорт выполняется и откатывается,
+    поэтому дубликаты между чанками ловит сама БД.
+
+    Файл, который перестал читаться посреди импорта (ImportFileError), не
+    откатывает записанные чанки: импорт останавливается, текст ошибки
+    попадает в result.error, счётчики - только по записанным чанкам.
+    """
+
+    def __init__(self, report, dry_run=False, chunk_size=None):
+        self.report = csv.writer(report)
+        self.report.writerow(REPORT_HEADERS)
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size or get_chunk_size()
+        self.choices = {field: choice_codes(field) for field in IMPORT_CHOICES}
+
+    def run(self, records, progress=None):
+        result = ImportResult(self.dry_run)
+        if not self.dry_run:
+            self.import_chunks(records, result, progress)
+            return result
+
+        try:
+            with transaction.atomic():
+                self.import_chunks(records, result, progress)
+                raise Rollback
+        except Rollback:
+            pass
+        return result
+
+    def import_chunks(self, records, result, progress):
+        try:
+            for chunk in iter_chunks(records, self.chunk_size):
+                self.import_chunk(chunk, result)
+                if progress is not None:
+                    progress(result)
+        except ImportFileError as e:
+            result.error = str(e)
+
+    def import_chunk(self, chunk, result):
+        payloads, errors = self.build_payloads(chunk)
+        valid, invalid = validate_rows(payloads)
+        for index, detail in invalid.items():
+            # Ошибка справочника точнее, чем "This field is required."
+            errors[index] = {**detail, **errors.get(index, {})}
+        valid = {index: data for index, data in valid.items() if index not in errors}
+        check_unique(valid, errors)
+
+        devices = [
+            Device(**data) for index, data in valid.items() if index not in errors
+        ]
+        try:
+            with transaction.atomic():
+                write_devices(devices)
+        except IntegrityError:
+            # Номер занят параллельной записью: чанк не записан целиком
+            for index in valid:
+                errors.setdefault(
+                    index, {"non_field_errors": ["Conflicting concurrent write"]}
+                )
+            devices = []
+
+        result.total += len(chunk)
+        result.imported += len(devices)
+        result.failed += len(errors)
+        for index in sorted(errors):
+            line, record = chunk[index]
+            for field, message in flatten_errors(errors[index]):
+                self.report.writerow(
+                    [line, record.get("serial_number", ""), field, message]
+                )
+
+    def build_payloads(self, chunk):
+        lookups = {}
+        for field, model in IMPORT_REFERENCES:
+            names = {record.get(field) for _, record in chunk} - {None, ""}
+            lookups[field] = resolve_names(model, names) if names else {}
+
+        payloads, errors = [], {}
+        for index, (_, record) in enumerate(chunk):
+            payload = {
+                field: record[field] for field in IMPORT_FIELDS if record.get(field)
+            }
+            for field, codes in self.choices.items():
+                if field in payload:
+                    payload[field] = codes.get(payload[field].lower(), payload[field])
+            for field, _ in IMPORT_REFERENCES:
+                name = record.get(field)
+                if not name:
+                    continue
+                pk = lookups[field].get(name, MISSING)
+                if pk is MISSING:
+                    errors.setdefault(index, {})[field] = [f'Unknown {field} "{name}"']
+                elif pk is None:
+                    errors.setdefault(index, {})[field] = [
+                        f'Ambiguous {field} "{name}"'
+                    ]
+                else:
+                    payload[field] = pk
+            payloads.append(payload)
+        return payloads, errors
+
+
+def import_devices(
+    fileobj, format_type, report, dry_run=False, chunk_size=None, progress=None
+):
+    reader = get_reader(format_type)
+    importer = DeviceImporter(report, dry_run=dry_run, chunk_size=chunk_size)
+    return importer.run(reader(fileobj), progress=progress)
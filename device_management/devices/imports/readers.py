@@ -0,0 +1,49 @@
+import csv
+import io
+from datetime import date, datetime
+
+
+class ImportFileError(ValueError):
+    """Файл не читается в заявленном формате."""
+
+
+def normalize_header(header):
+    # "Serial Number" из выгрузки и serial_number - одна и та же колонка
+    return str(header or "").strip().lower().replace(" ", "_")
+
+
+def cell_to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def iter_records(rows):
+    """(номер строки файла, {колонка: текст}) для строк после заголовка."""
+    rows = iter(rows)
+    headers = [normalize_header(header) for header in next(rows, [])]
+    for line, values in enumerate(rows, 2):
+        record = {
+            header: cell_to_text(value)
+            for header, value in zip(headers, values)
+            if header
+        }
+        if any(record.values()):
+            yield line, record
+
+
+def read_csv(fileobj):
+    # utf-8-sig: выгрузка devices.csv начинается с BOM для Excel
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        yield from iter_records(csv.reader(text))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Not a UTF-8 CSV file: {e}")
+    finally:
+        text.detach()
@@ -0,0 +1,18 @@
+from zipfile import BadZipFile
+
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from .readers import ImportFileError, iter_records
+
+
+def read_xlsx(fileobj):
+    # read_only: строки листа разбираются потоково, а не загружаются целиком
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError) as e:
+        raise ImportFileError(f"Not an XLSX file: {e}")
+    try:
+        yield from iter_records(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
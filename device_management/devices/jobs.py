@@ -0,0 +1,287 @@
+import hashlib
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .exports.cache import normalize_params
+from .exports.delta import delta_error, is_delta_requested
+from .exports.streaming import export_progress
+from .models import ExportJob
+
+EXPORT_RESOURCES = {
+    "devices": "devices.views.DeviceViewSet",
+    "loans": "devices.views.LoanViewSet",
+    "reservations": "devices.views.ReservationViewSet",
+    "service_orders": "services.views.ServiceOrderViewSet",
+}
+
+EXPORT_FORMATS = [choice for choice, _ in ExportJob.FORMAT_CHOICES]
+
+
+def is_async_requested(request):
+    return request.query_params.get("async", "").lower() in ("1", "true", "yes")
+
+
+def make_fingerprint(resource, export_format, params):
+    payload = json.dumps([resource, export_format, params], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+def enqueue_export_job(request, resource, export_format):
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {"error": f"Invalid format. Use {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    # Ошибку параметров клиент видит сразу, а не в статусе упавшей задачи
+    if is_delta_requested(request):
+        error = delta_error(request, export_format)
+        if error is not None:
+            return error
+
+    params = normalize_params(request.query_params)
+    fingerprint = make_fingerprint(resource, export_format, params)
+
+    # Иначе запрос присоединится к задаче умершего воркера и будет ждать вечно
+    reclaim_stale_jobs()
+    job = ExportJob.objects.filter(
+        fingerprint=fingerprint, status__in=ExportJob.ACTIVE_STATUSES
+    ).first()
+    created = False
+
+    if job is None:
+        try:
+            with transaction.atomic():
+                job = ExportJob.objects.create(
+                    resource=resource,
+                    export_format=export_format,
+                    params=params,
+                    fingerprint=fingerprint,
+                    created_by=request.user,
+                )
+            created = True
+        except IntegrityError:
+            # Параллельный запрос успел поставить такую же выгрузку
+            job = ExportJob.objects.get(
+                fingerprint=fingerprint, status__in=ExportJob.ACTIVE_STATUSES
+            )
+
+    if created and getattr(settings, "EXPORT_JOBS_SPAWN_WORKER", True):
+        transaction.on_commit(lambda: spawn_export_worker(job.id))
+
+    return Response(
+        job_payload(job, request),
+        status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+    )
+
+
+def job_payload(job, request=None):
+    status_url = reverse("exportjob-detail", args=[job.id])
+    download_url = reverse("exportjob-download", args=[job.id])
+    if request is not None:
+        status_url = request.build_absolute_uri(status_url)
+        download_url = request.build_absolute_uri(download_url)
+
+    return {
+        "id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "status_url": status_url,
+        "download_url": download_url,
+    }
+
+
+def get_max_workers():
+    return getattr(settings, "EXPORT_JOBS_MAX_WORKERS", 2)
+
+
+def spawn_export_worker(job_id):
+    """
+    Запускает отдельный процесс, чтобы рендер не занимал воркер
+    веб-сервера. Если уже выполняется EXPORT_JOBS_MAX_WORKERS задач, процесс
+    не запускается: задача остаётся в очереди, и её заберёт первый
+    освободившийся воркер (run_export_jobs доходит до пустой очереди).
+    Возвращает, запущен ли процесс.
+    """
+    if ExportJob.objects.filter(status="RUNNING").count() >= get_max_workers():
+        return False
+    subprocess.Popen(
+        [
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "run_export_jobs",
+            "--job",
+            str(job_id),
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    return True
+
+
+def claim_next_job(job_id=None):
+    with transaction.atomic():
+        jobs = ExportJob.objects.select_for_update(skip_locked=True).filter(
+            status="PENDING"
+        )
+        if job_id is not None:
+            jobs = jobs.filter(pk=job_id)
+        job = jobs.order_by("created_at").first()
+        if job is None:
+            return None
+
+        job.status = "RUNNING"
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at", "updated_at"])
+        return job
+
+
+def build_export_view(job):
+    viewset_class = import_string(EXPORT_RESOURCES[job.resource])
+
+    query_params = QueryDict(mutable=True)
+    for key, values in job.params.items():
+        query_params.setlist(key, values)
+    query_params["format"] = job.export_format
+
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    http_request.GET = query_params
+    request = Request(http_request)
+    request.user = job.created_by
+
+    view = viewset_class(
+        request=request, args=(), kwargs={}, action="export", format_kwarg=None
+    )
+    return view, request
+
+
+def check_export_response(response):
+    # Ошибка параметров приходит обычным Response, а не потоком файла
+    if response.status_code == 200 and getattr(response, "streaming", False):
+        return
+    data = getattr(response, "data", None)
+    if isinstance(data, dict):
+        detail = data.get("error") or data.get("detail") or data
+    else:
+        detail = data or response.reason_phrase
+    raise ValueError(f"Export failed with status {response.status_code}: {detail}")
+
+
+def run_export_job(job):
+    try:
+        view, request = build_export_view(job)
+        total_rows = view.filter_queryset(view.get_queryset()).count()
+        ExportJob.objects.filter(pk=job.pk).update(
+            total_rows=total_rows, updated_at=timezone.now()
+        )
+
+        def report(processed_rows):
+            # updated_at - признак жизни воркера для reclaim_stale_jobs
+            progress = 100 if not total_rows else processed_rows * 99 // total_rows
+            ExportJob.objects.filter(pk=job.pk).update(
+                processed_rows=processed_rows,
+                progress=progress,
+                updated_at=timezone.now(),
+            )
+
+        token = export_progress.set(report)
+        try:
+            with tempfile.TemporaryFile() as output:
+                response = view.export(request)
+                check_export_response(response)
+                for chunk in response.streaming_content:
+                    output.write(chunk)
+                output.seek(0)
+                job.file.save(
+                    f"{job.resource}_{job.id}.{job.export_format}",
+                    File(output),
+                    save=False,
+                )
+        finally:
+            export_progress.reset(token)
+    except Exception as e:
+        job.status = "FAILED"
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+        return job
+
+    job.status = "COMPLETED"
+    job.progress = 100
+    job.total_rows = total_rows
+    job.processed_rows = total_rows
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=[
+            "status",
+            "file",
+            "progress",
+            "total_rows",
+            "processed_rows",
+            "finished_at",
+            "updated_at",
+        ]
+    )
+    return job
+
+
+def get_retention():
+    return timedelta(hours=getattr(settings, "EXPORT_JOBS_RETENTION_HOURS", 24))
+
+
+def get_stale_timeout():
+    return timedelta(minutes=getattr(settings, "EXPORT_JOBS_STALE_MINUTES", 30))
+
+
+def reclaim_stale_jobs(timeout=None):
+    """
+    Помечает упавшими RUNNING-задачи, которые не обновлялись дольше
+    EXPORT_JOBS_STALE_MINUTES: их воркер умер, не дописав статус. Такая
+    задача больше не активна, и та же выгрузка ставится заново. Возвращает
+    число задач.
+    """
+    now = timezone.now()
+    return ExportJob.objects.filter(
+        status="RUNNING", updated_at__lt=now - (timeout or get_stale_timeout())
+    ).update(
+        status="FAILED",
+        error="Export worker stopped responding",
+        finished_at=now,
+        updated_at=now,
+    )
+
+
+def cleanup_export_jobs(retention=None):
+    """
+    Помечает упавшими зависшие задачи (reclaim_stale_jobs) и удаляет
+    завершённые и упавшие задачи старше срока хранения вместе с файлами.
+    Возвращает число удалённых задач.
+    """
+    reclaim_stale_jobs()
+    cutoff = timezone.now() - (retention or get_retention())
+    jobs = ExportJob.objects.filter(
+        status__in=["COMPLETED", "FAILED"], finished_at__lt=cutoff
+    )
+    deleted = 0
+    for job in jobs.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        deleted += 1
+    return deleted
@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """
+    Транзакция, которая всегда откатывается: строки, засеянные бенчмарком,
+    не остаются в базе. Другие исключения проходят наружу.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
@@ -0,0 +1,100 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from devices.management.benchmark import rolled_back
+from users.models import Role, UserProfile
+from users.roles import get_claims_cache
+
+# Чтение, которое не пишет в базу: справочник из кэша, списки и фильтры по роли
+READ_ENDPOINTS = [
+    "/api/categories/",
+    "/api/devices/?page_size=20",
+    "/api/reservations/",
+    "/api/loans/",
+    "/api/payments/",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark JWT authentication on read endpoints: user loaded from "
+        "auth_user on every request vs built from token claims "
+        "(seeded rows are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests per endpoint and mode",
+        )
+
+    def handle(self, *args, **options):
+        # Без общего кэша версий claims-режим читает users_userprofile
+        # вместо auth_user, и сравнивать нечего (проверка users.E001)
+        if get_claims_cache() is None:
+            raise CommandError("CLAIMS_CACHE_ALIAS must name a shared cache")
+
+        with rolled_back():
+            user = User.objects.create_user("auth-benchmark", password="auth-benchmark")
+            role, _ = Role.objects.get_or_create(name="MANAGER")
+            UserProfile.objects.create(user=user, role=role)
+            self.run(options["requests"])
+
+    def run(self, count):
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            client = APIClient()
+            response = client.post(
+                "/api/token/",
+                {"username": "auth-benchmark", "password": "auth-benchmark"},
+                format="json",
+            )
+            if response.status_code != 200:
+                raise CommandError(f"/api/token/: {response.status_code}")
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+            totals = {}
+            for url in READ_ENDPOINTS:
+                queries = {}
+                for stateless in (False, True):
+                    with override_settings(JWT_STATELESS_USER=stateless):
+                        timings, per_request = self.load(client, url, count)
+                    label = "claims" if stateless else "db user"
+                    totals.setdefault(label, []).extend(timings)
+                    queries[label] = per_request
+                    self.stdout.write(
+                        f"{url} [{label}]: median "
+                        f"{statistics.median(timings) * 1000:.2f} ms, "
+                        f"queries/request {per_request}"
+                    )
+                if queries["claims"] >= queries["db user"]:
+                    raise CommandError(
+                        f"{url}: claims mode did not save a query "
+                        f"({queries['db user']} -> {queries['claims']})"
+                    )
+
+        for label, timings in totals.items():
+            self.stdout.write(
+                f"{label}: {len(timings)} requests, "
+                f"{len(timings) / sum(timings):.0f} req/s"
+            )
+
+    def load(self, client, url, count):
+        # Первый запрос прогревает кэши справочников и счётчиков пагинации
+        client.get(url)
+        timings = []
+        with CaptureQueriesContext(connection) as captured:
+            for _ in range(count):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f"{url}: {response.status_code}")
+        return timings, len(captured) / count
@@ -0,0 +1,116 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from devices.management.benchmark import rolled_back
+from devices.models import Brand, Category, Spec
+
+
+def device_rows(prefix, count, category, brand):
+    return [
+        {
+            "name": f"Bulk device {i}",
+            "serial_number": f"{prefix}-SN-{i:08d}",
+            "inventory_number": f"{prefix}-INV-{i:08d}",
+            "category": category.pk,
+            "brand": brand.pk,
+            "specifications": [
+                {"spec_type": "CPU", "value": "Intel Core i5"},
+                {"spec_type": "RAM", "value": "16 GB"},
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark device onboarding: one POST per device and spec vs "
+        "bulk_create/bulk_update endpoints (data is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--devices",
+            type=int,
+            default=10000,
+            help="Devices per bulk request",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=int,
+            default=200,
+            help="Devices created one by one for the per-row baseline",
+        )
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                self.run(options["devices"], options["baseline"])
+
+    def run(self, count, baseline):
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create_user(
+                username="bulk-benchmark", is_staff=True, is_superuser=True
+            )
+        )
+        category = Category.objects.create(name="Bulk benchmark category")
+        brand = Brand.objects.create(name="Bulk benchmark brand")
+
+        # Прежний путь: устройство и каждая характеристика отдельным запросом
+        # (характеристики через ORM - отдельного endpoint для них нет)
+        rows = device_rows("ROW", baseline, category, brand)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for row in rows:
+                specs = row.pop("specifications")
+                response = client.post("/api/devices/", row, format="json")
+                if response.status_code != 201:
+                    raise CommandError(f"POST /api/devices/ returned {response.data}")
+                for spec in specs:
+                    Spec.objects.create(device_id=response.data["id"], **spec)
+            elapsed = time.perf_counter() - started
+        self.report("per-row", baseline, elapsed, len(queries))
+
+        rows = device_rows("BULK", count, category, brand)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.post("/api/devices/bulk_create/", rows, format="json")
+            elapsed = time.perf_counter() - started
+        self.ensure_saved(response, count)
+        self.report("bulk_create", count, elapsed, len(queries))
+
+        ids = [result["id"] for result in response.data["results"]]
+        for name, rows in [
+            ("bulk_update same", [{"id": pk, "status": "RETIRED"} for pk in ids]),
+            (
+                "bulk_update distinct",
+                [{"id": pk, "notes": f"Checked #{pk}"} for pk in ids],
+            ),
+        ]:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.patch(
+                    "/api/devices/bulk_update/", rows, format="json"
+                )
+                elapsed = time.perf_counter() - started
+            self.ensure_saved(response, count)
+            self.report(name, count, elapsed, len(queries))
+
+    def ensure_saved(self, response, count):
+        if response.status_code != 200 or response.data["saved"] != count:
+            raise CommandError(
+                f"Bulk request failed: {response.status_code} "
+                f"{response.data.get('failed')} rows with errors"
+            )
+
+    def report(self, name, count, elapsed, queries):
+        self.stdout.write(
+            f"{name:20} rows={count:<7} time={elapsed:7.2f} s "
+            f"rows/s={count / elapsed:9.0f} queries={queries}"
+        )
@@ -0,0 +1,220 @@
+import time
+import tracemalloc
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from devices.exports.pdf import register_fonts, write_pdf
+from devices.exports.streaming import spooled_file
+from devices.exports.xlsx import write_xlsx
+
+HEADERS = [
+    "ID",
+    "Name",
+    "Serial Number",
+    "Inventory Number",
+    "Category",
+    "Brand",
+    "Status",
+    "Condition",
+    "Location",
+    "Purchase Date",
+    "Purchase Price",
+    "Warranty Until",
+    "Created At",
+]
+
+
+def synthetic_rows(count):
+    created_at = datetime(2025, 1, 1, 12, 0, 0).strftime("%Y-%m-%d %H:%M:%S")
+    for i in range(1, count + 1):
+        yield [
+            i,
+            f"Device {i}",
+            f"SN-{i:08d}",
+            f"INV-{i:08d}",
+            "Laptops",
+            "Dell",
+            "Available",
+            "Good",
+            "Main warehouse",
+            date(2024, 1, 1),
+            Decimal("1299.90"),
+            date(2027, 1, 1),
+            created_at,
+        ]
+
+
+PDF_HEADERS = ["ID", "Название", "Серийный №", "Статус", "Состояние"]
+PDF_COL_WIDTHS = [40, 200, 100, 100, 100]
+
+
+def synthetic_pdf_rows(count):
+    for i in range(1, count + 1):
+        yield [str(i), f"Device {i}"[:25], f"SN-{i:08d}", "Available", "Good"]
+
+
+def legacy_xlsx(fileobj, title, headers, rows):
+    # Прежняя реализация: обычная книга, ws.cell() на каждую ячейку
+    # и отдельный проход по ws.columns для ширин
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title
+
+    header_fill = PatternFill(
+        start_color="366092", end_color="366092", fill_type="solid"
+    )
+    header_font = Font(bold=True, color="FFFFFF")
+
+    for col_num, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col_num)
+        cell.value = header
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+
+    for row_num, row in enumerate(rows, 2):
+        for col_num, value in enumerate(row, 1):
+            ws.cell(row=row_num, column=col_num).value = value
+
+    for col in ws.columns:
+        max_length = 0
+        column = col[0].column_letter
+        for cell in col:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(cell.value)
+            except:
+                pass
+        ws.column_dimensions[column].width = max_length + 2
+
+    wb.save(fileobj)
+
+
+def legacy_pdf(fileobj, title, headers, rows):
+    # Прежняя реализация: одна Table на все строки и SimpleDocTemplate.build
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    from devices.exports.pdf import font_name
+
+    register_fonts()
+    doc = SimpleDocTemplate(fileobj, pagesize=landscape(A4))
+    styles = getSampleStyleSheet()
+    header_style = ParagraphStyle(
+        "RusHeader",
+        parent=styles["Normal"],
+        fontName=font_name,
+        fontSize=14,
+        alignment=1,
+        spaceAfter=20,
+    )
+
+    table = Table([headers] + list(rows), colWidths=PDF_COL_WIDTHS)
+    table.setStyle(
+        TableStyle(
+            [
+                ("FONTNAME", (0, 0), (-1, -1), font_name),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("GRID", (0, 0), (-1, -1), 1, colors.black),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+            ]
+        )
+    )
+    doc.build([Paragraph(title, header_style), table])
+
+
+def paged_pdf(fileobj, title, headers, rows):
+    write_pdf(fileobj, title, headers, rows, col_widths=PDF_COL_WIDTHS)
+
+
+BENCHMARKS = {
+    "xlsx": {
+        "headers": HEADERS,
+        "rows": synthetic_rows,
+        "renderers": [
+            ("legacy", legacy_xlsx),
+            ("write-only", write_xlsx),
+        ],
+    },
+    "pdf": {
+        "headers": PDF_HEADERS,
+        "rows": synthetic_pdf_rows,
+        "renderers": [
+            ("legacy", legacy_pdf),
+            ("paged", paged_pdf),
+        ],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark export renderers on synthetic rows (time and peak memory)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=sorted(BENCHMARKS),
+            default="xlsx",
+            help="Export format to benchmark",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            help="Row counts to benchmark (default: 10000 50000 for xlsx, "
+            "10000 100000 for pdf)",
+        )
+        parser.add_argument(
+            "--skip-legacy",
+            action="store_true",
+            help="Only run the current renderer",
+        )
+
+    def handle(self, *args, **options):
+        format_type = options["format"]
+        benchmark = BENCHMARKS[format_type]
+        counts = options["rows"] or (
+            [10000, 100000] if format_type == "pdf" else [10000, 50000]
+        )
+        renderers = benchmark["renderers"]
+        if options["skip_legacy"]:
+            renderers = renderers[1:]
+
+        for count in counts:
+            for name, renderer in renderers:
+                elapsed, peak, size = self.measure(benchmark, renderer, count)
+                self.stdout.write(
+                    f"{format_type:5} {name:12} rows={count:<8} "
+                    f"time={elapsed:8.2f}s peak={peak / 1024 / 1024:8.1f} MB "
+                    f"size={size / 1024 / 1024:6.1f} MB"
+                )
+
+    def measure(self, benchmark, renderer, count):
+        # Время и память меряем разными прогонами: tracemalloc сильно
+        # замедляет выполнение
+        headers, make_rows = benchmark["headers"], benchmark["rows"]
+
+        with spooled_file() as output:
+            started = time.perf_counter()
+            renderer(output, "Devices", headers, make_rows(count))
+            elapsed = time.perf_counter() - started
+            output.seek(0, 2)
+            size = output.tell()
+
+        with spooled_file() as output:
+            tracemalloc.start()
+            renderer(output, "Devices", headers, make_rows(count))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        return elapsed, peak, size
@@ -0,0 +1,104 @@
+import csv
+import io
+import resource
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from devices.imports import import_devices
+from devices.management.benchmark import rolled_back
+from devices.models import Brand, Category, Location
+from devices.utils import DEVICE_EXPORT
+
+
+def write_csv(fileobj, count, invalid_every):
+    # Те же колонки, что у выгрузки devices.csv; каждая invalid_every-я
+    # строка ссылается на несуществующую категорию
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text)
+    writer.writerow(DEVICE_EXPORT.headers(DEVICE_EXPORT.columns))
+    for i in range(count):
+        invalid = invalid_every and i % invalid_every == invalid_every - 1
+        writer.writerow(
+            [
+                "",
+                f"Imported device {i}",
+                f"IMPORT-SN-{i:09d}",
+                f"IMPORT-INV-{i:09d}",
+                "Missing category" if invalid else "Import benchmark category",
+                "Import benchmark brand",
+                "Available",
+                "Good",
+                "Import benchmark location",
+                "2024-01-15",
+                "899.00",
+                "2027-01-15",
+                "",
+            ]
+        )
+    text.flush()
+    text.detach()
+    fileobj.seek(0)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the streaming device import on a generated CSV file "
+        "(imported rows are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=500000,
+            help="Rows in the generated file",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Rows per chunk (default: DEVICE_IMPORT_CHUNK_SIZE)",
+        )
+        parser.add_argument(
+            "--invalid-every",
+            type=int,
+            default=100,
+            help="Every N-th row is invalid (0 - none)",
+        )
+
+    def handle(self, *args, **options):
+        count = options["rows"]
+        with tempfile.TemporaryFile() as fileobj, tempfile.TemporaryFile(
+            "w+", encoding="utf-8", newline=""
+        ) as report:
+            write_csv(fileobj, count, options["invalid_every"])
+            self.stdout.write(
+                f"generated {count} rows, peak RSS before import "
+                f"{peak_rss_mb():.0f} MB"
+            )
+            with rolled_back():
+                Category.objects.create(name="Import benchmark category")
+                Brand.objects.create(name="Import benchmark brand")
+                Location.objects.create(name="Import benchmark location")
+                started = time.perf_counter()
+                result = import_devices(
+                    fileobj, "csv", report, chunk_size=options["chunk_size"]
+                )
+                elapsed = time.perf_counter() - started
+
+            report.seek(0)
+            report_lines = sum(1 for _ in report) - 1
+
+        if result.imported + result.failed != count:
+            raise CommandError(f"Rows lost: {result.as_dict()}")
+        self.stdout.write(
+            f"{connection.vendor}: {result.imported} imported, {result.failed} "
+            f"rejected ({report_lines} report lines) in {elapsed:.1f}s, "
+            f"{count / elapsed:.0f} rows/s, peak RSS {peak_rss_mb():.0f} MB"
+        )
@@ -0,0 +1,161 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from devices.management.benchmark import rolled_back
+from devices.models import Brand, Category, Device
+from devices.search import FUZZY_LOOKUP_FIELDS, FUZZY_LOOKUP_LIMIT, fuzzy_matches
+
+ALPHABET = "0123456789ABCDEFGHJKLMNPRSTUVWXYZ"
+
+
+def random_code(rng, length=12):
+    # Номера производителей разрежены и без общего префикса, в отличие от
+    # сквозной инвентарной нумерации
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def seed_devices(rng, count, batch_size=10000):
+    codes = []
+    category = Category.objects.create(name="Lookup benchmark category")
+    brand = Brand.objects.create(name="Lookup benchmark brand")
+    for start in range(0, count, batch_size):
+        batch = [
+            Device(
+                name=f"Lookup device {i}",
+                serial_number=random_code(rng),
+                inventory_number=f"LOOKUP-INV-{i:09d}",
+                category=category,
+                brand=brand,
+            )
+            for i in range(start, min(start + batch_size, count))
+        ]
+        Device.objects.bulk_create(batch)
+        codes.extend(device.serial_number for device in batch)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE devices_device")
+        # Вставки копятся в pending list GIN-индекса, пока его не разберёт
+        # autovacuum; без этого замер показывал бы поиск по неразобранному хвосту
+        cursor.execute(
+            "SELECT gin_clean_pending_list('device_serial_trgm_idx'), "
+            "gin_clean_pending_list('device_inventory_trgm_idx')"
+        )
+    return codes
+
+
+def mistype(rng, code):
+    # Одна ошибка сканера/оператора: замена символа номера
+    positions = [i for i, char in enumerate(code) if char in ALPHABET]
+    i = rng.choice(positions)
+    return code[:i] + rng.choice(ALPHABET.replace(code[i], "")) + code[i + 1 :]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark device lookups: exact vs trigram (pg_trgm) fuzzy by_serial "
+        "on mistyped codes and batch_lookup of scanned codes, PostgreSQL only "
+        "(seeded rows are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--devices",
+            type=int,
+            default=1000000,
+            help="Devices to seed",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=50,
+            help="Lookups per mode",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=1000,
+            help="Codes per batch_lookup request",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Trigram lookup benchmark requires PostgreSQL")
+
+        count = options["devices"]
+        rng = random.Random(count)
+        with rolled_back():
+            started = time.perf_counter()
+            codes = seed_devices(rng, count)
+            self.stdout.write(
+                f"seeded {count} devices in {time.perf_counter() - started:.1f}s"
+            )
+            self.run(rng.sample(codes, options["samples"]), rng)
+            self.run_batch(rng, codes, options["batch"], options["samples"])
+
+    def run(self, codes, rng):
+        queryset = Device.objects.select_related("category", "brand", "location").defer(
+            "search_vector"
+        )
+
+        timings = []
+        for code in codes:
+            started = time.perf_counter()
+            queryset.get(serial_number=code)
+            timings.append(time.perf_counter() - started)
+        self.report("exact", timings, len(codes))
+
+        timings = []
+        found = 0
+        for code in codes:
+            started = time.perf_counter()
+            matches = fuzzy_matches(
+                queryset, mistype(rng, code), FUZZY_LOOKUP_FIELDS, FUZZY_LOOKUP_LIMIT
+            )
+            timings.append(time.perf_counter() - started)
+            found += any(device.serial_number == code for device, _, _ in matches)
+        self.report("fuzzy", timings, found)
+
+    def run_batch(self, rng, codes, size, samples):
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create_user(
+                username="lookup-benchmark", is_staff=True, is_superuser=True
+            )
+        )
+
+        timings = []
+        found = 0
+        budget = set()
+        for _ in range(max(1, samples // 10)):
+            # Каждый десятый код в пачке - несуществующий
+            batch = [
+                mistype(rng, code) if i % 10 == 9 else code
+                for i, code in enumerate(rng.sample(codes, size))
+            ]
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.post(
+                        "/api/devices/batch_lookup/", {"codes": batch}, format="json"
+                    )
+                    timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"batch_lookup returned {response.status_code}")
+            found += len(response.data["found"])
+            budget.add(len(queries))
+        self.report(f"batch{size}", timings, found)
+        self.stdout.write(f"batch queries per request: {sorted(budget)}")
+
+    def report(self, name, timings, found):
+        timings = sorted(timing * 1000 for timing in timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{name:9} samples={len(timings):<5} found={found:<5} "
+            f"median={statistics.median(timings):7.2f} ms p95={p95:7.2f} ms"
+        )
@@ -0,0 +1,247 @@
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from devices.management.benchmark import rolled_back
+from devices.models import Brand, Category, Device, Loan, Location, Reservation
+from services.models import Payment, ServiceOrder
+
+# (название, URL, таблица, которую запрос страницы не должен читать целиком)
+ENDPOINTS = [
+    ("device status", "/api/devices/?status=IN_SERVICE", "devices_device"),
+    (
+        "device status cursor",
+        "/api/devices/?status=IN_SERVICE&pagination=cursor",
+        "devices_device",
+    ),
+    ("device available", "/api/devices/available/", "devices_device"),
+    (
+        "loan status due",
+        "/api/loans/?status=OVERDUE&ordering=due_date",
+        "devices_loan",
+    ),
+    ("loan active", "/api/loans/active/", "devices_loan"),
+    ("loan overdue", "/api/loans/overdue/", "devices_loan"),
+    ("loan my_loans", "/api/loans/my_loans/", "devices_loan"),
+    (
+        "reservation device",
+        "/api/reservations/?device={device}&ordering=reserved_from",
+        "devices_reservation",
+    ),
+    (
+        "reservation mine",
+        "/api/reservations/my_reservations/",
+        "devices_reservation",
+    ),
+    (
+        "service status prio",
+        "/api/service-orders/?status=IN_PROGRESS&ordering=priority",
+        "services_serviceorder",
+    ),
+    ("service pending", "/api/service-orders/pending/", "services_serviceorder"),
+    (
+        "service in_progress",
+        "/api/service-orders/in_progress/",
+        "services_serviceorder",
+    ),
+    ("payment mine", "/api/payments/my_payments/", "services_payment"),
+    ("payment paid_by", "/api/payments/?paid_by={user}", "services_payment"),
+    ("payment by_type", "/api/payments/by_type/?type=FINE", "services_payment"),
+]
+
+SEEDED_TABLES = [
+    "devices_device",
+    "devices_loan",
+    "devices_reservation",
+    "services_serviceorder",
+    "services_payment",
+]
+
+
+def seed(devices, users):
+    now = timezone.now()
+    user = User.objects.create_user(
+        username="plan-benchmark", is_staff=True, is_superuser=True
+    )
+    people = [user] + User.objects.bulk_create(
+        User(username=f"plan-benchmark-{i}") for i in range(users)
+    )
+    category = Category.objects.create(name="Plan benchmark category")
+    brand = Brand.objects.create(name="Plan benchmark brand")
+    location = Location.objects.create(name="Plan benchmark location")
+
+    statuses = [value for value, _ in Device.STATUS_CHOICES]
+    created = Device.objects.bulk_create(
+        (
+            Device(
+                name=f"Plan device {i}",
+                serial_number=f"PLAN-SN-{i:08d}",
+                inventory_number=f"PLAN-INV-{i:08d}",
+                category=category,
+                brand=brand,
+                location=location,
+                # Горячие статусы (IN_SERVICE) встречаются редко
+                status=statuses[0] if i % 50 else statuses[3],
+            )
+            for i in range(devices)
+        ),
+        batch_size=2000,
+    )
+
+    loan_statuses = ["RETURNED"] * 18 + ["ACTIVE", "OVERDUE"]
+    Loan.objects.bulk_create(
+        (
+            Loan(
+                user=people[i % len(people)],
+                device=device,
+                manager=user,
+                due_date=now + timedelta(days=i % 60 - 30),
+                status=loan_statuses[i % len(loan_statuses)],
+            )
+            for i, device in enumerate(created)
+        ),
+        batch_size=2000,
+    )
+    Reservation.objects.bulk_create(
+        (
+            Reservation(
+                user=people[i % len(people)],
+                device=created[i % 100],
+                reserved_from=now + timedelta(hours=i),
+                reserved_until=now + timedelta(hours=i + 2),
+                status="COMPLETED",
+            )
+            for i in range(devices)
+        ),
+        batch_size=2000,
+    )
+    order_statuses = ["COMPLETED"] * 18 + ["PENDING", "IN_PROGRESS"]
+    priorities = [value for value, _ in ServiceOrder.PRIORITY_CHOICES]
+    ServiceOrder.objects.bulk_create(
+        (
+            ServiceOrder(
+                device=device,
+                issue_description="Plan benchmark issue",
+                status=order_statuses[i % len(order_statuses)],
+                priority=priorities[i % len(priorities)],
+                created_by=user,
+            )
+            for i, device in enumerate(created)
+        ),
+        batch_size=2000,
+    )
+    payment_types = [value for value, _ in Payment.PAYMENT_TYPE_CHOICES]
+    Payment.objects.bulk_create(
+        (
+            Payment(
+                amount=Decimal("10.00"),
+                payment_type=payment_types[i % len(payment_types)],
+                paid_by=people[i % len(people)],
+            )
+            for i in range(devices)
+        ),
+        batch_size=2000,
+    )
+
+    with connection.cursor() as cursor:
+        for table in SEEDED_TABLES:
+            cursor.execute(f"ANALYZE {table}")
+    return user, created[0]
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql)
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def seq_scan_pattern(table):
+    if connection.vendor == "postgresql":
+        return re.compile(rf"Seq Scan on {table}\b")
+    return re.compile(rf"^SCAN {table}$")
+
+
+def page_queries(queries):
+    # Проверяются выборки страниц; COUNT(*) по большой доле таблицы
+    # законно читает её целиком, а EXPLAIN - служебные запросы оценки
+    for query in queries:
+        sql = query["sql"]
+        if sql.startswith("EXPLAIN") or " LIMIT " not in sql:
+            continue
+        yield sql
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large dataset, EXPLAIN the queries of list endpoints and fail "
+        "when a page query falls back to a sequential scan (data is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--devices",
+            type=int,
+            default=50000,
+            help="Devices to seed; loans, reservations, service orders "
+            "and payments are seeded in the same amount",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=200,
+            help="Users to spread loans, reservations and payments across",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("postgresql", "sqlite"):
+            raise CommandError(f"Unsupported database: {connection.vendor}")
+
+        failures = []
+        with rolled_back():
+            user, device = seed(options["devices"], options["users"])
+            failures = self.run(user, device, options["verbosity"])
+
+        if failures:
+            raise CommandError(
+                "Sequential scan in page queries: " + ", ".join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS("No sequential scans in page queries"))
+
+    def run(self, user, device, verbosity):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        failures = []
+
+        for name, url, table in ENDPOINTS:
+            url = url.format(user=user.pk, device=device.pk)
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+
+            pattern = seq_scan_pattern(table)
+            for sql in page_queries(queries.captured_queries):
+                plan = explain(sql)
+                seq_scan = any(pattern.search(line.strip()) for line in plan)
+                timing = [line for line in plan if "Execution Time" in line]
+                self.stdout.write(
+                    f"{name:22} {'SEQ SCAN' if seq_scan else 'ok':8} "
+                    f"{timing[0].strip() if timing else ''}"
+                )
+                if seq_scan:
+                    failures.append(name)
+                if seq_scan or verbosity > 1:
+                    for line in plan:
+                        self.stdout.write(f"    {line}")
+        return failures
@@ -0,0 +1,137 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from devices.management.benchmark import rolled_back
+from devices.models import Brand, Category, Device
+from devices.search import SEARCH_RANK, FullTextSearchFilter
+from devices.views import DeviceViewSet
+
+NAMES = [
+    "Ноутбук Latitude",
+    "Ноутбук ThinkPad",
+    "Монитор UltraSharp",
+    "Принтер LaserJet",
+    "Проектор Epson",
+    "Сканер ScanJet",
+    "Планшет Galaxy Tab",
+    "Маршрутизатор MikroTik",
+]
+NOTES = [
+    None,
+    None,
+    "Царапина на корпусе",
+    "Замена батареи в 2024",
+    "Выдаётся только преподавателям",
+    "Spare unit, keyboard replaced",
+]
+DEFAULT_TERMS = ["latitude", "ноут", "SN-00012", "царапина", "keyboard replaced"]
+
+
+def seed_devices(count):
+    rng = random.Random(count)
+    category = Category.objects.create(name="Search benchmark category")
+    brand = Brand.objects.create(name="Search benchmark brand")
+    Device.objects.bulk_create(
+        (
+            Device(
+                name=f"{rng.choice(NAMES)} {rng.randint(100, 999)}",
+                serial_number=f"SN-{i:08d}",
+                inventory_number=f"INV-{i:08d}",
+                category=category,
+                brand=brand,
+                notes=rng.choice(NOTES),
+            )
+            for i in range(count)
+        ),
+        batch_size=2000,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE devices_device")
+
+
+def search(backend, term):
+    request = Request(APIRequestFactory().get("/", {"search": term}))
+    queryset = Device.objects.defer("search_vector")
+    queryset = backend().filter_queryset(request, queryset, DeviceViewSet())
+    if SEARCH_RANK in queryset.query.annotations:
+        return queryset.order_by(f"-{SEARCH_RANK}", "-created_at")
+    return queryset.order_by("-created_at")
+
+
+def scan_type(queryset):
+    plan = queryset.explain()
+    # Одна неиндексируемая ветка OR - и читается вся таблица
+    if "Seq Scan on devices_device" in plan:
+        return "seq"
+    if "device_search_idx" in plan:
+        return "gin"
+    return "index"
+
+
+BACKENDS = [
+    ("icontains", filters.SearchFilter),
+    ("fulltext", FullTextSearchFilter),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ?search= on devices: SearchFilter (icontains) vs tsvector "
+        "full-text search, PostgreSQL only (seeded rows are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--devices",
+            type=int,
+            default=100000,
+            help="Devices to seed",
+        )
+        parser.add_argument(
+            "--term",
+            action="append",
+            dest="terms",
+            help="Search term (repeatable, default: a built-in set)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Runs per query, the best time is reported",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Full-text search benchmark requires PostgreSQL")
+
+        with rolled_back():
+            seed_devices(options["devices"])
+            for term in options["terms"] or DEFAULT_TERMS:
+                for name, backend in BACKENDS:
+                    self.measure(name, backend, term, options["repeat"])
+
+    def measure(self, name, backend, term, repeat):
+        queryset = search(backend, term)
+        count_time = page_time = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = queryset.count()
+            elapsed = time.perf_counter() - started
+            count_time = elapsed if count_time is None else min(count_time, elapsed)
+
+            started = time.perf_counter()
+            list(queryset[:20])
+            elapsed = time.perf_counter() - started
+            page_time = elapsed if page_time is None else min(page_time, elapsed)
+
+        self.stdout.write(
+            f"{term[:18]:18} {name:10} rows={count:<8} "
+            f"count={count_time * 1000:8.1f} ms page={page_time * 1000:8.1f} ms "
+            f"scan={scan_type(queryset)}"
+        )
@@ -0,0 +1,106 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from devices.management.benchmark import rolled_back
+from devices.models import Brand, Category, Device, Location
+from devices.serializers import DeviceListSerializer
+
+
+class LegacyDeviceListSerializer(DeviceListSerializer):
+    # Прежний путь: объекты Device через select_related и обычный ListSerializer
+    class Meta(DeviceListSerializer.Meta):
+        list_serializer_class = serializers.ListSerializer
+
+
+def seed_devices(count):
+    category = Category.objects.create(name="Benchmark category")
+    brand = Brand.objects.create(name="Benchmark brand")
+    location = Location.objects.create(name="Benchmark location")
+    statuses = [value for value, _ in Device.STATUS_CHOICES]
+    Device.objects.bulk_create(
+        (
+            Device(
+                name=f"Benchmark device {i}",
+                serial_number=f"BENCH-SN-{i:08d}",
+                inventory_number=f"BENCH-INV-{i:08d}",
+                category=category,
+                brand=brand,
+                location=location,
+                status=statuses[i % len(statuses)],
+                purchase_date=date(2024, 1, 1),
+                purchase_price=Decimal("1299.90"),
+            )
+            for i in range(count)
+        ),
+        batch_size=1000,
+    )
+    return Device.objects.filter(category=category).order_by("-created_at", "-pk")
+
+
+def render_legacy(queryset):
+    queryset = queryset.select_related("category", "brand")
+    return JSONRenderer().render(LegacyDeviceListSerializer(queryset, many=True).data)
+
+
+def render_projection(queryset):
+    return JSONRenderer().render(DeviceListSerializer(queryset, many=True).data)
+
+
+RENDERERS = [
+    ("legacy", render_legacy),
+    ("projection", render_projection),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark DeviceListSerializer: model instances vs values() projection "
+        "(seeded rows are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[1000, 10000],
+            help="Rows per page to benchmark (default: 1000 10000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Runs per renderer, the best time is reported",
+        )
+
+    def handle(self, *args, **options):
+        for count in options["rows"]:
+            with rolled_back():
+                queryset = seed_devices(count)
+                self.run(queryset, count, options["repeat"])
+
+    def run(self, queryset, count, repeat):
+        outputs = {}
+        for name, renderer in RENDERERS:
+            best = None
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    content = renderer(queryset)
+                    elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            outputs[name] = content
+            self.stdout.write(
+                f"{name:12} rows={count:<8} time={best * 1000:9.1f} ms "
+                f"queries={len(queries)} size={len(content) / 1024:8.1f} KB"
+            )
+
+        if len(set(outputs.values())) != 1:
+            raise CommandError(f"Serialized output differs for rows={count}")
@@ -0,0 +1,195 @@
+import statistics
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from devices.management.benchmark import rolled_back
+from devices.models import Brand, Category, Device, Loan, Reservation, Return
+from devices.timeline import TIMELINE_SOURCES
+from services.models import Payment, ServiceOrder, ServiceWork
+
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# (таблица, колонка времени) - auto_now_add не даёт задать время при вставке
+TIMESTAMP_COLUMNS = [
+    (Loan, "loaned_at"),
+    (Return, "returned_at"),
+    (Reservation, "created_at"),
+    (ServiceOrder, "created_at"),
+    (ServiceWork, "performed_at"),
+    (Payment, "paid_at"),
+]
+
+
+def seed_events(devices, user, count):
+    loans = Loan.objects.bulk_create(
+        Loan(user=user, device=device, due_date=BASE_TIME, status="RETURNED")
+        for device in devices
+        for _ in range(count)
+    )
+    Return.objects.bulk_create(
+        Return(loan=loan, condition="GOOD", inspected_by=user) for loan in loans[::2]
+    )
+    Reservation.objects.bulk_create(
+        Reservation(
+            user=user,
+            device=device,
+            reserved_from=BASE_TIME,
+            reserved_until=BASE_TIME,
+        )
+        for device in devices
+        for _ in range(count)
+    )
+    orders = ServiceOrder.objects.bulk_create(
+        ServiceOrder(device=device, issue_description="Timeline", created_by=user)
+        for device in devices
+        for _ in range(count)
+    )
+    ServiceWork.objects.bulk_create(
+        ServiceWork(
+            service_order=order,
+            work_description="Timeline",
+            cost=Decimal("10.00"),
+            performed_by=user,
+        )
+        for order in orders
+        for _ in range(2)
+    )
+    # Часть платежей привязана и к выдаче, и к заявке того же устройства
+    Payment.objects.bulk_create(
+        Payment(
+            amount=Decimal("5.00"),
+            payment_type="FEE",
+            paid_by=user,
+            related_loan=loan,
+            related_service_order=order if i % 3 == 0 else None,
+        )
+        for i, (loan, order) in enumerate(zip(loans[1::2], orders[1::2]))
+    )
+    Payment.objects.bulk_create(
+        Payment(
+            amount=Decimal("7.00"),
+            payment_type="REPAIR",
+            paid_by=user,
+            related_service_order=order,
+        )
+        for order in orders[::2]
+    )
+    with connection.cursor() as cursor:
+        for model, column in TIMESTAMP_COLUMNS:
+            # Время с шагом в минуту и повторами: проверяет порядок при равных
+            # occurred_at внутри таблицы и между таблицами
+            cursor.execute(
+                f"UPDATE {model._meta.db_table} "
+                f"SET {column} = %s - ((id * 7919) %% %s) * interval '1 minute'",
+                [BASE_TIME, count * 3],
+            )
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+
+def expected_timeline(device_pk):
+    # Эталон: все события устройства, отсортированные в Python
+    events = []
+    for source in TIMELINE_SOURCES:
+        queryset = source.events(device_pk)
+        for pk, occurred_at in queryset.values_list("pk", source.occurred_at):
+            events.append((occurred_at, source.kind, pk))
+    events.sort(reverse=True)
+    return [(kind, pk) for _, kind, pk in events]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the device timeline (UNION ALL of loans, returns, "
+        "reservations, service orders, works and payments) walking all pages "
+        "forwards and backwards (seeded rows are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--events",
+            type=int,
+            default=2000,
+            help="Loans, reservations and service orders per device",
+        )
+        parser.add_argument(
+            "--devices",
+            type=int,
+            default=50,
+            help="Devices with the same history (only the first is paged)",
+        )
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            category = Category.objects.create(name="Timeline benchmark category")
+            brand = Brand.objects.create(name="Timeline benchmark brand")
+            devices = Device.objects.bulk_create(
+                Device(
+                    name=f"Timeline device {i}",
+                    serial_number=f"TIMELINE-SN-{i:06d}",
+                    inventory_number=f"TIMELINE-INV-{i:06d}",
+                    category=category,
+                    brand=brand,
+                )
+                for i in range(options["devices"])
+            )
+            user = User.objects.create_superuser(
+                "timeline-benchmark", password="timeline-benchmark"
+            )
+            started = time.perf_counter()
+            seed_events(devices, user, options["events"])
+            self.stdout.write(
+                f"seeded {options['devices']} devices x "
+                f"{options['events']} events in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+            self.run(devices[0], user)
+
+    def run(self, device, user):
+        expected = expected_timeline(device.pk)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            url = f"/api/devices/{device.pk}/timeline/"
+            forward, timings, queries, pages = self.walk(client, url, "next")
+            if forward != expected:
+                raise CommandError("Timeline pages differ from the expected order")
+            self.report("forward", timings, queries)
+
+            # Обратно от последней страницы по previous
+            backward, timings, queries, _ = self.walk(client, pages[-1], "previous")
+            if backward != expected:
+                raise CommandError("Timeline pages differ walking backwards")
+            self.report("backward", timings, queries)
+
+        self.stdout.write(f"{connection.vendor}: {len(expected)} events, ok")
+
+    def walk(self, client, url, link):
+        events, timings, queries, pages = [], [], [], []
+        while url:
+            pages.append(url)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"{url}: {response.status_code}")
+            queries.append(len(captured))
+            page = [(event["kind"], event["id"]) for event in response.data["results"]]
+            events = events + page if link == "next" else page + events
+            url = response.data[link]
+        return events, timings, queries, pages
+
+    def report(self, label, timings, queries):
+        self.stdout.write(
+            f"{label}: {len(timings)} pages, first {timings[0] * 1000:.1f} ms, "
+            f"median {statistics.median(timings) * 1000:.1f} ms, "
+            f"last {timings[-1] * 1000:.1f} ms, queries/page {max(queries)}"
+        )
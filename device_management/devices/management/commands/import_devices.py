@@ -0,0 +1,82 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from devices.imports import IMPORT_READERS, import_devices
+
+
+class Command(BaseCommand):
+    help = (
+        "Import devices from a CSV or XLSX file (same columns as the devices "
+        "export) in chunks, writing rejected rows to an error report"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file to import")
+        parser.add_argument(
+            "--format",
+            choices=sorted(IMPORT_READERS),
+            help="File format (default: taken from the file extension)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and write everything, then roll back",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Rows per chunk (default: DEVICE_IMPORT_CHUNK_SIZE)",
+        )
+        parser.add_argument(
+            "--report",
+            help="Error report path (default: <path>.errors.csv)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format_type = options["format"] or os.path.splitext(path)[1][1:].lower()
+        if format_type not in IMPORT_READERS:
+            raise CommandError(
+                f"Unknown import format: {format_type!r}, use --format "
+                f"({', '.join(sorted(IMPORT_READERS))})"
+            )
+        report_path = options["report"] or f"{path}.errors.csv"
+        started = time.perf_counter()
+
+        def progress(result):
+            self.stdout.write(
+                f"{result.total} rows: {result.imported} accepted, "
+                f"{result.failed} rejected ({time.perf_counter() - started:.1f}s)"
+            )
+
+        try:
+            with open(path, "rb") as fileobj, open(
+                report_path, "w", encoding="utf-8", newline=""
+            ) as report:
+                result = import_devices(
+                    fileobj,
+                    format_type,
+                    report,
+                    dry_run=options["dry_run"],
+                    chunk_size=options["chunk_size"],
+                    progress=progress if options["verbosity"] > 0 else None,
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        summary = (
+            f"{'Dry run: ' if result.dry_run else ''}{result.total} rows, "
+            f"{result.imported} {'valid' if result.dry_run else 'imported'}, "
+            f"{result.failed} rejected in {time.perf_counter() - started:.1f}s"
+        )
+        if result.failed:
+            self.stdout.write(self.style.WARNING(f"{summary}, see {report_path}"))
+        else:
+            os.remove(report_path)
+            if not result.error:
+                self.stdout.write(self.style.SUCCESS(summary))
+        if result.error:
+            # Чанки до ошибки чтения уже записаны (кроме --dry-run)
+            raise CommandError(f"{result.error}. Stopped after {summary}")
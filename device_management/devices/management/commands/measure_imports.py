@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+HEAVY_MODULES = ["openpyxl", "reportlab", "lxml", "orjson"]
+
+# Выполняется в отдельном интерпретаторе, чтобы мерить холодный старт процесса
+PROBE = """
+import resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+import {target}
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(f"RESULT {{elapsed}} {{rss}} {{','.join(loaded)}}")
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold import time and memory of the URLconf (worker boot cost)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            default="device_management.urls",
+            help="Module to import after django.setup()",
+        )
+        parser.add_argument(
+            "--top", type=int, default=15, help="Number of slowest imports to show"
+        )
+
+    def handle(self, *args, **options):
+        code = PROBE.format(target=options["target"], heavy=HEAVY_MODULES)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            self.stdout.write(self.style.ERROR(result.stderr))
+            return
+
+        summary = next(
+            line for line in result.stdout.splitlines() if line.startswith("RESULT")
+        )
+        _, elapsed, rss, loaded = (summary.split(" ") + [""])[:4]
+
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+            imports.append((int(cumulative_us), int(self_us), name.strip()))
+
+        self.stdout.write(f"Target:         {options['target']}")
+        self.stdout.write(f"Boot time:      {float(elapsed) * 1000:.0f} ms")
+        # ru_maxrss в Linux в килобайтах
+        self.stdout.write(f"Peak RSS:       {int(rss) / 1024:.1f} MB")
+        self.stdout.write(f"Modules loaded: {len(imports)}")
+        self.stdout.write(f"Heavy modules:  {loaded or 'none'}")
+
+        self.stdout.write("\nSlowest imports (cumulative):")
+        slowest = sorted(imports, reverse=True)[: options["top"]]
+        for cumulative_us, self_us, name in slowest:
+            self.stdout.write(
+                f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}"
+            )
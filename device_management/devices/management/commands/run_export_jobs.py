@@ -0,0 +1,89 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from devices.exports.delta import prune_deleted_records
+from devices.jobs import claim_next_job, cleanup_export_jobs, run_export_job
+
+# Как часто --loop удаляет задачи старше EXPORT_JOBS_RETENTION_HOURS, секунды
+CLEANUP_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Render pending background export jobs, fail jobs stuck in RUNNING "
+        "for EXPORT_JOBS_STALE_MINUTES and delete finished ones older than "
+        "EXPORT_JOBS_RETENTION_HOURS, prune deletion records older than "
+        "EXPORT_DELTA_RETENTION_DAYS"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--job",
+            type=int,
+            help="Process the export job with this id first, then drain the queue",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new jobs instead of exiting when the queue is empty",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Polling interval in seconds for --loop",
+        )
+
+    def handle(self, *args, **options):
+        # Уборка при каждом запуске, в том числе воркера под одну задачу (--job):
+        # по умолчанию других воркеров нет
+        last_cleanup = None
+        job_id = options["job"]
+        while True:
+            if (
+                last_cleanup is None
+                or time.monotonic() - last_cleanup > CLEANUP_INTERVAL
+            ):
+                self.cleanup()
+                last_cleanup = time.monotonic()
+
+            job = claim_next_job(job_id)
+
+            if job is None:
+                if job_id is not None:
+                    # Задачу уже забрал другой воркер - остаётся очередь
+                    job_id = None
+                    continue
+                if options["loop"]:
+                    time.sleep(options["interval"])
+                    continue
+                break
+
+            self.stdout.write(
+                f"Rendering export job #{job.id} ({job.resource}.{job.export_format})"
+            )
+            job = run_export_job(job)
+
+            if job.status == "COMPLETED":
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Export job #{job.id} completed: {job.file.name}"
+                    )
+                )
+            else:
+                self.stdout.write(
+                    self.style.ERROR(f"Export job #{job.id} failed: {job.error}")
+                )
+
+            # Задачи, для которых spawn_export_worker не запустил процесс
+            # (EXPORT_JOBS_MAX_WORKERS), ждут освободившегося воркера
+            job_id = None
+
+    def cleanup(self):
+        deleted = cleanup_export_jobs()
+        if deleted:
+            self.stdout.write(f"Deleted {deleted} expired export jobs")
+        pruned = prune_deleted_records()
+        if pruned:
+            self.stdout.write(f"Pruned {pruned} expired deletion records")
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0010_return'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('devices', 'Devices'), ('loans', 'Loans'), ('service_orders', 'Service Orders')], max_length=20)),
+                ('export_format', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel'), ('json', 'JSON'), ('ndjson', 'NDJSON')], max_length=10)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('fingerprint', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('file', models.FileField(blank=True, upload_to='exports/%Y/%m/%d/')),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export Job',
+                'verbose_name_plural': 'Export Jobs',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('fingerprint',), name='unique_active_export_job')],
+            },
+        ),
+    ]
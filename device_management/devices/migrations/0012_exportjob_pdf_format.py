@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0011_exportjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='export_format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel'), ('json', 'JSON'), ('ndjson', 'NDJSON'), ('pdf', 'PDF')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0012_exportjob_pdf_format"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="exportjob",
+            name="resource",
+            field=models.CharField(
+                choices=[
+                    ("devices", "Devices"),
+                    ("loans", "Loans"),
+                    ("reservations", "Reservations"),
+                    ("service_orders", "Service Orders"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name="DeletedRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model_label", models.CharField(max_length=100)),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Deleted Record",
+                "verbose_name_plural": "Deleted Records",
+                "ordering": ["-deleted_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["model_label", "deleted_at"],
+                        name="deletedrecord_model_time_idx",
+                    )
+                ],
+            },
+        ),
+    ]
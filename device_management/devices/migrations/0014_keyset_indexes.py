@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:10
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0013_deletedrecord"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="device",
+            index=models.Index(
+                fields=["created_at", "id"], name="device_created_id_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="loan",
+            index=models.Index(fields=["loaned_at", "id"], name="loan_loaned_id_idx"),
+        ),
+    ]
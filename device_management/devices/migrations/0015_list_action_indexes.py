@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:21
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0014_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="device",
+            index=models.Index(
+                condition=models.Q(("status", "AVAILABLE")),
+                fields=["created_at", "id"],
+                name="device_available_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="loan",
+            index=models.Index(
+                condition=models.Q(("status", "ACTIVE")),
+                fields=["loaned_at", "id"],
+                name="loan_active_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="loan",
+            index=models.Index(
+                condition=models.Q(("status", "OVERDUE")),
+                fields=["loaned_at", "id"],
+                name="loan_overdue_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="loan",
+            index=models.Index(
+                fields=["user", "loaned_at", "id"], name="loan_user_loaned_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="reservation",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="reservation_user_created_idx"
+            ),
+        ),
+    ]
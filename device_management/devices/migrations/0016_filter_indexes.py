@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:22
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0015_list_action_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="device",
+            index=models.Index(
+                fields=["status", "created_at", "id"], name="device_status_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="loan",
+            index=models.Index(
+                fields=["status", "due_date", "id"], name="loan_status_due_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="reservation",
+            index=models.Index(
+                fields=["device", "reserved_from", "reserved_until"],
+                name="reservation_device_time_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:27
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Хранимая GeneratedField переписывает всю таблицу под ACCESS EXCLUSIVE:
+    # чтение и запись таблицы стоят, пока вектор считается для каждой строки.
+    # На большой таблице - только в окно обслуживания. GIN-индекс по вектору
+    # строится конкурентно и без этой блокировки в 0022_search_vector_index
+
+    dependencies = [
+        ("devices", "0016_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="device",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "name",
+                        "serial_number",
+                        "inventory_number",
+                        config="simple",
+                        weight="A",
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "notes", config="simple", weight="C"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("simple"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+    ]
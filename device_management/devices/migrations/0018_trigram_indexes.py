@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:35
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0017_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="device",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["serial_number"],
+                name="device_serial_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="device",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["inventory_number"],
+                name="device_inventory_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
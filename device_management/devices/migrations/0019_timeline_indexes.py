@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:59
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0018_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="loan",
+            index=models.Index(
+                fields=["device", "loaned_at", "id"],
+                include=("status", "user"),
+                name="loan_timeline_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="reservation",
+            index=models.Index(
+                fields=["device", "created_at", "id"],
+                include=("status", "user"),
+                name="reservation_timeline_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="return",
+            index=models.Index(
+                fields=["loan", "returned_at", "id"],
+                include=("condition", "inspected_by"),
+                name="return_timeline_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0019_timeline_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("label", models.CharField(max_length=100, unique=True)),
+                ("version", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Data Version",
+                "verbose_name_plural": "Data Versions",
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:19
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0020_dataversion"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="device",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("serial_number"),
+                    name="gin_trgm_ops",
+                ),
+                name="device_serial_upper_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="device",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("inventory_number"),
+                    name="gin_trgm_ops",
+                ),
+                name="device_inventory_upper_idx",
+            ),
+        ),
+    ]
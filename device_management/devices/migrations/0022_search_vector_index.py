@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:02
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0021_search_number_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="device",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="device_search_idx"
+            ),
+        ),
+    ]
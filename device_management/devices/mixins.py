@@ -0,0 +1,119 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def _relation_path(model, attrs):
+    # Самый длинный префикс source, состоящий из FK/OneToOne, и модель в его конце
+    path = []
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not (field.many_to_one or field.one_to_one):
+            break
+        path.append(attr)
+        model = field.related_model
+    return "__".join(path), model
+
+
+def _related_queryset(model, select, prefetch):
+    queryset = model._default_manager.all()
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def collect_relations(serializer, model):
+    """select_related и prefetch_related, нужные полям сериализатора."""
+    select = set()
+    prefetch = []
+    for field in serializer.fields.values():
+        if field.source == "*":
+            continue
+        attrs = field.source_attrs
+
+        if isinstance(field, (ListSerializer, ManyRelatedField)):
+            related_model = model._meta.get_field(attrs[0]).related_model
+            child = getattr(field, "child", None)
+            if isinstance(child, BaseSerializer):
+                child_select, child_prefetch = collect_relations(child, related_model)
+            else:
+                child_select, child_prefetch = set(), []
+            prefetch.append(
+                Prefetch(
+                    attrs[0],
+                    queryset=_related_queryset(
+                        related_model, child_select, child_prefetch
+                    ),
+                )
+            )
+        elif isinstance(field, BaseSerializer):
+            path, related_model = _relation_path(model, attrs)
+            if not path:
+                continue
+            select.add(path)
+            child_select, child_prefetch = collect_relations(field, related_model)
+            select.update(f"{path}__{name}" for name in child_select)
+            prefetch.extend(
+                Prefetch(f"{path}__{item.prefetch_through}", queryset=item.queryset)
+                for item in child_prefetch
+            )
+        elif len(attrs) > 1:
+            path, _ = _relation_path(model, attrs[:-1])
+            if path:
+                select.add(path)
+    return select, prefetch
+
+
+def shape_queryset(queryset, serializer):
+    select, prefetch = collect_relations(serializer, queryset.model)
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class SparseFieldsViewMixin:
+    """
+    Подгоняет select_related/prefetch_related под поля, которые реально
+    останутся в ответе после ?fields=/?omit=/?expand=.
+    """
+
+    sparse_actions = ("list", "retrieve")
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in SAFE_METHODS and self.action in self.sparse_actions:
+            queryset = shape_queryset(queryset, self.get_serializer())
+        return queryset
+
+
+class ListActionMixin:
+    """
+    Списочные action (available, my_loans, ...) отвечают так же, как list:
+    фильтры, поиск, сортировка и пагинация применяются к их выборке.
+    """
+
+    def list_response(self, queryset):
+        queryset = self.filter_queryset(queryset)
+        # ProjectionListSerializer: пагинируется сразу проекция values()
+        project = getattr(self.get_serializer(many=True), "project", None)
+        if project is not None:
+            queryset = project(queryset)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
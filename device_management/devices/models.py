@@ -1,5 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Upper
+
+# Конфигурация полнотекстового поиска: без стемминга, данные смешанные
+# (русский/английский текст, серийные и инвентарные номера)
+SEARCH_CONFIG = "simple"
 
 
 class Category(models.Model):
@@ -100,6 +107,20 @@ class Device(models.Model):
         max_length=20, choices=CONDITION_CHOICES, default="GOOD"
     )
     notes = models.TextField(blank=True, null=True)
+    # Полнотекстовый поиск: колонку пересчитывает сама БД, в том числе
+    # при bulk_create/update
+    search_vector = models.GeneratedField(
+        expression=SearchVector(
+            "name",
+            "serial_number",
+            "inventory_number",
+            weight="A",
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector("notes", weight="C", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -107,6 +128,42 @@ class Device(models.Model):
         verbose_name = "Device"
         verbose_name_plural = "Devices"
         ordering = ["-created_at"]
+        indexes = [
+            # Курсорная пагинация: (-created_at, -id)
+            models.Index(fields=["created_at", "id"], name="device_created_id_idx"),
+            GinIndex(fields=["search_vector"], name="device_search_idx"),
+            # Нечёткий поиск по номерам (by_serial?mode=fuzzy), фильтр %
+            GinIndex(
+                fields=["serial_number"],
+                opclasses=["gin_trgm_ops"],
+                name="device_serial_trgm_idx",
+            ),
+            GinIndex(
+                fields=["inventory_number"],
+                opclasses=["gin_trgm_ops"],
+                name="device_inventory_trgm_idx",
+            ),
+            # Фрагменты номеров в ?search=: icontains - это UPPER(col) LIKE,
+            # индекс по самой колонке для него не подходит
+            GinIndex(
+                OpClass(Upper("serial_number"), name="gin_trgm_ops"),
+                name="device_serial_upper_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("inventory_number"), name="gin_trgm_ops"),
+                name="device_inventory_upper_idx",
+            ),
+            # Фильтр ?status= с сортировкой по умолчанию
+            models.Index(
+                fields=["status", "created_at", "id"], name="device_status_created_idx"
+            ),
+            # Частичный индекс для action available
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(status="AVAILABLE"),
+                name="device_available_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.serial_number})"
@@ -199,6 +256,23 @@ class Reservation(models.Model):
         verbose_name = "Reservation"
         verbose_name_plural = "Reservations"
         ordering = ["-created_at"]
+        indexes = [
+            # Брони устройства по времени: ?device= с ?ordering=reserved_from
+            models.Index(
+                fields=["device", "reserved_from", "reserved_until"],
+                name="reservation_device_time_idx",
+            ),
+            # my_reservations: брони пользователя в порядке -created_at
+            models.Index(
+                fields=["user", "created_at", "id"], name="reservation_user_created_idx"
+            ),
+            # Лента устройства (timeline): покрывающий, без чтения таблицы
+            models.Index(
+                fields=["device", "created_at", "id"],
+                include=["status", "user"],
+                name="reservation_timeline_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.device.name} ({self.status})"
@@ -227,6 +301,34 @@ class Loan(models.Model):
         verbose_name = "Loan"
         verbose_name_plural = "Loans"
         ordering = ["-loaned_at"]
+        indexes = [
+            models.Index(fields=["loaned_at", "id"], name="loan_loaned_id_idx"),
+            # ?status= с сортировкой по сроку возврата (?ordering=due_date)
+            models.Index(
+                fields=["status", "due_date", "id"], name="loan_status_due_idx"
+            ),
+            # Частичные индексы для action active и overdue
+            models.Index(
+                fields=["loaned_at", "id"],
+                condition=models.Q(status="ACTIVE"),
+                name="loan_active_idx",
+            ),
+            models.Index(
+                fields=["loaned_at", "id"],
+                condition=models.Q(status="OVERDUE"),
+                name="loan_overdue_idx",
+            ),
+            # my_loans: выдачи пользователя в порядке -loaned_at
+            models.Index(
+                fields=["user", "loaned_at", "id"], name="loan_user_loaned_idx"
+            ),
+            # Лента устройства (timeline): покрывающий, без чтения таблицы
+            models.Index(
+                fields=["device", "loaned_at", "id"],
+                include=["status", "user"],
+                name="loan_timeline_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.device.name} ({self.status})"
@@ -248,6 +350,114 @@ class Return(models.Model):
         verbose_name = "Return"
         verbose_name_plural = "Returns"
         ordering = ["-returned_at"]
+        indexes = [
+            # Лента устройства (timeline): возвраты по выдачам устройства
+            models.Index(
+                fields=["loan", "returned_at", "id"],
+                include=["condition", "inspected_by"],
+                name="return_timeline_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Return: {self.loan.device.name} by {self.loan.user.username}"
+
+
+class ExportJob(models.Model):
+    RESOURCE_CHOICES = [
+        ("devices", "Devices"),
+        ("loans", "Loans"),
+        ("reservations", "Reservations"),
+        ("service_orders", "Service Orders"),
+    ]
+
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("xlsx", "Excel"),
+        ("json", "JSON"),
+        ("ndjson", "NDJSON"),
+        ("pdf", "PDF"),
+    ]
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("COMPLETED", "Completed"),
+        ("FAILED", "Failed"),
+    ]
+
+    ACTIVE_STATUSES = ["PENDING", "RUNNING"]
+
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    fingerprint = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    progress = models.PositiveSmallIntegerField(default=0)
+    file = models.FileField(upload_to="exports/%Y/%m/%d/", blank=True)
+    error = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="export_jobs"
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+        ordering = ["-created_at"]
+        constraints = [
+            # Одинаковая выгрузка может стоять в очереди только один раз
+            models.UniqueConstraint(
+                fields=["fingerprint"],
+                condition=models.Q(status__in=["PENDING", "RUNNING"]),
+                name="unique_active_export_job",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"Export #{self.id} - {self.resource}.{self.export_format} ({self.status})"
+        )
+
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+
+class DeletedRecord(models.Model):
+    # Журнал удалений для инкрементальных выгрузок (since=...)
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Deleted Record"
+        verbose_name_plural = "Deleted Records"
+        ordering = ["-deleted_at"]
+        indexes = [
+            models.Index(
+                fields=["model_label", "deleted_at"],
+                name="deletedrecord_model_time_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} #{self.object_id}"
+
+
+class DataVersion(models.Model):
+    # Счётчик правок таблицы - версия данных в ключах кэша выгрузок
+    # (devices.exports.cache), общая для всех воркеров
+    label = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Data Version"
+        verbose_name_plural = "Data Versions"
+
+    def __str__(self):
+        return f"{self.label} v{self.version}"
@@ -0,0 +1,401 @@
+import base64
+import binascii
+import hashlib
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.template import loader
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def get_keyset_ordering(queryset):
+    # Порядок берётся из запроса (OrderingFilter) или из Meta.ordering,
+    # в конец всегда добавляется pk, чтобы позиция в выборке была однозначной
+    model = queryset.model
+    ordering = list(queryset.query.order_by or model._meta.ordering)
+    if not ordering:
+        ordering = ["-pk"]
+
+    keys = []
+    for item in ordering:
+        if not isinstance(item, str) or item == "?" or "__" in item:
+            raise ValidationError(
+                {"ordering": "Cursor pagination does not support this ordering"}
+            )
+        name = item.lstrip("-")
+        field = model._meta.pk if name == "pk" else _get_field(model, name)
+        if field.null:
+            raise ValidationError(
+                {"ordering": f"Cursor pagination cannot order by nullable {name}"}
+            )
+        keys.append((item, field))
+        if field.primary_key:
+            break
+    else:
+        descending = ordering[-1].startswith("-")
+        keys.append(("-pk" if descending else "pk", model._meta.pk))
+    return keys
+
+
+def _get_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise ValidationError({"ordering": f"Unknown ordering field {name}"})
+
+
+def invert_ordering(item):
+    return item[1:] if item.startswith("-") else f"-{item}"
+
+
+def keyset_filter(ordering, position):
+    # Строго после позиции: a > va | (a = va & b > vb) | ...
+    # Первое условие дублируется как a >= va, чтобы планировщик взял диапазон по индексу
+    condition = Q()
+    equal = {}
+    for item, value in zip(ordering, position):
+        name = item.lstrip("-")
+        lookup = "lt" if item.startswith("-") else "gt"
+        condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        equal[name] = value
+
+    first = ordering[0]
+    bound = "lte" if first.startswith("-") else "gte"
+    return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & condition
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по ключу сортировки без COUNT(*) и OFFSET."""
+
+    cursor_query_param = "cursor"
+    page_query_param = "page"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+    template = "rest_framework/pagination/previous_and_next.html"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        keys = get_keyset_ordering(queryset)
+        self.ordering = [item for item, _ in keys]
+        self.fields = [field for _, field in keys]
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor["reverse"]
+        ordering = self.ordering
+        if reverse:
+            ordering = [invert_ordering(item) for item in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(keyset_filter(ordering, cursor["position"]))
+
+        # Лишняя строка показывает, есть ли продолжение в эту сторону
+        return self.finish_page(list(queryset[: self.page_size + 1]), cursor)
+
+    def finish_page(self, results, cursor):
+        reverse = cursor is not None and cursor["reverse"]
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        if results:
+            self.first_position = self.get_position(results[0])
+            self.last_position = self.get_position(results[-1])
+        else:
+            self.first_position = self.last_position = (
+                cursor["position"] if cursor else None
+            )
+            self.has_next = self.has_next and reverse
+            self.has_previous = self.has_previous and not reverse
+
+        self.display_page_controls = self.has_next or self.has_previous
+        return results
+
+    def get_position(self, instance):
+        # Строки могут быть словарями из values() (ProjectionListSerializer)
+        if isinstance(instance, dict):
+            return [instance[field.attname] for field in self.fields]
+        return [getattr(instance, field.attname) for field in self.fields]
+
+    def encode_cursor(self, position, reverse):
+        payload = {
+            "o": self.ordering,
+            "p": [_dump_value(value) for value in position],
+            "r": reverse,
+        }
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode("utf8"))
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded.decode())
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            if payload["o"] != self.ordering:
+                raise ValueError("ordering changed")
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, payload["p"], strict=True)
+            ]
+            reverse = bool(payload["r"])
+        except (
+            binascii.Error,
+            DjangoValidationError,
+            KeyError,
+            TypeError,
+            UnicodeError,
+            ValueError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return {"position": position, "reverse": reverse}
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_html_context(self):
+        return {
+            "previous_url": self.get_previous_link(),
+            "next_url": self.get_next_link(),
+        }
+
+    def to_html(self):
+        template = loader.get_template(self.template)
+        return template.render(self.get_html_context())
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация по умолчанию; ?pagination=cursor (или переданный
+    cursor) переключает запрос на KeysetPagination.
+    """
+
+    mode_query_param = "pagination"
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.get_page_size(request)
+            results = self.keyset.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.keyset.display_page_controls
+            return results
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.keyset is not None:
+            return self.keyset.to_html()
+        return super().to_html()
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        # В курсорном режиме count не считается
+        response_schema["required"] = ["results"]
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' for keyset pagination.",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            },
+            {
+                "name": self.keyset_class.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+        ]
+
+
+def get_estimate_threshold():
+    return getattr(settings, "PAGINATION_ESTIMATE_THRESHOLD", 10000)
+
+
+def get_count_cache_timeout():
+    return getattr(settings, "PAGINATION_COUNT_CACHE_TIMEOUT", 30)
+
+
+def estimate_count(queryset):
+    # Оценка планировщика Postgres; на других СУБД оценки нет
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+
+    queryset = queryset.order_by()
+    if not queryset.query.where:
+        # Без фильтров хватает статистики таблицы (обновляется ANALYZE/autovacuum)
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1: таблица ещё ни разу не анализировалась
+        return row[0] if row and row[0] >= 0 else None
+
+    plan = json.loads(queryset.explain(format="json"))
+    # psycopg отдаёт уже разобранный JSON, и Django сериализует его без обёртки-списка
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan["Plan"]["Plan Rows"])
+
+
+def count_cache_key(queryset):
+    # Список колонок (select_related, values()) на COUNT не влияет
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    payload = json.dumps([queryset.db, sql, [str(param) for param in params]])
+    return "pagination-count:" + hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+class EstimatedCountPage(Page):
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    count - точный COUNT(*) для небольших выборок и оценка планировщика
+    для больших (больше PAGINATION_ESTIMATE_THRESHOLD). Результат кэшируется
+    на PAGINATION_COUNT_CACHE_TIMEOUT секунд по SQL запроса.
+    """
+
+    @cached_property
+    def counted(self):
+        key = count_cache_key(self.object_list)
+        counted = cache.get(key)
+        if counted is None:
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= get_estimate_threshold():
+                counted = (estimate, False)
+            else:
+                counted = (self.object_list.count(), True)
+            cache.set(key, counted, get_count_cache_timeout())
+        return counted
+
+    @property
+    def count(self):
+        return self.counted[0]
+
+    @property
+    def count_is_exact(self):
+        return self.counted[1]
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+        # При оценке число страниц приблизительное, поэтому верхнюю границу
+        # не проверяем: пустая страница за концом выборки даст EmptyPage в page()
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        if self.count_is_exact:
+            return super().page(number)
+
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        # Лишняя строка заменяет сравнение с num_pages при определении has_next
+        object_list = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        has_more = len(object_list) > self.per_page
+        return EstimatedCountPage(
+            object_list[: self.per_page], number, self, has_more=has_more
+        )
+
+
+class EstimatedCountPagination(PageOrCursorPagination):
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "count_is_exact": self.page.paginator.count_is_exact,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_exact"] = {
+            "type": "boolean",
+            "example": True,
+        }
+        return response_schema
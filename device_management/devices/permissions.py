@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from users.roles import is_manager
+
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -10,31 +12,14 @@ class IsAdminOrReadOnly(permissions.BasePermission):
 
 class IsManagerOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-
-        if request.user.is_staff:
-            return True
-
-        try:
-            profile = request.user.profile
-            return profile.role and profile.role.name in ["MANAGER", "ADMIN"]
-        except:
-            return False
+        return is_manager(request)
 
 
 class IsOwnerOrManager(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        if request.user.is_staff:
+        if is_manager(request):
             return True
 
-        try:
-            profile = request.user.profile
-            if profile.role and profile.role.name in ["MANAGER", "ADMIN"]:
-                return True
-        except:
-            pass
-
         if hasattr(obj, "user"):
             return obj.user == request.user
 
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+# Заголовки, которые ответ из кэша повторяет за исходным (ConditionalGetMixin)
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+
+def is_cache_enabled():
+    return getattr(settings, "REFERENCE_CACHE_ENABLED", True)
+
+
+def get_cache():
+    return caches[getattr(settings, "REFERENCE_CACHE_ALIAS", "default")]
+
+
+def get_cache_timeout():
+    return getattr(settings, "REFERENCE_CACHE_TIMEOUT", 60)
+
+
+def _key(model, name):
+    return f"reference-cache:{model._meta.label}:{name}"
+
+
+def _increment(key):
+    # incr атомарен и в locmem, и в memcached/redis, но не создаёт ключ
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, None):
+            return 1
+        return cache.incr(key)
+
+
+def get_version(model):
+    cache = get_cache()
+    key = _key(model, "version")
+    version = cache.get(key)
+    if version is None:
+        # Не с 1: если ключ версии вытеснен, новая версия не совпадёт со
+        # старыми и не поднимет их устаревшие записи
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(model):
+    cache = get_cache()
+    key = _key(model, "version")
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def record(model, hit):
+    _increment(_key(model, "hits" if hit else "misses"))
+
+
+def cache_stats(model):
+    cache = get_cache()
+    values = cache.get_many([_key(model, name) for name in ("hits", "misses")])
+    hits = values.get(_key(model, "hits"), 0)
+    misses = values.get(_key(model, "misses"), 0)
+    total = hits + misses
+    return {
+        "version": cache.get(_key(model, "version")),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+def response_key(model, version, request):
+    payload = json.dumps([request.get_full_path(), request.accepted_media_type])
+    digest = hashlib.sha256(payload.encode("utf8")).hexdigest()
+    return _key(model, f"{version}:{digest}")
+
+
+def _plain(value):
+    # ReturnList/ReturnDict держат ссылку на сериализатор и не пиклятся
+    # для memcached/redis
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+class ReferenceCacheMixin:
+    """
+    Кэш ответов list/retrieve небольших справочников. Ключ содержит версию
+    таблицы, которую сигналы post_save/post_delete поднимают после коммита,
+    так что старые записи просто перестают читаться и уходят по таймауту.
+
+    С общим бэкендом (redis, memcached) правка видна всем воркерам сразу;
+    с locmem версия поднимается только в процессе, где прошла правка,
+    остальные отдают прежний ответ не дольше REFERENCE_CACHE_TIMEOUT.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, *args, **kwargs)
+
+    def cached_response(self, handler, *args, **kwargs):
+        if not is_cache_enabled():
+            return handler(self.request, *args, **kwargs)
+
+        model = self.get_queryset().model
+        cache = get_cache()
+        key = response_key(model, get_version(model), self.request)
+        cached = cache.get(key)
+        record(model, hit=cached is not None)
+
+        if cached is None:
+            response = handler(self.request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {
+                    name: response[name] for name in CACHED_HEADERS if name in response
+                }
+                cache.set(key, (_plain(response.data), headers), get_cache_timeout())
+            response["X-Cache"] = "MISS"
+            return response
+
+        # If-None-Match/If-Modified-Since проверяются по сохранённым валидаторам
+        data, headers = cached
+        response = get_conditional_response(
+            self.request,
+            etag=headers.get("ETag"),
+            last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+        )
+        if response is None:
+            response = Response(data)
+        for name, value in headers.items():
+            response[name] = value
+        response["X-Cache"] = "HIT"
+        return response
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(cache_stats(self.get_queryset().model))
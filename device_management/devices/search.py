@@ -0,0 +1,169 @@
+import operator
+import re
+from functools import reduce
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramDistance,
+    TrigramSimilarity,
+)
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q, Value
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import filters
+
+from .models import SEARCH_CONFIG
+
+SEARCH_RANK = "search_rank"
+SEARCH_WORD = re.compile(r"\w+(?:-\w+)*")
+
+FUZZY_LOOKUP_FIELDS = ["serial_number", "inventory_number"]
+FUZZY_LOOKUP_LIMIT = 10
+FUZZY_LOOKUP_MAX_LIMIT = 50
+
+
+def build_search_query(terms):
+    # Все слова обязательны, каждое ищется по префиксу: "SN-12" найдёт SN-1234
+    words = [word for term in terms for word in SEARCH_WORD.findall(term)]
+    if not words:
+        return None
+    raw = " & ".join(f"'{word}':*" for word in words)
+    return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+
+def vector_condition(model, vector_field, query):
+    relation, _, lookup = vector_field.partition(LOOKUP_SEP)
+    if not lookup:
+        return Q(**{vector_field: query})
+    # Вектор связанной модели проверяем подзапросом, чтобы сработал её GIN-индекс
+    related_model = model._meta.get_field(relation).related_model
+    matched = related_model._base_manager.filter(**{lookup: query}).values("pk")
+    return Q(**{f"{relation}__in": matched})
+
+
+def uncovered_search_fields(search_fields, vector_fields):
+    # Поле покрыто вектором, если лежит в той же модели: name - search_vector,
+    # device__name - device__search_vector
+    covered = {field.rpartition(LOOKUP_SEP)[0] for field in vector_fields}
+    return [
+        field
+        for field in search_fields
+        if field.lstrip("^=@$").rpartition(LOOKUP_SEP)[0] not in covered
+    ]
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= на PostgreSQL ищет по tsvector-колонкам из view.search_vector_fields
+    (GIN-индекс) и аннотирует выборку рангом search_rank. Как и в SearchFilter,
+    строка подходит, если каждое слово запроса найдено хотя бы в одном поле:
+    в векторе, в полях search_fields, не покрытых векторами (например,
+    user__username), или подстрокой в серийном и инвентарном номере - их
+    цифровые фрагменты ("00001" из SN-00001) не совпадают с лексемами вектора.
+    На других СУБД работает обычный SearchFilter.
+    """
+
+    def get_search_vector_fields(self, view, queryset):
+        if connections[queryset.db].vendor != "postgresql":
+            return None
+        return getattr(view, "search_vector_fields", None)
+
+    def filter_queryset(self, request, queryset, view):
+        vector_fields = self.get_search_vector_fields(view, queryset)
+        search_terms = self.get_search_terms(request)
+        query = build_search_query(search_terms) if vector_fields else None
+        if query is None:
+            return super().filter_queryset(request, queryset, view)
+
+        search_fields = self.get_search_fields(view, request) or []
+        # Непокрытые поля и номера ищутся подстрокой (для номеров есть
+        # триграммные индексы)
+        substring_fields = uncovered_search_fields(search_fields, vector_fields) + [
+            field
+            for field in search_fields
+            if field.rpartition(LOOKUP_SEP)[2] in FUZZY_LOOKUP_FIELDS
+        ]
+        orm_lookups = [
+            self.construct_search(str(field), queryset)
+            for field in dict.fromkeys(substring_fields)
+        ]
+
+        conditions = []
+        for term in search_terms:
+            term_conditions = [Q(**{lookup: term}) for lookup in orm_lookups]
+            term_query = build_search_query([term])
+            if term_query is not None:
+                term_conditions += [
+                    vector_condition(queryset.model, field, term_query)
+                    for field in vector_fields
+                ]
+            if term_conditions:
+                conditions.append(reduce(operator.or_, term_conditions))
+
+        rank = reduce(
+            operator.add, (SearchRank(F(field), query) for field in vector_fields)
+        )
+        return queryset.filter(reduce(operator.and_, conditions, Q())).annotate(
+            **{SEARCH_RANK: rank}
+        )
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """
+    Без явного ?ordering= результаты полнотекстового поиска идут по рангу,
+    затем в порядке по умолчанию. Курсорная пагинация строится на колонках
+    модели, поэтому для неё ранг в сортировку не добавляется.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        explicit = request.query_params.get(self.ordering_param)
+        if explicit or SEARCH_RANK not in queryset.query.annotations:
+            return ordering
+
+        use_keyset = getattr(getattr(view, "paginator", None), "use_keyset", None)
+        if use_keyset is not None and use_keyset(request):
+            return ordering
+        return [f"-{SEARCH_RANK}", *(ordering or [])]
+
+
+def fuzzy_matches(queryset, value, fields, limit):
+    """
+    Ближайшие по триграммам (pg_trgm) объекты: [(объект, similarity, поле)]
+    по убыванию сходства. По каждому полю кандидаты отбираются GIN-индексом
+    (фильтр % с порогом FUZZY_LOOKUP_THRESHOLD), top-N по <->; части
+    объединяются одним UNION ALL.
+    """
+    model = queryset.model
+    parts = [
+        model._base_manager.filter(**{f"{field}__trigram_similar": value})
+        .annotate(
+            similarity=TrigramSimilarity(field, value), matched_field=Value(field)
+        )
+        .order_by(TrigramDistance(field, value))
+        .values_list("pk", "similarity", "matched_field")[:limit]
+        for field in fields
+    ]
+
+    best = {}
+    with transaction.atomic(using=queryset.db):
+        # Порог оператора % действует только до конца транзакции
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                "SET LOCAL pg_trgm.similarity_threshold = %s",
+                [settings.FUZZY_LOOKUP_THRESHOLD],
+            )
+        rows = list(parts[0].union(*parts[1:], all=True))
+    for pk, similarity, field in rows:
+        if pk not in best or similarity > best[pk][0]:
+            best[pk] = (similarity, field)
+    ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+
+    objects = queryset.in_bulk([pk for pk, _ in ranked])
+    return [
+        (objects[pk], similarity, field)
+        for pk, (similarity, field) in ranked
+        if pk in objects
+    ]
@@ -9,6 +9,11 @@ from .device import (
     DeviceSerializer,
     DeviceListSerializer,
 )
+from .bulk import BulkDeviceSerializer, BulkSpecSerializer
+from .exports import ExportJobSerializer
+from .mixins import SparseFieldsMixin
+from .projection import ProjectionListSerializer
+from .timeline import TimelineEventSerializer
 from .operations import (
     ReservationSerializer,
     LoanSerializer,
@@ -26,4 +31,10 @@ __all__ = [
     "ReservationSerializer",
     "LoanSerializer",
     "ReturnSerializer",
+    "ExportJobSerializer",
+    "SparseFieldsMixin",
+    "ProjectionListSerializer",
+    "BulkDeviceSerializer",
+    "BulkSpecSerializer",
+    "TimelineEventSerializer",
 ]
@@ -0,0 +1,46 @@
+from rest_framework import serializers
+from devices.models import Device, Spec
+
+
+class BulkSpecSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Spec
+        fields = ["spec_type", "value"]
+
+
+class BulkDeviceSerializer(serializers.ModelSerializer):
+    """
+    Строка массовой загрузки. Проверки, требующие БД (уникальность номеров,
+    существование category/brand/location), выполняются для всей пачки
+    разом в devices.bulk, поэтому здесь внешние ключи - просто id.
+    """
+
+    category = serializers.IntegerField(source="category_id")
+    brand = serializers.IntegerField(source="brand_id")
+    location = serializers.IntegerField(
+        source="location_id", required=False, allow_null=True
+    )
+    specifications = BulkSpecSerializer(many=True, required=False)
+
+    class Meta:
+        model = Device
+        fields = [
+            "name",
+            "serial_number",
+            "inventory_number",
+            "category",
+            "brand",
+            "location",
+            "status",
+            "purchase_date",
+            "purchase_price",
+            "warranty_until",
+            "condition",
+            "notes",
+            "specifications",
+        ]
+        # UniqueValidator делал бы по запросу на строку
+        extra_kwargs = {
+            "serial_number": {"validators": []},
+            "inventory_number": {"validators": []},
+        }
@@ -1,9 +1,17 @@
 from rest_framework import serializers
 from devices.models import Device
 from .base import SpecSerializer, DocumentSerializer
+from .mixins import SparseFieldsMixin
+from .projection import ProjectionListSerializer
 
+DEVICE_EXPANDABLE_FIELDS = {
+    "category": "devices.serializers.base.CategorySerializer",
+    "brand": "devices.serializers.base.BrandSerializer",
+    "location": "devices.serializers.base.LocationSerializer",
+}
 
-class DeviceSerializer(serializers.ModelSerializer):
+
+class DeviceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name", read_only=True)
     brand_name = serializers.CharField(source="brand.name", read_only=True)
     location_name = serializers.CharField(source="location.name", read_only=True)
@@ -41,9 +49,10 @@ class DeviceSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["created_at", "updated_at"]
+        expandable_fields = DEVICE_EXPANDABLE_FIELDS
 
 
-class DeviceListSerializer(serializers.ModelSerializer):
+class DeviceListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name", read_only=True)
     brand_name = serializers.CharField(source="brand.name", read_only=True)
     status_display = serializers.CharField(source="get_status_display", read_only=True)
@@ -62,3 +71,6 @@ class DeviceListSerializer(serializers.ModelSerializer):
             "condition",
             "created_at",
         ]
+        expandable_fields = DEVICE_EXPANDABLE_FIELDS
+        # Списки строятся из values() без создания объектов Device
+        list_serializer_class = ProjectionListSerializer
@@ -0,0 +1,41 @@
+from rest_framework import serializers
+from devices.models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source="get_status_display", read_only=True)
+    created_by_username = serializers.CharField(
+        source="created_by.username", read_only=True
+    )
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "resource",
+            "export_format",
+            "params",
+            "status",
+            "status_display",
+            "total_rows",
+            "processed_rows",
+            "progress",
+            "error",
+            "download_url",
+            "created_by",
+            "created_by_username",
+            "started_at",
+            "finished_at",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != "COMPLETED":
+            return None
+        from django.urls import reverse
+
+        url = reverse("exportjob-download", args=[obj.id])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
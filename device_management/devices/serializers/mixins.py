@@ -0,0 +1,39 @@
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_list(query_params, name):
+    values = query_params.get(name, "")
+    return {value.strip() for value in values.split(",") if value.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Управление составом полей в GET-ответах:
+    ?fields=a,b - только перечисленные поля, ?omit=a,b - без перечисленных,
+    ?expand=fk - внешний ключ отдаётся вложенным объектом (Meta.expandable_fields).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        query_params = request.query_params
+        only = parse_field_list(query_params, "fields")
+        omit = parse_field_list(query_params, "omit")
+        expand = parse_field_list(query_params, "expand")
+
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in expand & set(expandable):
+            serializer_class = expandable[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(serializer_class)
+            self.fields[name] = serializer_class(read_only=True)
+
+        if only:
+            for name in set(self.fields) - only - expand:
+                self.fields.pop(name)
+        for name in omit:
+            self.fields.pop(name, None)
@@ -1,8 +1,12 @@
 from rest_framework import serializers
 from devices.models import Reservation, Loan, Return
+from .mixins import SparseFieldsMixin
 
+USER_SERIALIZER = 'users.serializers.UserSerializer'
+DEVICE_SERIALIZER = 'devices.serializers.device.DeviceListSerializer'
 
-class ReservationSerializer(serializers.ModelSerializer):
+
+class ReservationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
     device_name = serializers.CharField(source='device.name', read_only=True)
     device_serial = serializers.CharField(source='device.serial_number', read_only=True)
@@ -16,6 +20,7 @@ class ReservationSerializer(serializers.ModelSerializer):
             'notes', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        expandable_fields = {'user': USER_SERIALIZER, 'device': DEVICE_SERIALIZER}
     
     def validate(self, attrs):
         if attrs.get('reserved_from') and attrs.get('reserved_until'):
@@ -24,7 +29,7 @@ class ReservationSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class LoanSerializer(serializers.ModelSerializer):
+class LoanSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
     manager_username = serializers.CharField(source='manager.username', read_only=True)
     device_name = serializers.CharField(source='device.name', read_only=True)
@@ -39,6 +44,11 @@ class LoanSerializer(serializers.ModelSerializer):
             'status', 'status_display', 'notes', 'created_at', 'updated_at'
         ]
         read_only_fields = ['loaned_at', 'created_at', 'updated_at']
+        expandable_fields = {
+            'user': USER_SERIALIZER,
+            'device': DEVICE_SERIALIZER,
+            'manager': USER_SERIALIZER,
+        }
     
     def validate(self, attrs):
         device = attrs.get('device')
@@ -0,0 +1,145 @@
+import re
+from collections.abc import Mapping
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import OuterRef, QuerySet, Subquery
+from django.db.models.manager import BaseManager
+from django.db.models.query import ModelIterable
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField
+
+DISPLAY_SOURCE = re.compile(r"get_(\w+)_display")
+
+
+def _model_field(model, attrs):
+    for attr in attrs[:-1]:
+        model = model._meta.get_field(attr).related_model
+    return model._meta.get_field(attrs[-1])
+
+
+def _choice_label(model, attrs):
+    labels = dict(_model_field(model, attrs).flatchoices)
+
+    def convert(value):
+        return str(labels.get(value, value))
+
+    return convert
+
+
+def _related_subquery(model, attrs):
+    # Поле связанной модели (category.name) берём коррелированным подзапросом
+    # по первичному ключу, а не JOIN: COUNT(*) пагинатора тогда не тянет
+    # соединения, а неиспользуемые аннотации Django из count() выбрасывает
+    if len(attrs) < 2:
+        return None
+    field = model._meta.get_field(attrs[0])
+    if not (field.many_to_one and field.concrete):
+        return None
+    related = field.related_model._base_manager.filter(
+        pk=OuterRef(field.attname)
+    ).order_by()
+    return Subquery(related.values("__".join(attrs[1:]))[:1])
+
+
+def _identity(value):
+    return value
+
+
+def ordering_columns(queryset):
+    # Поля сортировки и pk нужны курсорной пагинации, даже если их нет в ?fields=
+    opts = queryset.model._meta
+    columns = [opts.pk.attname]
+    for item in queryset.query.order_by or opts.ordering:
+        if not isinstance(item, str):
+            continue
+        name = item.lstrip("-")
+        if name in ("pk", "?") or "__" in name:
+            continue
+        try:
+            columns.append(opts.get_field(name).attname)
+        except FieldDoesNotExist:
+            pass
+    return columns
+
+
+class ProjectionListSerializer(serializers.ListSerializer):
+    """
+    many=True без объектов модели: строки берутся из values() по source
+    полей, а вывод совпадает с обычным сериализатором байт в байт.
+    get_FOO_display заменяется словарём меток, FK - значением *_id,
+    поля связанных моделей - подзапросами.
+    Вложенные сериализаторы (например, ?expand=) не поддерживаются -
+    тогда остаётся обычный путь через объекты.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Переданный QuerySet сразу заменяется проекцией
+        if isinstance(self.instance, QuerySet):
+            self.instance = self.project(self.instance)
+
+    def get_plan(self):
+        if hasattr(self, "_plan"):
+            return self._plan
+
+        model = self.child.Meta.model
+        plan = []
+        annotations = {}
+        for field in self.child._readable_fields:
+            attrs = field.source_attrs
+            if isinstance(field, serializers.BaseSerializer) or field.source == "*":
+                plan = None
+                break
+
+            display = DISPLAY_SOURCE.fullmatch(attrs[-1])
+            if display:
+                attrs = attrs[:-1] + [display.group(1)]
+                convert = _choice_label(model, attrs)
+            elif isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None:
+                convert = _identity
+            elif isinstance(field, RelatedField):
+                plan = None
+                break
+            else:
+                convert = field.to_representation
+
+            key = "__".join(attrs)
+            related = _related_subquery(model, attrs)
+            if related is not None:
+                key = "_projected_" + "_".join(attrs)
+                annotations[key] = related
+            plan.append((field.field_name, key, convert))
+
+        self._plan = plan
+        self._annotations = annotations
+        return plan
+
+    def project(self, queryset):
+        if queryset._iterable_class is not ModelIterable:
+            return queryset
+        plan = self.get_plan()
+        if plan is None:
+            return queryset
+
+        columns = [key for _, key, _ in plan if key not in self._annotations]
+        columns += ordering_columns(queryset)
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(columns), **self._annotations
+        )
+
+    def to_representation(self, data):
+        if isinstance(data, BaseManager):
+            data = data.all()
+        rows = data if isinstance(data, list) else list(data)
+        plan = self.get_plan()
+        if plan is None or not rows or not isinstance(rows[0], Mapping):
+            return super().to_representation(rows)
+
+        results = []
+        for row in rows:
+            item = {}
+            for name, path, convert in plan:
+                value = row[path]
+                item[name] = None if value is None else convert(value)
+            results.append(item)
+        return results
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+
+class TimelineEventSerializer(serializers.Serializer):
+    """
+    Событие ленты устройства (строка UNION ALL из devices.timeline).
+    Имена пользователей передаются в context["usernames"] одной выборкой
+    на страницу.
+    """
+
+    kind = serializers.CharField()
+    id = serializers.IntegerField(source="event_id")
+    occurred_at = serializers.DateTimeField()
+    status = serializers.CharField(source="event_status", allow_null=True)
+    user = serializers.IntegerField(source="actor_id", allow_null=True)
+    username = serializers.SerializerMethodField()
+    detail = serializers.CharField(allow_null=True)
+    amount = serializers.DecimalField(
+        source="event_amount", max_digits=10, decimal_places=2, allow_null=True
+    )
+
+    def get_username(self, obj):
+        return self.context.get("usernames", {}).get(obj["actor_id"])
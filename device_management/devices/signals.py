@@ -1,7 +1,23 @@
-from django.db.models.signals import post_save, pre_save
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Loan, Return, Device
+
+from .models import (
+    Brand,
+    Category,
+    DeletedRecord,
+    Device,
+    Document,
+    Loan,
+    Location,
+    Reservation,
+    Return,
+    Spec,
+)
+from .exports.cache import data_changed
+from .reference_cache import bump_version
 
 
 @receiver(post_save, sender=Loan)
@@ -30,3 +46,63 @@ def check_overdue_loan(sender, instance, **kwargs):
     if instance.pk:
         if instance.status == "ACTIVE" and instance.due_date < timezone.now():
             instance.status = "OVERDUE"
+
+
+@receiver(post_save, sender=Spec)
+@receiver(post_save, sender=Document)
+def touch_device(sender, instance, **kwargs):
+    # Правка характеристики или документа меняет ответ устройства, а его
+    # updated_at - версия для ETag/Last-Modified. Удаления видны по списку id
+    # (ConditionalGetMixin.conditional_children): post_delete отключил бы
+    # быстрое удаление характеристик в bulk_update
+    Device.objects.filter(pk=instance.device_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=Device)
+@receiver(post_delete, sender=Loan)
+@receiver(post_delete, sender=Reservation)
+def record_deletion(sender, instance, **kwargs):
+    # Удаления попадают в инкрементальные выгрузки как отдельные записи;
+    # для справочников время удаления - Last-Modified их списков
+    DeletedRecord.objects.create(model_label=sender._meta.label, object_id=instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Location)
+def bump_reference_cache(sender, **kwargs):
+    # После коммита: иначе параллельный запрос успел бы закэшировать старые
+    # данные уже под новой версией
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=Loan)
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Device)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=Loan)
+@receiver(post_delete, sender=Reservation)
+def bump_export_version(sender, **kwargs):
+    # Версия таблиц в ключах кэша выгрузок (ExportSpec.depends_on)
+    data_changed(sender)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_export_version(sender, update_fields=None, **kwargs):
+    # Вход меняет только last_login, которого в выгрузках нет
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    data_changed(User)
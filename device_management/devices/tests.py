@@ -1,3 +1,1217 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+from rest_framework.test import APIClient
+
+from services.models import Payment, ServiceOrder, ServiceWork
+
+from .exports import cache as export_cache
+from .exports import Column, ExportSpec, Group, get_backend
+from .exports.delta import get_safety_margin, parse_since, prune_deleted_records
+from .exports.json_stream import iter_json_array
+from .exports.pdf import render_pdf, rows_per_page, write_pdf
+from .exports.spec import choice_display, or_empty
+from .jobs import (
+    claim_next_job,
+    cleanup_export_jobs,
+    run_export_job,
+    spawn_export_worker,
+)
+from .management.commands.benchmark_search import search
+from .models import (
+    Brand,
+    Category,
+    DeletedRecord,
+    Device,
+    ExportJob,
+    Loan,
+    Location,
+    Reservation,
+    Return,
+    Spec,
+)
+from .search import FullTextSearchFilter
+from .serializers import DeviceListSerializer
+
+
+class DeviceDataMixin:
+    """Справочники, устройства и пользователи для тестов API."""
+
+    device_count = 3
+
+    def setUp(self):
+        # Счётчики пагинации и справочники кэшируются, а данные у тестов разные
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_superuser("admin", password="admin-pass")
+        self.user = User.objects.create_user("usr-alice", password="alice-pass")
+        self.category = Category.objects.create(name="Laptops")
+        self.brand = Brand.objects.create(name="Lenovo")
+        self.location = Location.objects.create(name="Office", address="Main st. 1")
+        self.devices = [
+            self.create_device(i, name=f"Laptop {i}") for i in range(self.device_count)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def create_device(self, i, **fields):
+        fields = {
+            "name": f"Device {i}",
+            "serial_number": f"SN-{i:05d}",
+            "inventory_number": f"INV-{i:05d}",
+            "category": self.category,
+            "brand": self.brand,
+            "location": self.location,
+            **fields,
+        }
+        return Device.objects.create(**fields)
+
+    def create_loan(self, device, user=None, **fields):
+        return Loan.objects.create(
+            device=device,
+            user=user or self.user,
+            due_date=timezone.now() + timedelta(days=7),
+            **fields,
+        )
+
+    def content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def results(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return data["results"] if isinstance(data, dict) else data
+
+
+class FullTextSearchTests(DeviceDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_device(9, name="Projector")
+        for device in self.devices:
+            self.create_loan(device)
+
+    def test_terms_can_match_different_fields(self):
+        # "usr" - имя пользователя (вне вектора), "laptop" - вектор устройства
+        loans = self.results(self.client.get("/api/loans/?search=usr laptop"))
+        self.assertEqual(len(loans), self.device_count)
+
+    def test_every_term_must_match(self):
+        loans = self.results(self.client.get("/api/loans/?search=usr projector"))
+        self.assertEqual(loans, [])
+
+    def test_serial_number_fragment(self):
+        devices = self.results(self.client.get("/api/devices/?search=00001"))
+        self.assertEqual([device["serial_number"] for device in devices], ["SN-00001"])
+
+        loans = self.results(self.client.get("/api/loans/?search=00001"))
+        self.assertEqual(len(loans), 1)
+
+    def test_inventory_number_fragment(self):
+        devices = self.results(self.client.get("/api/devices/?search=inv-00002"))
+        self.assertEqual(
+            [device["inventory_number"] for device in devices], ["INV-00002"]
+        )
+
+    def test_word_prefix_in_vector(self):
+        devices = self.results(self.client.get("/api/devices/?search=proj"))
+        self.assertEqual([device["name"] for device in devices], ["Projector"])
+
+    def test_search_is_index_backed(self):
+        # На паре строк seq scan дешевле любого индекса, поэтому проверяем,
+        # что индексный план вообще возможен для каждой ветки OR
+        for term in ["latitude", "SN-00012", "00012"]:
+            queryset = search(FullTextSearchFilter, term)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                plan = queryset.explain()
+            self.assertNotIn("Seq Scan on devices_device", plan)
+            for index in [
+                "device_search_idx",
+                "device_serial_upper_idx",
+                "device_inventory_upper_idx",
+            ]:
+                self.assertIn(index, plan)
+
+
+class ExportCacheTests(DeviceDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        settings = override_settings(
+            EXPORT_CACHE_ENABLED=True, EXPORT_CACHE_DIR=self.cache_dir.name
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.create_loan(self.devices[0])
+
+    def export(self, url="/api/loans/export/"):
+        response = self.client.get(url, {"format": "csv"})
+        return response, self.content(response)
+
+    def test_repeated_export_is_served_from_cache(self):
+        first, _ = self.export()
+        second, _ = self.export()
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertEqual(second.__class__.__name__, "FileResponse")
+
+    def test_user_rename_changes_version(self):
+        first, _ = self.export()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = "renamed"
+            self.user.save()
+        second, content = self.export()
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertIn("renamed", content)
+
+    def test_last_login_keeps_version(self):
+        first, _ = self.export()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=["last_login"])
+        second, _ = self.export()
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_bulk_update_changes_version(self):
+        first, _ = self.export("/api/devices/export/")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                "/api/devices/bulk_update/",
+                [{"id": self.devices[0].pk, "name": "Bulk renamed"}],
+                format="json",
+            )
+        self.assertLess(response.status_code, 300, response.content)
+        second, content = self.export("/api/devices/export/")
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertIn("Bulk renamed", content)
+
+    def test_version_is_one_query(self):
+        with self.assertNumQueries(1):
+            export_cache.data_version([Loan, Device, User])
+
+
+class DeltaExportTests(DeviceDataMixin, TestCase):
+    def delta(self, since, url="/api/devices/export/"):
+        response = self.client.get(url, {"format": "json", "since": since})
+        return response, json.loads(self.content(response))
+
+    def test_watermark_keeps_safety_margin(self):
+        started = timezone.now()
+        response, _ = self.delta("2000-01-01T00:00:00Z")
+        watermark = parse_since(response["X-Export-Watermark"])
+        margin = get_safety_margin()
+        self.assertGreaterEqual(watermark, started - margin)
+        self.assertLessEqual(watermark, timezone.now() - margin)
+
+    def test_late_commit_is_picked_up_by_next_delta(self):
+        _, first = self.delta("2000-01-01T00:00:00Z")
+        self.assertEqual(len(first["changed"]), self.device_count)
+
+        # Сохранена до выгрузки, а закоммичена после неё
+        late = self.create_device(7, name="Late")
+        Device.objects.filter(pk=late.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=60)
+        )
+        _, second = self.delta(first["watermark"])
+        self.assertIn(late.pk, [record["id"] for record in second["changed"]])
+
+    def test_deleted_ids(self):
+        _, first = self.delta("2000-01-01T00:00:00Z")
+        deleted = self.devices[0].pk
+        self.devices[0].delete()
+        _, second = self.delta(first["watermark"])
+        self.assertEqual(second["deleted"], [deleted])
+
+    def test_prune_keeps_records_within_retention(self):
+        old, recent = self.devices[0].pk, self.devices[1].pk
+        self.devices[0].delete()
+        self.devices[1].delete()
+        DeletedRecord.objects.filter(object_id=old).update(
+            deleted_at=timezone.now() - timedelta(days=40)
+        )
+
+        self.assertEqual(prune_deleted_records(timedelta(days=30)), 1)
+        self.assertEqual(
+            list(DeletedRecord.objects.values_list("object_id", flat=True)),
+            [recent],
+        )
+
+    def test_invalid_since(self):
+        response = self.client.get(
+            "/api/devices/export/", {"format": "json", "since": "garbage"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_delta_requires_json_format(self):
+        response = self.client.get(
+            "/api/devices/export/", {"format": "csv", "since": "2000-01-01T00:00:00Z"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(EXPORT_JOBS_SPAWN_WORKER=False, EXPORT_CACHE_ENABLED=False)
+class ExportJobTests(DeviceDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def enqueue(self, **params):
+        return self.client.get("/api/devices/export/", {"async": "1", **params})
+
+    def test_enqueue_and_run(self):
+        response = self.enqueue(format="csv")
+        self.assertEqual(response.status_code, 202)
+        job = run_export_job(claim_next_job(response.data["id"]))
+        self.assertEqual(job.status, "COMPLETED", job.error)
+        self.assertEqual(job.total_rows, self.device_count)
+        with job.file.open("rb") as output:
+            self.assertIn(b"SN-00001", output.read())
+
+    def test_invalid_parameters_rejected_on_enqueue(self):
+        self.assertEqual(self.enqueue(format="docx").status_code, 400)
+        self.assertEqual(
+            self.enqueue(format="csv", since="2020-01-01").status_code, 400
+        )
+        self.assertEqual(self.enqueue(format="json", since="garbage").status_code, 400)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_error_response_fails_job_readably(self):
+        job = ExportJob.objects.create(
+            resource="devices",
+            export_format="json",
+            params={"since": ["garbage"]},
+            fingerprint="invalid",
+            created_by=self.admin,
+        )
+        job = run_export_job(claim_next_job(job.pk))
+        self.assertEqual(job.status, "FAILED")
+        self.assertIn("Invalid since value", job.error)
+
+    def test_cleanup_deletes_expired_jobs_and_files(self):
+        response = self.enqueue(format="csv")
+        job = run_export_job(claim_next_job(response.data["id"]))
+        path = job.file.path
+        recent = ExportJob.objects.create(
+            resource="devices",
+            export_format="csv",
+            fingerprint="recent",
+            status="COMPLETED",
+            finished_at=timezone.now(),
+        )
+        ExportJob.objects.filter(pk=job.pk).update(
+            finished_at=timezone.now() - timedelta(days=2)
+        )
+
+        self.assertEqual(cleanup_export_jobs(timedelta(days=1)), 1)
+        self.assertFalse(ExportJob.objects.filter(pk=job.pk).exists())
+        self.assertTrue(ExportJob.objects.filter(pk=recent.pk).exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_stale_running_job_is_reclaimed_before_dedupe(self):
+        response = self.enqueue(format="csv")
+        job = claim_next_job(response.data["id"])
+        # Воркер умер: статус так и остался RUNNING
+        ExportJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        response = self.enqueue(format="csv")
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.data["id"], job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "FAILED")
+        self.assertIsNotNone(job.finished_at)
+
+    def test_cleanup_reclaims_only_stale_jobs(self):
+        stale = claim_next_job(self.enqueue(format="csv").data["id"])
+        alive = claim_next_job(self.enqueue(format="json").data["id"])
+        ExportJob.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        cleanup_export_jobs()
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(stale.status, "FAILED")
+        self.assertEqual(alive.status, "RUNNING")
+
+    @override_settings(EXPORT_JOBS_MAX_WORKERS=1)
+    def test_spawn_skipped_at_worker_limit(self):
+        first = self.enqueue(format="csv").data["id"]
+        second = self.enqueue(format="json").data["id"]
+        with mock.patch("devices.jobs.subprocess.Popen") as popen:
+            self.assertTrue(spawn_export_worker(first))
+            claim_next_job(first)
+            self.assertFalse(spawn_export_worker(second))
+        self.assertEqual(popen.call_count, 1)
+
+    def test_worker_drains_queue_after_its_job(self):
+        first = self.enqueue(format="csv").data["id"]
+        second = self.enqueue(format="json").data["id"]
+        call_command("run_export_jobs", job=first, stdout=io.StringIO())
+        self.assertEqual(
+            set(
+                ExportJob.objects.filter(pk__in=[first, second]).values_list(
+                    "status", flat=True
+                )
+            ),
+            {"COMPLETED"},
+        )
+
+
+class DeviceImportTests(DeviceDataMixin, TestCase):
+    header = "Name,Serial Number,Inventory Number,Category,Brand,Location\n"
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name, DEVICE_IMPORT_CHUNK_SIZE=2)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def row(self, i, category="Laptops"):
+        return f"Imported {i},IMP-{i},IMP-INV-{i},{category},Lenovo,Office\n"
+
+    def upload(self, body, name="devices.csv", **data):
+        upload = SimpleUploadedFile(name, body)
+        return self.client.post(
+            "/api/devices/import/", {"file": upload, **data}, format="multipart"
+        )
+
+    def test_import_with_rejected_rows(self):
+        body = self.header + self.row(1) + self.row(2, category="Unknown") + self.row(3)
+        response = self.upload(body.encode())
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual(response.data["failed"], 1)
+        self.assertIsNotNone(response.data["error_report"])
+        self.assertTrue(Device.objects.filter(serial_number="IMP-3").exists())
+
+    def test_xlsx_with_status_labels(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(
+            ["Name", "Serial Number", "Inventory Number", "Category", "Brand", "Status"]
+        )
+        sheet.append(
+            ["Imported 1", "IMP-1", "IMP-INV-1", "Laptops", "Lenovo", "In Service"]
+        )
+        body = io.BytesIO()
+        workbook.save(body)
+
+        response = self.upload(body.getvalue(), name="devices.xlsx")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(Device.objects.get(serial_number="IMP-1").status, "IN_SERVICE")
+
+    def test_duplicate_in_later_chunk(self):
+        # Первый чанк уже записан: повтор во втором ловит проверка по БД
+        body = self.header + self.row(1) + self.row(2) + self.row(1)
+        response = self.upload(body.encode())
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual(response.data["failed"], 1)
+
+    def test_management_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "devices.csv")
+            with open(path, "w", encoding="utf-8") as fileobj:
+                fileobj.write(self.header + self.row(1) + self.row(2, category="?"))
+            out = io.StringIO()
+            call_command("import_devices", path, stdout=out)
+            self.assertIn("1 imported, 1 rejected", out.getvalue())
+            self.assertTrue(os.path.exists(f"{path}.errors.csv"))
+        self.assertTrue(Device.objects.filter(serial_number="IMP-1").exists())
+
+    def test_dry_run_rolls_back(self):
+        response = self.upload((self.header + self.row(1)).encode(), dry_run="true")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertFalse(Device.objects.filter(serial_number="IMP-1").exists())
+
+    def test_bad_encoding_mid_file_reports_committed_chunks(self):
+        # TextIOWrapper декодирует блоками по 8 КБ: битый байт должен быть
+        # дальше первого блока, чтобы до него успели записаться чанки
+        body = (self.header + "".join(self.row(i) for i in range(1, 201))).encode()
+        body += b"\xff\xfe,x\n"
+        response = self.upload(body)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Not a UTF-8 CSV file", response.data["error"])
+        self.assertGreater(response.data["imported"], 0)
+        self.assertEqual(
+            Device.objects.filter(serial_number__startswith="IMP-").count(),
+            response.data["imported"],
+        )
+
+    def test_unreadable_file(self):
+        response = self.upload(b"\xff\xfe\x00garbage")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["imported"], 0)
+
+
+class KeysetPaginationTests(DeviceDataMixin, TestCase):
+    device_count = 25
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_walks_forward_and_back(self):
+        first = self.page("/api/devices/?pagination=cursor&ordering=name")
+        self.assertNotIn("count", first)
+        self.assertIsNone(first["previous"])
+        second = self.page(first["next"])
+        self.assertIsNone(second["next"])
+
+        names = [device["name"] for device in first["results"] + second["results"]]
+        self.assertEqual(names, sorted(device.name for device in self.devices))
+
+        back = self.page(second["previous"])
+        self.assertEqual(back["results"], first["results"])
+
+    def test_row_inserted_behind_cursor_is_not_repeated(self):
+        first = self.page("/api/devices/?pagination=cursor")
+        self.create_device(99, name="Newest")
+        second = self.page(first["next"])
+        seen = [device["id"] for device in first["results"] + second["results"]]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), self.device_count)
+
+    def test_cursor_with_other_ordering_is_rejected(self):
+        first = self.page("/api/devices/?pagination=cursor&ordering=name")
+        cursor = first["next"].split("cursor=")[1]
+        response = self.client.get(
+            "/api/devices/", {"cursor": cursor, "ordering": "-created_at"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_garbage_cursor(self):
+        response = self.client.get("/api/devices/", {"cursor": "not-base64!"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_nullable_ordering_is_rejected(self):
+        response = self.client.get(
+            "/api/devices/", {"pagination": "cursor", "ordering": "purchase_date"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(EXPORT_CACHE_ENABLED=False)
+class CsvExportTests(DeviceDataMixin, TestCase):
+    def test_devices_csv_is_streamed(self):
+        response = self.client.get("/api/devices/export/", {"format": "csv"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = self.content(response).splitlines()
+        # BOM для Excel и по строке на устройство
+        self.assertTrue(lines[0].startswith("\ufeffID,Name,Serial Number"))
+        self.assertEqual(len(lines), self.device_count + 1)
+
+    def test_rows_follow_filters_and_choice_labels(self):
+        device = self.devices[1]
+        response = self.client.get(
+            "/api/devices/export/", {"format": "csv", "search": "SN-00001"}
+        )
+        rows = list(csv.reader(io.StringIO(self.content(response).lstrip("\ufeff"))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], device.serial_number)
+        self.assertEqual(rows[1][6], device.get_status_display())
+
+    def test_nullable_reference_is_empty(self):
+        self.create_loan(self.devices[0])
+        response = self.client.get("/api/loans/export/", {"format": "csv"})
+        rows = list(csv.reader(io.StringIO(self.content(response))))
+        # Manager не задан - пустая ячейка, а не "None"
+        self.assertEqual(rows[1][4], "")
+
+    def test_unknown_format(self):
+        response = self.client.get("/api/devices/export/", {"format": "docx"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(EXPORT_CACHE_ENABLED=False)
+class XlsxExportTests(DeviceDataMixin, TestCase):
+    def workbook(self, response):
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content)
+        return load_workbook(io.BytesIO(content), read_only=False)
+
+    def test_devices_sheet(self):
+        response = self.client.get("/api/devices/export/", {"format": "xlsx"})
+        sheet = self.workbook(response)["Devices"]
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:3], ("ID", "Name", "Serial Number"))
+        self.assertEqual(len(rows), self.device_count + 1)
+        self.assertTrue(sheet["A1"].font.bold)
+
+    def test_column_width_fits_longest_value(self):
+        self.create_device(7, name="A very long device name for the width check")
+        response = self.client.get("/api/devices/export/", {"format": "xlsx"})
+        sheet = self.workbook(response)["Devices"]
+        self.assertGreaterEqual(sheet.column_dimensions["B"].width, 44)
+
+    def test_rows_spooled_to_disk(self):
+        # Маленький порог: строки и книга уходят из памяти во временный файл
+        with override_settings(EXPORT_SPOOL_MAX_SIZE=16):
+            response = self.client.get("/api/devices/export/", {"format": "xlsx"})
+            sheet = self.workbook(response)["Devices"]
+        self.assertEqual(sheet.max_row, self.device_count + 1)
+
+
+@override_settings(EXPORT_CACHE_ENABLED=False)
+class JsonExportTests(DeviceDataMixin, TestCase):
+    def test_json_array(self):
+        response = self.client.get("/api/devices/export/", {"format": "json"})
+        self.assertEqual(response["Content-Type"], "application/json")
+        records = json.loads(self.content(response))
+        self.assertEqual(len(records), self.device_count)
+        record = next(r for r in records if r["id"] == self.devices[0].pk)
+        self.assertEqual(
+            record["category"], {"id": self.category.pk, "name": "Laptops"}
+        )
+        self.assertEqual(record["status_display"], self.devices[0].get_status_display())
+
+    def test_ndjson_record_per_line(self):
+        self.create_loan(self.devices[0])
+        response = self.client.get("/api/loans/export/", {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = self.content(response).splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record["user"]["username"], "usr-alice")
+        # Пустой nullable FK - null, а не объект из null-полей
+        self.assertIsNone(record["manager"])
+
+    def test_empty_array(self):
+        response = self.client.get("/api/loans/export/", {"format": "json"})
+        self.assertEqual(json.loads(self.content(response)), [])
+
+    def test_encoders_produce_same_records(self):
+        records = [
+            {"name": "Ноутбук", "price": Decimal("10.50"), "at": date(2024, 1, 2)},
+            {"name": None},
+        ]
+        outputs = []
+        for encoder in ("json", "orjson"):
+            with override_settings(EXPORT_JSON_ENCODER=encoder):
+                outputs.append(b"".join(iter_json_array(records, batch_size=1)))
+        self.assertEqual(json.loads(outputs[0]), json.loads(outputs[1]))
+        self.assertEqual(json.loads(outputs[0])[0]["price"], "10.50")
+
+
+@override_settings(EXPORT_CACHE_ENABLED=False)
+class PdfExportTests(DeviceDataMixin, TestCase):
+    def page_count(self, content):
+        return int(re.search(rb"/Count (\d+)", content).group(1))
+
+    def render(self, row_count):
+        output = io.BytesIO()
+        rows = [[str(i), f"Device {i}"] for i in range(row_count)]
+        write_pdf(output, "Devices", ["ID", "Name"], rows)
+        return output.getvalue()
+
+    def test_rows_split_into_pages(self):
+        per_page = rows_per_page()
+        self.assertEqual(self.page_count(self.render(per_page)), 1)
+        self.assertEqual(self.page_count(self.render(per_page + 1)), 2)
+        self.assertEqual(self.page_count(self.render(per_page * 3)), 3)
+
+    def test_empty_report_has_one_page(self):
+        self.assertEqual(self.page_count(self.render(0)), 1)
+
+    def test_devices_pdf(self):
+        for url, params in [
+            ("/api/devices/export/", {"format": "pdf"}),
+            ("/api/devices/export_pdf/", {}),
+        ]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/pdf")
+            self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+
+class LazyRendererTests(TestCase):
+    def test_urlconf_does_not_load_renderers(self):
+        # Холодный старт в отдельном интерпретаторе: в этом процессе
+        # openpyxl и reportlab уже загружены другими тестами
+        out = io.StringIO()
+        call_command("measure_imports", "--top", "0", stdout=out)
+        heavy = out.getvalue().split("Heavy modules:")[1].splitlines()[0]
+        self.assertNotIn("openpyxl", heavy)
+        self.assertNotIn("reportlab", heavy)
+
+    def test_backend_loaded_on_first_use(self):
+        self.assertIs(get_backend("pdf"), render_pdf)
+        with self.assertRaises(ValueError):
+            get_backend("docx")
+
+
+class ExportSpecTests(DeviceDataMixin, TestCase):
+    spec = ExportSpec(
+        filename="test",
+        columns=[
+            Column("Serial", "serial_number"),
+            Column("Status", "status", choice_display(Device, "status")),
+            Column("Location", "location__name", or_empty),
+            Column("Serial again", "serial_number", str.lower),
+        ],
+        json_fields=[
+            ("serial_number", "serial_number"),
+            (
+                "location",
+                Group(
+                    "location_id", [("id", "location_id"), ("name", "location__name")]
+                ),
+            ),
+        ],
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.create_device(7, location=None)
+
+    def queryset(self):
+        return Device.objects.order_by("serial_number")
+
+    def test_rows_from_single_projection(self):
+        with self.assertNumQueries(1):
+            rows = list(self.spec.iter_rows(self.queryset(), self.spec.columns))
+        self.assertEqual(
+            rows[0],
+            ["SN-00000", self.devices[0].get_status_display(), "Office", "sn-00000"],
+        )
+        self.assertEqual(rows[-1][2], "")
+
+    def test_records_group_nullable_references(self):
+        records = list(self.spec.iter_records(self.queryset()))
+        self.assertEqual(
+            records[0]["location"], {"id": self.location.pk, "name": "Office"}
+        )
+        self.assertIsNone(records[-1]["location"])
+
+    def test_headers(self):
+        self.assertEqual(
+            self.spec.headers(self.spec.columns),
+            ["Serial", "Status", "Location", "Serial again"],
+        )
+
+
+class EstimatedCountTests(DeviceDataMixin, TestCase):
+    device_count = 25
+
+    def page(self, params):
+        response = self.client.get("/api/devices/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_small_result_counted_exactly(self):
+        data = self.page({"status": "AVAILABLE"})
+        self.assertEqual(data["count"], self.device_count)
+        self.assertTrue(data["count_is_exact"])
+
+    @override_settings(PAGINATION_ESTIMATE_THRESHOLD=0)
+    def test_large_result_uses_planner_estimate(self):
+        with CaptureQueriesContext(connection) as captured:
+            data = self.page({"status": "AVAILABLE"})
+        self.assertFalse(data["count_is_exact"])
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in captured.captured_queries)
+        )
+        # Продолжение определяется лишней строкой, а не оценкой
+        self.assertIsNotNone(data["next"])
+        last = self.page({"status": "AVAILABLE", "page": 2})
+        self.assertIsNone(last["next"])
+        self.assertEqual(len(last["results"]), self.device_count - 20)
+
+        response = self.client.get("/api/devices/", {"status": "AVAILABLE", "page": 3})
+        self.assertEqual(response.status_code, 404)
+
+    def test_count_is_cached(self):
+        self.page({"status": "AVAILABLE"})
+        with CaptureQueriesContext(connection) as captured:
+            self.page({"status": "AVAILABLE", "page": 2})
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in captured.captured_queries)
+        )
+
+
+class SparseFieldsTests(DeviceDataMixin, TestCase):
+    def retrieve(self, **params):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(f"/api/devices/{self.devices[0].pk}/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        # Первый запрос - валидаторы условного GET, объект читает get() (LIMIT 21)
+        queries = [query["sql"] for query in captured.captured_queries]
+        fetch = next(sql for sql in queries if sql.endswith("LIMIT 21"))
+        prefetched = [sql for sql in queries if '"device_id" IN (' in sql]
+        return response.json(), fetch, prefetched
+
+    def test_fields_limit_response_and_joins(self):
+        data, fetch, prefetched = self.retrieve(fields="id,name")
+        self.assertEqual(set(data), {"id", "name"})
+        self.assertNotIn("devices_category", fetch)
+        self.assertEqual(prefetched, [])
+
+    def test_omit_drops_prefetch(self):
+        data, fetch, prefetched = self.retrieve(omit="specifications,documents")
+        self.assertNotIn("specifications", data)
+        self.assertIn("category_name", data)
+        self.assertIn("devices_category", fetch)
+        self.assertEqual(prefetched, [])
+
+    def test_full_response_prefetches_children(self):
+        data, _, prefetched = self.retrieve()
+        self.assertEqual(data["specifications"], [])
+        self.assertEqual(len(prefetched), 2)
+
+    def test_expand_nests_reference(self):
+        data, _, _ = self.retrieve(fields="id", expand="category")
+        self.assertEqual(set(data), {"id", "category"})
+        self.assertEqual(data["category"]["name"], "Laptops")
+
+    def test_list_queries_do_not_grow_with_expand(self):
+        self.client.get("/api/devices/", {"expand": "brand"})
+        with CaptureQueriesContext(connection) as few:
+            self.client.get("/api/devices/", {"expand": "brand"})
+        for i in range(5, 10):
+            self.create_device(i)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get("/api/devices/", {"expand": "brand"})
+        self.assertEqual(response.json()["results"][0]["brand"]["name"], "Lenovo")
+        self.assertEqual(len(few), len(many))
+
+
+class ProjectionSerializerTests(DeviceDataMixin, TestCase):
+    def test_matches_model_serializer(self):
+        self.devices[1].status = "IN_SERVICE"
+        self.devices[1].save()
+        results = self.results(self.client.get("/api/devices/", {"ordering": "name"}))
+        expected = [
+            DeviceListSerializer(device).data
+            for device in Device.objects.order_by("name")
+        ]
+        self.assertEqual(json.dumps(results), json.dumps(expected))
+
+    def test_rows_come_from_values(self):
+        serializer = DeviceListSerializer(Device.objects.order_by("pk"), many=True)
+        self.assertIsInstance(serializer.instance[0], dict)
+        self.assertEqual(serializer.data[0]["category_name"], "Laptops")
+
+    def test_expand_falls_back_to_objects(self):
+        results = self.results(self.client.get("/api/devices/", {"expand": "brand"}))
+        self.assertEqual(results[0]["brand"]["name"], "Lenovo")
+
+    def test_count_does_not_join_references(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.results(self.client.get("/api/devices/"))
+        counts = [q["sql"] for q in captured.captured_queries if "COUNT(" in q["sql"]]
+        self.assertEqual(len(counts), 1)
+        self.assertNotIn("devices_category", counts[0])
+
+
+class ListActionTests(DeviceDataMixin, TestCase):
+    device_count = 25
+
+    def test_available_is_paginated_and_filtered(self):
+        self.devices[0].status = "IN_SERVICE"
+        self.devices[0].save()
+        response = self.client.get("/api/devices/available/")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["count"], self.device_count - 1)
+        self.assertEqual(len(data["results"]), 20)
+
+        devices = self.results(
+            self.client.get("/api/devices/available/", {"search": "SN-00003"})
+        )
+        self.assertEqual([device["serial_number"] for device in devices], ["SN-00003"])
+
+    def test_available_cursor_mode(self):
+        response = self.client.get("/api/devices/available/", {"pagination": "cursor"})
+        data = response.json()
+        self.assertNotIn("count", data)
+        self.assertEqual(len(data["results"]), 20)
+        self.assertEqual(len(self.results(self.client.get(data["next"]))), 5)
+
+    def test_my_loans_scoped_and_paginated(self):
+        other = User.objects.create_user("usr-bob", password="bob-pass")
+        for device in self.devices[:3]:
+            self.create_loan(device)
+        self.create_loan(self.devices[3], user=other)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/loans/my_loans/", {"ordering": "due_date"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual({loan["user"] for loan in data["results"]}, {self.user.pk})
+
+    def test_active_loans_respect_filters(self):
+        loan = self.create_loan(self.devices[0])
+        self.create_loan(self.devices[1])
+        loans = self.results(
+            self.client.get("/api/loans/active/", {"device": self.devices[0].pk})
+        )
+        self.assertEqual([item["id"] for item in loans], [loan.pk])
+
+
+class QueryPlanTests(TestCase):
+    def test_page_queries_use_indexes(self):
+        # На меньшей выборке планировщику дешевле читать таблицу целиком
+        out = io.StringIO()
+        call_command(
+            "benchmark_query_plans", devices=10000, users=50, verbosity=0, stdout=out
+        )
+        self.assertIn("No sequential scans", out.getvalue())
+
+
+class FuzzyLookupTests(DeviceDataMixin, TestCase):
+    def lookup(self, serial, **params):
+        return self.client.get(
+            "/api/devices/by_serial/", {"serial": serial, "mode": "fuzzy", **params}
+        )
+
+    def test_typo_in_serial_number(self):
+        self.create_device(7, serial_number="ABC-778899")
+        response = self.lookup("ABC-778890")
+        self.assertEqual(response.status_code, 200)
+        best = response.data[0]
+        self.assertEqual(best["serial_number"], "ABC-778899")
+        self.assertEqual(best["matched_field"], "serial_number")
+        self.assertLess(best["similarity"], 1)
+
+    def test_inventory_number_match(self):
+        self.create_device(7, inventory_number="ZXY-123456")
+        response = self.lookup("ZXY-12345")
+        self.assertEqual(response.data[0]["inventory_number"], "ZXY-123456")
+        self.assertEqual(response.data[0]["matched_field"], "inventory_number")
+
+    def test_results_ranked_and_limited(self):
+        response = self.lookup("SN-00001", limit=2)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]["serial_number"], "SN-00001")
+        self.assertEqual(response.data[0]["similarity"], 1)
+        self.assertGreaterEqual(
+            response.data[0]["similarity"], response.data[1]["similarity"]
+        )
+
+    def test_nothing_similar(self):
+        self.assertEqual(self.lookup("QQQQQQQQ").data, [])
+
+    def test_invalid_limit(self):
+        self.assertEqual(self.lookup("SN-00001", limit=0).status_code, 400)
+        self.assertEqual(self.lookup("SN-00001", limit="x").status_code, 400)
+
+    def test_exact_mode_unchanged(self):
+        response = self.client.get("/api/devices/by_serial/", {"serial": "SN-0000"})
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchLookupTests(DeviceDataMixin, TestCase):
+    def lookup(self, codes):
+        return self.client.post(
+            "/api/devices/batch_lookup/", {"codes": codes}, format="json"
+        )
+
+    def test_scan_order_and_not_found(self):
+        codes = ["INV-00002", "missing", "SN-00000", " SN-00000 "]
+        with self.assertNumQueries(1):
+            response = self.lookup(codes)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [device["serial_number"] for device in response.data["found"]],
+            ["SN-00002", "SN-00000"],
+        )
+        self.assertEqual(response.data["not_found"], ["missing"])
+
+    def test_both_numbers_of_one_device(self):
+        response = self.lookup(["SN-00001", "INV-00001"])
+        self.assertEqual(len(response.data["found"]), 1)
+        self.assertEqual(response.data["not_found"], [])
+
+    def test_invalid_payload(self):
+        self.assertEqual(self.lookup("SN-00001").status_code, 400)
+        self.assertEqual(self.lookup([" "]).status_code, 400)
+        with override_settings(BATCH_LOOKUP_MAX_CODES=1):
+            self.assertEqual(self.lookup(["a", "b"]).status_code, 400)
+
+
+class BulkDeviceTests(DeviceDataMixin, TestCase):
+    def row(self, i, **fields):
+        return {
+            "name": f"Bulk {i}",
+            "serial_number": f"BULK-{i}",
+            "inventory_number": f"BULK-INV-{i}",
+            "category": self.category.pk,
+            "brand": self.brand.pk,
+            **fields,
+        }
+
+    def test_create_with_specifications(self):
+        rows = [
+            self.row(1, specifications=[{"spec_type": "RAM", "value": "16 GB"}]),
+            self.row(2),
+        ]
+        response = self.client.post("/api/devices/bulk_create/", rows, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data["saved"], 2)
+        device = Device.objects.get(pk=response.data["results"][0]["id"])
+        self.assertEqual(
+            list(device.specifications.values_list("value", flat=True)), ["16 GB"]
+        )
+
+    def test_create_reports_rows_with_errors(self):
+        rows = [
+            self.row(1),
+            self.row(2, serial_number="SN-00000"),
+            self.row(3, serial_number="DUP"),
+            self.row(4, serial_number="DUP"),
+            self.row(5, category=999999),
+        ]
+        response = self.client.post("/api/devices/bulk_create/", rows, format="json")
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data["saved"], 1)
+        results = response.data["results"]
+        self.assertIn("id", results[0])
+        self.assertIn("serial_number", results[1]["errors"])
+        # Дубликат внутри пачки помечается в обеих строках
+        self.assertIn("serial_number", results[2]["errors"])
+        self.assertIn("serial_number", results[3]["errors"])
+        self.assertIn("category", results[4]["errors"])
+        self.assertFalse(Device.objects.filter(serial_number="DUP").exists())
+
+    @mock.patch("devices.bulk.BULK_UPDATE_GROUP_MIN_SIZE", 2)
+    def test_update_groups_and_replaces_specifications(self):
+        # Первые две строки с одинаковыми изменениями - общий UPDATE
+        first, second, third = self.devices
+        Spec.objects.create(device=first, spec_type="CPU", value="Old")
+        rows = [
+            {"id": first.pk, "status": "IN_SERVICE", "specifications": []},
+            {"id": second.pk, "status": "IN_SERVICE"},
+            {"id": third.pk, "name": "Renamed"},
+            {"id": 999999, "name": "Missing"},
+        ]
+        response = self.client.patch("/api/devices/bulk_update/", rows, format="json")
+        self.assertEqual(response.status_code, 207, response.content)
+        self.assertEqual(response.data["saved"], 3)
+        self.assertIn("id", response.data["results"][3]["errors"])
+
+        first.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual(first.status, "IN_SERVICE")
+        self.assertFalse(first.specifications.exists())
+        self.assertEqual(third.name, "Renamed")
+        self.assertEqual(third.status, self.devices[2].status)
+
+    def test_update_keeps_own_numbers(self):
+        device = self.devices[0]
+        rows = [{"id": device.pk, "serial_number": device.serial_number}]
+        response = self.client.patch("/api/devices/bulk_update/", rows, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_invalid_payload(self):
+        response = self.client.post("/api/devices/bulk_create/", {}, format="json")
+        self.assertEqual(response.status_code, 400)
+        with override_settings(BULK_DEVICES_MAX_ROWS=1):
+            response = self.client.post(
+                "/api/devices/bulk_create/", [self.row(1), self.row(2)], format="json"
+            )
+        self.assertEqual(response.status_code, 400)
+
+
+class TimelineTests(DeviceDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.device = self.devices[0]
+        loan = self.create_loan(self.device)
+        Return.objects.create(loan=loan, condition="GOOD", inspected_by=self.admin)
+        order = ServiceOrder.objects.create(
+            device=self.device, issue_description="Broken", created_by=self.admin
+        )
+        ServiceWork.objects.create(
+            service_order=order, work_description="Fixed", cost=Decimal("25.00")
+        )
+        # Платёж и по выдаче, и по заявке - одно событие
+        Payment.objects.create(
+            amount=Decimal("10.00"),
+            payment_type="FINE",
+            paid_by=self.user,
+            related_loan=loan,
+            related_service_order=order,
+        )
+        # События другого устройства в ленту не попадают
+        self.create_loan(self.devices[1])
+
+    def timeline(self, url=None, **params):
+        response = self.client.get(
+            url or f"/api/devices/{self.device.pk}/timeline/", params
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_events_of_all_kinds(self):
+        with self.assertNumQueries(3):
+            data = self.timeline()
+        kinds = sorted(event["kind"] for event in data["results"])
+        self.assertEqual(
+            kinds, ["loan", "payment", "return", "service_order", "service_work"]
+        )
+        payment = next(e for e in data["results"] if e["kind"] == "payment")
+        self.assertEqual(payment["amount"], "10.00")
+        self.assertEqual(payment["username"], "usr-alice")
+
+    def test_newest_first(self):
+        events = self.timeline()["results"]
+        keys = [(e["occurred_at"], e["kind"], e["id"]) for e in events]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_cursor_walk(self):
+        for _ in range(25):
+            Reservation.objects.create(
+                user=self.user,
+                device=self.device,
+                reserved_from=timezone.now(),
+                reserved_until=timezone.now() + timedelta(hours=1),
+            )
+        first = self.timeline()
+        second = self.timeline(first["next"])
+        self.assertIsNone(second["next"])
+        seen = [(e["kind"], e["id"]) for e in first["results"] + second["results"]]
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(len(set(seen)), 30)
+        self.assertEqual(self.timeline(second["previous"])["results"], first["results"])
+
+    def test_unknown_device(self):
+        response = self.client.get("/api/devices/999999/timeline/")
+        self.assertEqual(response.status_code, 404)
+
+
+# Кэш справочников отдал бы сохранённый ответ до коммита правки
+@override_settings(REFERENCE_CACHE_ENABLED=False)
+class ConditionalGetTests(DeviceDataMixin, TestCase):
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def detail_url(self):
+        return f"/api/devices/{self.devices[0].pk}/"
+
+    def test_retrieve_not_modified(self):
+        first = self.get(self.detail_url())
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(1):
+            second = self.get(self.detail_url(), if_none_match=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        third = self.get(self.detail_url(), if_modified_since=first["Last-Modified"])
+        self.assertEqual(third.status_code, 304)
+
+    def test_retrieve_changes(self):
+        etag = self.get(self.detail_url())["ETag"]
+
+        # Имя категории выводится в ответе устройства
+        self.category.name = "Notebooks"
+        self.category.save()
+        response = self.get(self.detail_url(), if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["category_name"], "Notebooks")
+
+        # Удаление характеристики не трогает updated_at устройства
+        etag = response["ETag"]
+        spec = Spec.objects.create(device=self.devices[0], spec_type="RAM", value="8")
+        etag = self.get(self.detail_url(), if_none_match=etag)["ETag"]
+        spec.delete()
+        response = self.get(self.detail_url(), if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_not_modified_until_delete(self):
+        first = self.get("/api/categories/")
+        self.assertEqual(
+            self.get("/api/categories/", if_none_match=first["ETag"]).status_code, 304
+        )
+        other = Category.objects.create(name="Phones")
+        response = self.get("/api/categories/", if_none_match=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+        # Last-Modified с точностью до секунды: правки - заметно раньше удаления
+        Category.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        modified = self.get("/api/categories/")["Last-Modified"]
+        self.assertEqual(
+            self.get("/api/categories/", if_modified_since=modified).status_code, 304
+        )
+        # Удаление не двигает max(updated_at), но Last-Modified берёт его время
+        other.delete()
+        response = self.get("/api/categories/", if_modified_since=modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_query(self):
+        first = self.get("/api/categories/")
+        second = self.get("/api/categories/?search=Lap")
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        third = self.get(self.detail_url())
+        fourth = self.get(self.detail_url() + "?fields=id")
+        self.assertNotEqual(third["ETag"], fourth["ETag"])
+
+
+class ReferenceCacheTests(DeviceDataMixin, TestCase):
+    def test_hit_without_queries(self):
+        first = self.client.get("/api/brands/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/brands/")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_cached_validators_answer_304(self):
+        etag = self.client.get("/api/brands/")["ETag"]
+        response = self.client.get("/api/brands/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_change_bumps_version_after_commit(self):
+        self.client.get("/api/brands/")
+        with self.captureOnCommitCallbacks(execute=True):
+            Brand.objects.create(name="Dell")
+        response = self.client.get("/api/brands/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        names = [brand["name"] for brand in self.results(response)]
+        self.assertIn("Dell", names)
+
+    def test_path_is_part_of_key(self):
+        self.client.get("/api/categories/")
+        response = self.client.get(f"/api/categories/{self.category.pk}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["name"], "Laptops")
+
+    def test_stats(self):
+        self.client.get("/api/locations/")
+        self.client.get("/api/locations/")
+        stats = self.client.get("/api/locations/cache_stats/").json()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    @override_settings(REFERENCE_CACHE_ENABLED=False)
+    def test_disabled(self):
+        self.client.get("/api/brands/")
+        self.assertNotIn("X-Cache", self.client.get("/api/brands/"))
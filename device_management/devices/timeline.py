@@ -0,0 +1,228 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import models
+from django.db.models import F, Func, Q, Value
+
+from services.models import Payment, ServiceOrder, ServiceWork
+
+from .models import Loan, Reservation, Return
+from .pagination import KeysetPagination
+
+# Сортировка ленты: время события, вид, id - позиция однозначна и в UNION
+TIMELINE_ORDERING = ["-occurred_at", "-kind", "-event_id"]
+
+
+class AnyOf(Func):
+    """
+    field = ANY(ARRAY(подзапрос)): подзапрос считается один раз (InitPlan),
+    а массив id идёт в Index Cond покрывающего индекса ветки - JOIN или IN по
+    выдачам/заявкам устройства планировщик превращает в hash join с полным
+    чтением таблицы или обход всех платежей по paid_at.
+    """
+
+    output_field = models.BooleanField()
+
+    def __init__(self, field, ids):
+        super().__init__(F(field), ArraySubquery(ids))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        field, ids = self.get_source_expressions()
+        field_sql, field_params = compiler.compile(field)
+        ids_sql, ids_params = compiler.compile(ids)
+        return f"{field_sql} = ANY({ids_sql})", (*field_params, *ids_params)
+
+
+def _column(source, output_field):
+    if source is None:
+        return Value(None, output_field=output_field)
+    return F(source)
+
+
+def _device_ids(parent, device_pk):
+    return parent._base_manager.filter(device=device_pk).order_by().values("pk")
+
+
+class TimelineSource:
+    """
+    Одна ветка UNION ALL: события таблицы model для устройства.
+    device - FK на устройство, а для возвратов, работ и платежей - на
+    родителя parent (выдачу или заявку) этого устройства; occurred_at - время
+    события, остальные колонки приводятся к общему набору (статус,
+    пользователь, деталь, сумма).
+    """
+
+    def __init__(
+        self,
+        kind,
+        model,
+        device,
+        occurred_at,
+        parent=None,
+        status=None,
+        actor=None,
+        detail=None,
+        amount=None,
+        condition=None,
+    ):
+        self.kind = kind
+        self.model = model
+        self.device = device
+        self.parent = parent
+        self.occurred_at = occurred_at
+        self.status = status
+        self.actor = actor
+        self.detail = detail
+        self.amount = amount
+        self.condition = condition
+
+    def events(self, device_pk):
+        if self.parent is None:
+            queryset = self.model._base_manager.filter(**{self.device: device_pk})
+        else:
+            queryset = self.model._base_manager.filter(
+                AnyOf(self.device, _device_ids(self.parent, device_pk))
+            )
+        if self.condition is not None:
+            queryset = queryset.filter(self.condition)
+        return queryset
+
+    def after(self, position, reverse):
+        # (occurred_at, kind, id) строго после позиции; kind в ветке константа,
+        # поэтому условие сводится к диапазону по её собственному индексу
+        occurred_at, kind, pk = position
+        strict = "gt" if reverse else "lt"
+        loose = "gte" if reverse else "lte"
+        if self.kind == kind:
+            return Q(**{f"{self.occurred_at}__{loose}": occurred_at}) & (
+                Q(**{f"{self.occurred_at}__{strict}": occurred_at})
+                | Q(**{self.occurred_at: occurred_at, f"pk__{strict}": pk})
+            )
+        inclusive = (self.kind < kind) != reverse
+        lookup = loose if inclusive else strict
+        return Q(**{f"{self.occurred_at}__{lookup}": occurred_at})
+
+    def queryset(self, device_pk, limit, position=None, reverse=False):
+        queryset = self.events(device_pk)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+
+        direction = "" if reverse else "-"
+        return (
+            queryset.annotate(
+                kind=Value(self.kind, output_field=models.CharField()),
+                event_id=F("pk"),
+                occurred_at=F(self.occurred_at),
+                event_status=_column(self.status, models.CharField()),
+                actor_id=_column(self.actor, models.IntegerField()),
+                detail=_column(self.detail, models.CharField()),
+                event_amount=_column(
+                    self.amount, models.DecimalField(max_digits=10, decimal_places=2)
+                ),
+            )
+            .order_by(f"{direction}{self.occurred_at}", f"{direction}pk")
+            .values(
+                "kind",
+                "event_id",
+                "occurred_at",
+                "event_status",
+                "actor_id",
+                "detail",
+                "event_amount",
+            )[:limit]
+        )
+
+
+TIMELINE_SOURCES = [
+    TimelineSource("loan", Loan, "device", "loaned_at", status="status", actor="user"),
+    TimelineSource(
+        "payment",
+        Payment,
+        "related_loan",
+        "paid_at",
+        parent=Loan,
+        actor="paid_by",
+        detail="payment_type",
+        amount="amount",
+    ),
+    TimelineSource(
+        "payment",
+        Payment,
+        "related_service_order",
+        "paid_at",
+        parent=ServiceOrder,
+        actor="paid_by",
+        detail="payment_type",
+        amount="amount",
+        # Платёж и по выдаче, и по заявке - одно событие, в ветке выдачи
+        condition=Q(related_loan__isnull=True),
+    ),
+    TimelineSource(
+        "reservation",
+        Reservation,
+        "device",
+        "created_at",
+        status="status",
+        actor="user",
+    ),
+    TimelineSource(
+        "return",
+        Return,
+        "loan",
+        "returned_at",
+        parent=Loan,
+        actor="inspected_by",
+        detail="condition",
+    ),
+    TimelineSource(
+        "service_order",
+        ServiceOrder,
+        "device",
+        "created_at",
+        status="status",
+        actor="created_by",
+        detail="priority",
+    ),
+    TimelineSource(
+        "service_work",
+        ServiceWork,
+        "service_order",
+        "performed_at",
+        parent=ServiceOrder,
+        actor="performed_by",
+        amount="cost",
+    ),
+]
+
+
+def timeline_events(device_pk, limit, position=None, reverse=False):
+    """
+    Страница ленты устройства одним запросом: каждая ветка отдаёт не больше
+    limit строк после позиции по своему индексу, UNION ALL сортирует только
+    их, а не всю историю устройства.
+    """
+    parts = [
+        source.queryset(device_pk, limit, position, reverse)
+        for source in TIMELINE_SOURCES
+    ]
+    ordering = TIMELINE_ORDERING
+    if reverse:
+        ordering = [item.lstrip("-") for item in ordering]
+    return list(parts[0].union(*parts[1:], all=True).order_by(*ordering)[:limit])
+
+
+class TimelinePagination(KeysetPagination):
+    """Курсор KeysetPagination поверх UNION ALL ленты (только курсорный режим)."""
+
+    ordering = TIMELINE_ORDERING
+    fields = [models.DateTimeField(), models.CharField(), models.IntegerField()]
+
+    def paginate_timeline(self, device_pk, request):
+        self.request = request
+        cursor = self.decode_cursor(request)
+        position, reverse = None, False
+        if cursor is not None:
+            position, reverse = cursor["position"], cursor["reverse"]
+        results = timeline_events(device_pk, self.page_size + 1, position, reverse)
+        return self.finish_page(results, cursor)
+
+    def get_position(self, instance):
+        return [instance["occurred_at"], instance["kind"], instance["event_id"]]
@@ -5,6 +5,7 @@ from .views import (
     BrandViewSet,
     CategoryViewSet,
     DeviceViewSet,
+    ExportJobViewSet,
     LoanViewSet,
     LocationViewSet,
     ReservationViewSet,
@@ -19,6 +20,7 @@ router.register("devices", DeviceViewSet)
 router.register("reservations", ReservationViewSet)
 router.register("loans", LoanViewSet)
 router.register("returns", ReturnViewSet)
+router.register("export-jobs", ExportJobViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
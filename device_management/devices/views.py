@@ -1,21 +1,72 @@
+import os
+import tempfile
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+from django.db.models import Q
+from django.http import FileResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import Brand, Category, Device, Loan, Location, Reservation, Return
+from users.roles import is_manager
+
+from .bulk import bulk_create_devices, bulk_update_devices
+from .conditional import ConditionalGetMixin
+from .exports import (
+    EXPORT_BACKENDS,
+    ExportContentNegotiation,
+    cached_export,
+    delta_export,
+    invalid_format_message,
+    is_delta_requested,
+)
+from .imports import IMPORT_READERS, import_devices
+from .jobs import enqueue_export_job, is_async_requested
+from .models import (
+    Brand,
+    Category,
+    Device,
+    ExportJob,
+    Loan,
+    Location,
+    Reservation,
+    Return,
+)
+from .mixins import ListActionMixin, SparseFieldsViewMixin
+from .pagination import EstimatedCountPagination
 from .permissions import IsAdminOrReadOnly, IsManagerOrAdmin, IsOwnerOrManager
+from .reference_cache import ReferenceCacheMixin
+from .search import (
+    FUZZY_LOOKUP_FIELDS,
+    FUZZY_LOOKUP_LIMIT,
+    FUZZY_LOOKUP_MAX_LIMIT,
+    FullTextSearchFilter,
+    RankedOrderingFilter,
+    fuzzy_matches,
+)
 from .serializers import (
     BrandSerializer,
     CategorySerializer,
     DeviceListSerializer,
     DeviceSerializer,
+    ExportJobSerializer,
     LoanSerializer,
     LocationSerializer,
     ReservationSerializer,
     ReturnSerializer,
+    TimelineEventSerializer,
 )
+from .timeline import TimelinePagination
 from .utils import (
+    DEVICE_EXPORT,
+    LOAN_EXPORT,
+    RESERVATION_EXPORT,
     export_devices_to_csv,
     export_devices_to_excel,
     export_devices_to_json,
@@ -27,7 +78,7 @@ from .utils import (
 )
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ReferenceCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -37,7 +88,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
     ordering = ["name"]
 
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(ReferenceCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -52,7 +103,7 @@ class BrandViewSet(viewsets.ModelViewSet):
     filterset_fields = ["country"]
 
 
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(ReferenceCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -67,24 +118,44 @@ class LocationViewSet(viewsets.ModelViewSet):
     filterset_fields = ["location_type"]
 
 
-class DeviceViewSet(viewsets.ModelViewSet):
-    queryset = Device.objects.select_related(
-        "category", "brand", "location"
-    ).prefetch_related("specifications", "documents")
+class DeviceViewSet(
+    ConditionalGetMixin,
+    ListActionMixin,
+    SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
+    # search_vector нужен только в WHERE поиска, в ответы не попадает
+    queryset = (
+        Device.objects.select_related("category", "brand", "location")
+        .prefetch_related("specifications", "documents")
+        .defer("search_vector")
+    )
     serializer_class = DeviceSerializer
     permission_classes = [IsManagerOrAdmin]
+    pagination_class = EstimatedCountPagination
     filter_backends = [
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        FullTextSearchFilter,
+        RankedOrderingFilter,
         DjangoFilterBackend,
     ]
     search_fields = ["name", "serial_number", "inventory_number"]
+    search_vector_fields = ["search_vector"]
     ordering_fields = ["name", "created_at", "purchase_date"]
     ordering = ["-created_at"]
     filterset_fields = ["category", "brand", "status", "condition", "location"]
+    sparse_actions = ("list", "retrieve", "available")
+    # Имена и ?expand= справочников, характеристики и документы - в ответе retrieve
+    conditional_related = ("category", "brand", "location")
+    conditional_children = ("specifications", "documents")
+
+    def get_queryset(self):
+        if self.action == "timeline":
+            # Только существование и права: строка устройства в ответ не идёт
+            return Device.objects.only("pk")
+        return super().get_queryset()
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ["list", "available", "batch_lookup"]:
             return DeviceListSerializer
         return DeviceSerializer
 
@@ -93,11 +164,12 @@ class DeviceViewSet(viewsets.ModelViewSet):
             return [IsAdminOrReadOnly()]
         return [IsManagerOrAdmin()]
 
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.get_queryset())
+
     @action(detail=False, methods=["get"])
     def available(self, request):
-        available_devices = self.queryset.filter(status="AVAILABLE")
-        serializer = DeviceListSerializer(available_devices, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.get_queryset().filter(status="AVAILABLE"))
 
     @action(detail=False, methods=["get"])
     def by_serial(self, request):
@@ -108,15 +180,182 @@ class DeviceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        if request.query_params.get("mode") == "fuzzy":
+            return self.fuzzy_lookup(request, serial)
+
         try:
-            device = Device.objects.get(serial_number=serial)
-            serializer = DeviceSerializer(device)
+            device = self.get_queryset().get(serial_number=serial)
+            serializer = self.get_serializer(device)
             return Response(serializer.data)
         except Device.DoesNotExist:
             return Response(
                 {"error": "Device not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
+    def fuzzy_lookup(self, request, serial):
+        # Опечатки сканера/оператора: ближайшие серийные и инвентарные номера
+        try:
+            limit = int(request.query_params.get("limit", FUZZY_LOOKUP_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= FUZZY_LOOKUP_MAX_LIMIT:
+            return Response(
+                {"error": f"limit must be between 1 and {FUZZY_LOOKUP_MAX_LIMIT}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        matches = fuzzy_matches(self.get_queryset(), serial, FUZZY_LOOKUP_FIELDS, limit)
+        serializer = self.get_serializer(
+            [device for device, _, _ in matches], many=True
+        )
+        results = []
+        for data, (_, similarity, field) in zip(serializer.data, matches):
+            data["similarity"] = round(similarity, 3)
+            data["matched_field"] = field
+            results.append(data)
+        return Response(results)
+
+    @action(detail=False, methods=["post"])
+    def batch_lookup(self, request):
+        # Пачка отсканированных кодов (серийных или инвентарных) - один запрос
+        if hasattr(request.data, "getlist"):
+            codes = request.data.getlist("codes")
+        else:
+            codes = request.data.get("codes")
+        if not isinstance(codes, list) or not all(
+            isinstance(code, str) for code in codes
+        ):
+            return Response(
+                {"error": "codes must be a list of strings"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        codes = list(dict.fromkeys(code.strip() for code in codes if code.strip()))
+        if not codes:
+            return Response(
+                {"error": "codes is required"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = settings.BATCH_LOOKUP_MAX_CODES
+        if len(codes) > limit:
+            return Response(
+                {"error": f"At most {limit} codes per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # OR по двум уникальным индексам - BitmapOr, без сортировки
+        queryset = (
+            self.get_queryset()
+            .filter(Q(serial_number__in=codes) | Q(inventory_number__in=codes))
+            .prefetch_related(None)
+            .order_by()
+        )
+        project = getattr(self.get_serializer(many=True), "project", None)
+        if project is not None:
+            queryset = project(queryset)
+
+        position = {code: index for index, code in enumerate(codes)}
+        devices = {}
+        for device in queryset:
+            if isinstance(device, Mapping):
+                numbers = device["serial_number"], device["inventory_number"]
+            else:
+                numbers = device.serial_number, device.inventory_number
+            matched = [position[code] for code in numbers if code in position]
+            devices[min(matched)] = (device, numbers)
+
+        # Порядок ответа - порядок сканирования
+        found = [devices[index] for index in sorted(devices)]
+        matched_codes = {code for _, numbers in found for code in numbers}
+        serializer = self.get_serializer([device for device, _ in found], many=True)
+        return Response(
+            {
+                "found": serializer.data,
+                "not_found": [code for code in codes if code not in matched_codes],
+            }
+        )
+
+    @action(detail=False, methods=["post"])
+    def bulk_create(self, request):
+        return self.bulk_response(request, bulk_create_devices)
+
+    @action(detail=False, methods=["patch"])
+    def bulk_update(self, request):
+        return self.bulk_response(request, bulk_update_devices)
+
+    def bulk_response(self, request, handler):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"error": "Expected a non-empty list of devices"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = settings.BULK_DEVICES_MAX_ROWS
+        if len(rows) > limit:
+            return Response(
+                {"error": f"At most {limit} devices per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            results = handler(rows)
+        except IntegrityError:
+            # Номер занят параллельной записью между проверкой и вставкой
+            return Response(
+                {"error": "Conflicting concurrent write, retry the request"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        failed = sum("errors" in result for result in results)
+        if not failed:
+            response_status = status.HTTP_200_OK
+        elif failed == len(results):
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS
+        return Response(
+            {
+                "saved": len(results) - failed,
+                "failed": failed,
+                "results": results,
+            },
+            status=response_status,
+        )
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_file(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "File is required"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        format_type = request.data.get("format") or os.path.splitext(upload.name)[1][1:]
+        format_type = format_type.lower()
+        if format_type not in IMPORT_READERS:
+            return Response(
+                {"error": f"Invalid format. Use {', '.join(sorted(IMPORT_READERS))}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true", "yes")
+
+        with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as report:
+            result = import_devices(upload, format_type, report, dry_run=dry_run)
+            error_report = None
+            if result.failed:
+                report.seek(0)
+                name = default_storage.save(
+                    f"imports/{os.path.splitext(upload.name)[0]}_errors.csv",
+                    File(report),
+                )
+                error_report = request.build_absolute_uri(default_storage.url(name))
+
+        # Файл не дочитан: 400, но со счётчиками уже записанных чанков
+        return Response(
+            {**result.as_dict(), "error_report": error_report},
+            status=(
+                status.HTTP_400_BAD_REQUEST if result.error else status.HTTP_200_OK
+            ),
+        )
+
     @action(detail=True, methods=["get"])
     def history(self, request, pk=None):
         device = self.get_object()
@@ -133,6 +372,21 @@ class DeviceViewSet(viewsets.ModelViewSet):
             }
         )
 
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        device = self.get_object()
+        paginator = TimelinePagination()
+        events = paginator.paginate_timeline(device.pk, request)
+
+        actors = {event["actor_id"] for event in events} - {None}
+        usernames = dict(
+            User.objects.filter(pk__in=actors).values_list("pk", "username")
+        )
+        serializer = TimelineEventSerializer(
+            events, many=True, context={"usernames": usernames}
+        )
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=False, methods=["get"])
     def export_csv(self, request):
         queryset = self.filter_queryset(self.get_queryset())
@@ -146,6 +400,8 @@ class DeviceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def export_json(self, request):
         queryset = self.filter_queryset(self.get_queryset())
+        if is_delta_requested(request):
+            return delta_export(request, DEVICE_EXPORT, queryset, "json")
         return export_devices_to_json(queryset)
 
     @action(detail=False, methods=["get"])
@@ -153,26 +409,40 @@ class DeviceViewSet(viewsets.ModelViewSet):
         queryset = self.filter_queryset(self.get_queryset())
         return export_devices_to_pdf(queryset)
 
-    @action(detail=False, methods=["get"])
+    @action(
+        detail=False,
+        methods=["get"],
+        content_negotiation_class=ExportContentNegotiation,
+    )
     def export(self, request):
+        """
+        Выгрузка устройств (format=csv|xlsx|json|ndjson|pdf, async=1 - фоном).
+        since=<водяной знак> отдаёт дельту json/ndjson: изменённые и удалённые
+        устройства. Переименование категории, бренда или локации updated_at
+        устройств не меняет и в дельту не попадает. Удаления хранятся
+        EXPORT_DELTA_RETENTION_DAYS: с since старше этого срока нужна полная
+        выгрузка.
+        """
         format_type = request.query_params.get("format", "csv").lower()
-        queryset = self.filter_queryset(self.get_queryset())
+        if is_async_requested(request):
+            return enqueue_export_job(request, "devices", format_type)
 
-        if format_type == "csv":
-            return export_devices_to_csv(queryset)
-        elif format_type == "xlsx":
-            return export_devices_to_excel(queryset)
-        elif format_type == "json":
-            return export_devices_to_json(queryset)
-        else:
+        if format_type not in EXPORT_BACKENDS:
             return Response(
-                {"error": "Invalid format. Use csv, xlsx, or json"},
+                {"error": invalid_format_message()},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        queryset = self.filter_queryset(self.get_queryset())
+        if is_delta_requested(request):
+            return delta_export(request, DEVICE_EXPORT, queryset, format_type)
+        return cached_export(request, DEVICE_EXPORT, queryset, format_type)
+
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    queryset = Reservation.objects.select_related("user", "device").all()
+class ReservationViewSet(ListActionMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Reservation.objects.select_related("user", "device").defer(
+        "device__search_vector"
+    )
     serializer_class = ReservationSerializer
     permission_classes = [IsOwnerOrManager]
     filter_backends = [
@@ -184,26 +454,24 @@ class ReservationViewSet(viewsets.ModelViewSet):
     ordering_fields = ["created_at", "reserved_from", "reserved_until"]
     ordering = ["-created_at"]
     filterset_fields = ["status", "user", "device"]
+    sparse_actions = ("list", "retrieve", "my_reservations")
+
+    def get_permissions(self):
+        if self.action == "export":
+            return [IsManagerOrAdmin()]
+        return [IsOwnerOrManager()]
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     def get_queryset(self):
-        if self.request.user.is_staff:
+        if is_manager(self.request):
             return self.queryset
-        try:
-            profile = self.request.user.profile
-            if profile.role and profile.role.name in ["MANAGER", "ADMIN"]:
-                return self.queryset
-        except:
-            pass
         return self.queryset.filter(user=self.request.user)
 
     @action(detail=False, methods=["get"])
     def my_reservations(self, request):
-        reservations = self.queryset.filter(user=request.user)
-        serializer = self.get_serializer(reservations, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.queryset.filter(user=request.user))
 
     @action(detail=True, methods=["post"])
     def cancel(self, request, pk=None):
@@ -217,20 +485,51 @@ class ReservationViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @action(
+        detail=False,
+        methods=["get"],
+        content_negotiation_class=ExportContentNegotiation,
+    )
+    def export(self, request):
+        """
+        Выгрузка бронирований; since=<водяной знак> - дельта json/ndjson.
+        Смена имени пользователя или названия устройства в дельту не попадает:
+        updated_at бронирования при этом не меняется.
+        """
+        format_type = request.query_params.get("format", "csv").lower()
+        if is_async_requested(request):
+            return enqueue_export_job(request, "reservations", format_type)
 
-class LoanViewSet(viewsets.ModelViewSet):
-    queryset = Loan.objects.select_related("user", "device", "manager").all()
+        if format_type not in EXPORT_BACKENDS:
+            return Response(
+                {"error": invalid_format_message()},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if is_delta_requested(request):
+            return delta_export(request, RESERVATION_EXPORT, queryset, format_type)
+        return cached_export(request, RESERVATION_EXPORT, queryset, format_type)
+
+
+class LoanViewSet(ListActionMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Loan.objects.select_related("user", "device", "manager").defer(
+        "device__search_vector"
+    )
     serializer_class = LoanSerializer
     permission_classes = [IsManagerOrAdmin]
+    pagination_class = EstimatedCountPagination
     filter_backends = [
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        FullTextSearchFilter,
+        RankedOrderingFilter,
         DjangoFilterBackend,
     ]
     search_fields = ["user__username", "device__name", "device__serial_number"]
+    search_vector_fields = ["device__search_vector"]
     ordering_fields = ["loaned_at", "due_date"]
     ordering = ["-loaned_at"]
     filterset_fields = ["status", "user", "device"]
+    sparse_actions = ("list", "retrieve", "active", "overdue", "my_loans")
 
     def get_permissions(self):
         if self.action in ["my_loans"]:
@@ -243,16 +542,9 @@ class LoanViewSet(viewsets.ModelViewSet):
         if self.action == "my_loans":
             return self.queryset.filter(user=self.request.user)
 
-        if self.request.user.is_staff:
+        if is_manager(self.request):
             return self.queryset
 
-        try:
-            profile = self.request.user.profile
-            if profile.role and profile.role.name in ["MANAGER", "ADMIN"]:
-                return self.queryset
-        except:
-            pass
-
         return self.queryset.filter(user=self.request.user)
 
     def perform_create(self, serializer):
@@ -260,21 +552,15 @@ class LoanViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def active(self, request):
-        active_loans = self.get_queryset().filter(status="ACTIVE")
-        serializer = self.get_serializer(active_loans, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.get_queryset().filter(status="ACTIVE"))
 
     @action(detail=False, methods=["get"])
     def overdue(self, request):
-        overdue_loans = self.get_queryset().filter(status="OVERDUE")
-        serializer = self.get_serializer(overdue_loans, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.get_queryset().filter(status="OVERDUE"))
 
     @action(detail=False, methods=["get"])
     def my_loans(self, request):
-        my_loans = self.queryset.filter(user=request.user)
-        serializer = self.get_serializer(my_loans, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.get_queryset())
 
     @action(detail=False, methods=["get"])
     def export_csv(self, request):
@@ -289,6 +575,8 @@ class LoanViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def export_json(self, request):
         queryset = self.filter_queryset(self.get_queryset())
+        if is_delta_requested(request):
+            return delta_export(request, LOAN_EXPORT, queryset, "json")
         return export_loans_to_json(queryset)
 
     @action(detail=False, methods=["get"])
@@ -296,23 +584,32 @@ class LoanViewSet(viewsets.ModelViewSet):
         queryset = self.filter_queryset(self.get_queryset())
         return export_loans_to_pdf(queryset)
 
-    @action(detail=False, methods=["get"])
+    @action(
+        detail=False,
+        methods=["get"],
+        content_negotiation_class=ExportContentNegotiation,
+    )
     def export(self, request):
+        """
+        Выгрузка выдач; since=<водяной знак> - дельта json/ndjson. Смена
+        имени пользователя или названия устройства в дельту не попадает:
+        updated_at выдачи при этом не меняется.
+        """
         format_type = request.query_params.get("format", "csv").lower()
-        queryset = self.filter_queryset(self.get_queryset())
+        if is_async_requested(request):
+            return enqueue_export_job(request, "loans", format_type)
 
-        if format_type == "csv":
-            return export_loans_to_csv(queryset)
-        elif format_type == "xlsx":
-            return export_loans_to_excel(queryset)
-        elif format_type == "json":
-            return export_loans_to_json(queryset)
-        else:
+        if format_type not in EXPORT_BACKENDS:
             return Response(
-                {"error": "Invalid format. Use csv, xlsx, or json"},
+                {"error": invalid_format_message()},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        queryset = self.filter_queryset(self.get_queryset())
+        if is_delta_requested(request):
+            return delta_export(request, LOAN_EXPORT, queryset, format_type)
+        return cached_export(request, LOAN_EXPORT, queryset, format_type)
+
 
 class ReturnViewSet(viewsets.ModelViewSet):
     queryset = Return.objects.select_related(
@@ -332,3 +629,27 @@ class ReturnViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(inspected_by=self.request.user)
+
+
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ExportJob.objects.select_related("created_by").all()
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsManagerOrAdmin]
+    filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
+    ordering_fields = ["created_at"]
+    ordering = ["-created_at"]
+    filterset_fields = ["resource", "export_format", "status"]
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != "COMPLETED" or not job.file:
+            return Response(
+                {"error": "Export is not ready", "status": job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=f"{job.resource}.{job.export_format}",
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:10
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0014_keyset_indexes"),
+        ("services", "0003_payment"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="payment",
+            index=models.Index(fields=["paid_at", "id"], name="payment_paid_id_idx"),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:21
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0015_list_action_indexes"),
+        ("services", "0004_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="payment",
+            index=models.Index(
+                fields=["paid_by", "paid_at", "id"], name="payment_paid_by_paid_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="payment",
+            index=models.Index(
+                fields=["payment_type", "paid_at", "id"], name="payment_type_paid_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="serviceorder",
+            index=models.Index(
+                condition=models.Q(("status", "PENDING")),
+                fields=["created_at", "id"],
+                name="serviceorder_pending_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="serviceorder",
+            index=models.Index(
+                condition=models.Q(("status", "IN_PROGRESS")),
+                fields=["created_at", "id"],
+                name="serviceorder_in_progress_idx",
+            ),
+        ),
+    ]
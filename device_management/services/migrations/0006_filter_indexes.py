@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:22
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0016_filter_indexes"),
+        ("services", "0005_list_action_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="serviceorder",
+            index=models.Index(
+                fields=["status", "priority", "id"], name="serviceorder_status_prio_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:27
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Хранимая GeneratedField переписывает всю таблицу под ACCESS EXCLUSIVE:
+    # чтение и запись таблицы стоят, пока вектор считается для каждой строки.
+    # На большой таблице - только в окно обслуживания. GIN-индекс по вектору
+    # строится конкурентно и без этой блокировки в 0009_search_vector_index
+
+    dependencies = [
+        ("devices", "0017_search_vector"),
+        ("services", "0006_filter_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="serviceorder",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    "issue_description", config="simple"
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+    ]
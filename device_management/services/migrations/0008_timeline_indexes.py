@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:59
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("devices", "0019_timeline_indexes"),
+        ("services", "0007_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="payment",
+            index=models.Index(
+                fields=["related_loan", "paid_at", "id"],
+                include=("amount", "payment_type", "paid_by"),
+                name="payment_loan_timeline_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="payment",
+            index=models.Index(
+                fields=["related_service_order", "paid_at", "id"],
+                include=("amount", "payment_type", "paid_by", "related_loan"),
+                name="payment_order_timeline_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="serviceorder",
+            index=models.Index(
+                fields=["device", "created_at", "id"],
+                include=("status", "priority", "created_by"),
+                name="serviceorder_timeline_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="servicework",
+            index=models.Index(
+                fields=["service_order", "performed_at", "id"],
+                include=("cost", "performed_by"),
+                name="servicework_timeline_idx",
+            ),
+        ),
+    ]
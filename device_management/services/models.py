@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
-from devices.models import Device, Loan
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from devices.models import SEARCH_CONFIG, Device, Loan
 
 
 class ServiceOrder(models.Model):
@@ -22,6 +24,11 @@ class ServiceOrder(models.Model):
         Device, on_delete=models.CASCADE, related_name="service_orders"
     )
     issue_description = models.TextField()
+    search_vector = models.GeneratedField(
+        expression=SearchVector("issue_description", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
     priority = models.CharField(
         max_length=20, choices=PRIORITY_CHOICES, default="MEDIUM"
@@ -47,6 +54,31 @@ class ServiceOrder(models.Model):
         verbose_name = "Service Order"
         verbose_name_plural = "Service Orders"
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="serviceorder_search_idx"),
+            # ?status= с сортировкой по приоритету (?ordering=priority)
+            models.Index(
+                fields=["status", "priority", "id"],
+                name="serviceorder_status_prio_idx",
+            ),
+            # Частичные индексы для action pending и in_progress
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(status="PENDING"),
+                name="serviceorder_pending_idx",
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(status="IN_PROGRESS"),
+                name="serviceorder_in_progress_idx",
+            ),
+            # Лента устройства (timeline): покрывающий, без чтения таблицы
+            models.Index(
+                fields=["device", "created_at", "id"],
+                include=["status", "priority", "created_by"],
+                name="serviceorder_timeline_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Service #{self.id} - {self.device.name} ({self.status})"
@@ -69,6 +101,14 @@ class ServiceWork(models.Model):
         verbose_name = "Service Work"
         verbose_name_plural = "Service Works"
         ordering = ["-performed_at"]
+        indexes = [
+            # Лента устройства (timeline): работы по заявкам устройства
+            models.Index(
+                fields=["service_order", "performed_at", "id"],
+                include=["cost", "performed_by"],
+                name="servicework_timeline_idx",
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -104,6 +144,27 @@ class Payment(models.Model):
         verbose_name = "Payment"
         verbose_name_plural = "Payments"
         ordering = ["-paid_at"]
+        indexes = [
+            models.Index(fields=["paid_at", "id"], name="payment_paid_id_idx"),
+            # my_payments и by_type: платежи пользователя / типа в порядке -paid_at
+            models.Index(
+                fields=["paid_by", "paid_at", "id"], name="payment_paid_by_paid_idx"
+            ),
+            models.Index(
+                fields=["payment_type", "paid_at", "id"], name="payment_type_paid_idx"
+            ),
+            # Лента устройства (timeline): платежи по выдачам и заявкам
+            models.Index(
+                fields=["related_loan", "paid_at", "id"],
+                include=["amount", "payment_type", "paid_by"],
+                name="payment_loan_timeline_idx",
+            ),
+            models.Index(
+                fields=["related_service_order", "paid_at", "id"],
+                include=["amount", "payment_type", "paid_by", "related_loan"],
+                name="payment_order_timeline_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_payment_type_display()} - {self.amount} by {self.paid_by.username}"
@@ -1,19 +1,11 @@
 from rest_framework import permissions
 
+from users.roles import is_manager
+
 
 class IsManagerOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-
-        if request.user.is_staff:
-            return True
-
-        try:
-            profile = request.user.profile
-            return profile.role and profile.role.name in ["MANAGER", "ADMIN"]
-        except:
-            return False
+        return is_manager(request)
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
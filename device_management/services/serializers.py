@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from devices.serializers.mixins import SparseFieldsMixin
+
 from .models import ServiceOrder, ServiceWork, Payment
 
 
@@ -23,7 +25,7 @@ class ServiceWorkSerializer(serializers.ModelSerializer):
         read_only_fields = ["performed_at"]
 
 
-class ServiceOrderSerializer(serializers.ModelSerializer):
+class ServiceOrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     device_name = serializers.CharField(source="device.name", read_only=True)
     device_serial = serializers.CharField(source="device.serial_number", read_only=True)
     assigned_to_username = serializers.CharField(
@@ -60,6 +62,11 @@ class ServiceOrderSerializer(serializers.ModelSerializer):
             "completed_at",
         ]
         read_only_fields = ["created_at", "updated_at", "completed_at"]
+        expandable_fields = {
+            "device": "devices.serializers.device.DeviceListSerializer",
+            "assigned_to": "users.serializers.UserSerializer",
+            "created_by": "users.serializers.UserSerializer",
+        }
 
 
 class PaymentSerializer(serializers.ModelSerializer):
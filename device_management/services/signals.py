@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from devices.exports.cache import data_changed
+from devices.signals import record_deletion
+
+from .models import ServiceOrder
+
+
+@receiver(post_delete, sender=ServiceOrder)
+def record_service_order_deletion(sender, instance, **kwargs):
+    record_deletion(sender, instance, **kwargs)
+
+
+@receiver(post_save, sender=ServiceOrder)
+@receiver(post_delete, sender=ServiceOrder)
+def bump_service_order_export_version(sender, **kwargs):
+    data_changed(sender)
@@ -1,3 +1,41 @@
 from django.test import TestCase
 
-# Create your tests here.
+from devices.tests import DeviceDataMixin
+
+from .models import ServiceOrder
+
+
+class ServiceOrderDataMixin(DeviceDataMixin):
+    def create_order(self, device, **fields):
+        return ServiceOrder.objects.create(
+            device=device,
+            issue_description=fields.pop("issue_description", "Broken screen"),
+            created_by=self.admin,
+            **fields,
+        )
+
+
+class ServiceOrderListActionTests(ServiceOrderDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(22):
+            self.create_order(self.devices[index % self.device_count])
+        self.create_order(self.devices[0], status="IN_PROGRESS", priority="HIGH")
+
+    def test_pending_is_paginated(self):
+        response = self.client.get("/api/service-orders/pending/")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["count"], 22)
+        self.assertEqual(len(data["results"]), 20)
+        self.assertIsNotNone(data["next"])
+
+    def test_in_progress_respects_filters(self):
+        orders = self.results(
+            self.client.get("/api/service-orders/in_progress/", {"priority": "HIGH"})
+        )
+        self.assertEqual(len(orders), 1)
+        orders = self.results(
+            self.client.get("/api/service-orders/in_progress/", {"priority": "LOW"})
+        )
+        self.assertEqual(orders, [])
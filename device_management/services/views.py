@@ -3,48 +3,59 @@ from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from devices.exports import (
+    EXPORT_BACKENDS,
+    ExportContentNegotiation,
+    cached_export,
+    delta_export,
+    invalid_format_message,
+    is_delta_requested,
+)
+from devices.jobs import enqueue_export_job, is_async_requested
+from devices.mixins import ListActionMixin, SparseFieldsViewMixin
+from devices.pagination import EstimatedCountPagination
+from devices.search import FullTextSearchFilter, RankedOrderingFilter
+from users.roles import is_manager
+
 from .models import Payment, ServiceOrder
 from .permissions import IsManagerOrAdmin, IsOwnerOrReadOnly
 from .serializers import PaymentSerializer, ServiceOrderSerializer
-from .utils import (
-    export_service_orders_to_csv,
-    export_service_orders_to_excel,
-    export_service_orders_to_json,
-)
+from .utils import SERVICE_ORDER_EXPORT, export_service_orders_to_pdf
 
 
-class ServiceOrderViewSet(viewsets.ModelViewSet):
+class ServiceOrderViewSet(
+    ListActionMixin, SparseFieldsViewMixin, viewsets.ModelViewSet
+):
     queryset = (
         ServiceOrder.objects.select_related("device", "assigned_to", "created_by")
         .prefetch_related("works")
-        .all()
+        .defer("search_vector", "device__search_vector")
     )
     serializer_class = ServiceOrderSerializer
     permission_classes = [IsManagerOrAdmin]
+    pagination_class = EstimatedCountPagination
     filter_backends = [
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        FullTextSearchFilter,
+        RankedOrderingFilter,
         DjangoFilterBackend,
     ]
     search_fields = ["device__name", "device__serial_number", "issue_description"]
+    search_vector_fields = ["search_vector", "device__search_vector"]
     ordering_fields = ["created_at", "priority"]
     ordering = ["-created_at"]
     filterset_fields = ["status", "priority", "assigned_to", "device"]
+    sparse_actions = ("list", "retrieve", "pending", "in_progress")
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
     @action(detail=False, methods=["get"])
     def pending(self, request):
-        pending_orders = self.queryset.filter(status="PENDING")
-        serializer = self.get_serializer(pending_orders, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.get_queryset().filter(status="PENDING"))
 
     @action(detail=False, methods=["get"])
     def in_progress(self, request):
-        in_progress_orders = self.queryset.filter(status="IN_PROGRESS")
-        serializer = self.get_serializer(in_progress_orders, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.get_queryset().filter(status="IN_PROGRESS"))
 
     @action(detail=True, methods=["post"])
     def complete(self, request, pk=None):
@@ -62,24 +73,37 @@ class ServiceOrderViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=["get"])
+    def export_pdf(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_service_orders_to_pdf(queryset)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        content_negotiation_class=ExportContentNegotiation,
+    )
     def export(self, request):
+        """
+        Выгрузка заявок на обслуживание; since=<водяной знак> - дельта
+        json/ndjson. Правки устройства и автора заявки в дельту не попадают.
+        """
         format_type = request.query_params.get("format", "csv").lower()
-        queryset = self.filter_queryset(self.get_queryset())
+        if is_async_requested(request):
+            return enqueue_export_job(request, "service_orders", format_type)
 
-        if format_type == "csv":
-            return export_service_orders_to_csv(queryset)
-        elif format_type == "xlsx":
-            return export_service_orders_to_excel(queryset)
-        elif format_type == "json":
-            return export_service_orders_to_json(queryset)
-        else:
+        if format_type not in EXPORT_BACKENDS:
             return Response(
-                {"error": "Invalid format. Use csv, xlsx, or json"},
+                {"error": invalid_format_message()},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        queryset = self.filter_queryset(self.get_queryset())
+        if is_delta_requested(request):
+            return delta_export(request, SERVICE_ORDER_EXPORT, queryset, format_type)
+        return cached_export(request, SERVICE_ORDER_EXPORT, queryset, format_type)
+
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ListActionMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.select_related(
         "paid_by", "related_loan", "related_service_order"
     ).all()
@@ -101,16 +125,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
     ]
 
     def get_queryset(self):
-        if self.request.user.is_staff:
+        if is_manager(self.request):
             return self.queryset
 
-        try:
-            profile = self.request.user.profile
-            if profile.role and profile.role.name in ["MANAGER", "ADMIN"]:
-                return self.queryset
-        except:
-            pass
-
         return self.queryset.filter(paid_by=self.request.user)
 
     def perform_create(self, serializer):
@@ -118,9 +135,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def my_payments(self, request):
-        my_payments = self.queryset.filter(paid_by=request.user)
-        serializer = self.get_serializer(my_payments, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.queryset.filter(paid_by=request.user))
 
     @action(detail=False, methods=["get"])
     def by_type(self, request):
@@ -131,9 +146,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        payments = self.get_queryset().filter(payment_type=payment_type)
-        serializer = self.get_serializer(payments, many=True)
-        return Response(serializer.data)
+        return self.list_response(self.get_queryset().filter(payment_type=payment_type))
 
     @action(detail=False, methods=["get"])
     def total_by_user(self, request):
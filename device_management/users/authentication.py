@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser
+from .roles import CLAIMS_VERSION_CLAIM, get_claims_version, is_token_current
+from .tokens import USER_CLAIMS
+
+USER_ROW_KEY = "user-row"
+
+
+def is_stateless_enabled():
+    return getattr(settings, "JWT_STATELESS_USER", False)
+
+
+def get_row_timeout():
+    return getattr(settings, "USER_ROW_CACHE_TIMEOUT", 30)
+
+
+def _row_key(user_id, version):
+    return f"{USER_ROW_KEY}:{user_id}:{version}"
+
+
+def get_user_row(user_id, version):
+    """
+    Все колонки auth_user из кэша на USER_ROW_CACHE_TIMEOUT секунд. Ключ
+    содержит claims_version (users.roles): правка пользователя поднимает
+    версию, и прежняя строка больше не читается ни одним воркером. Без
+    профиля (версия 0) строка не кэшируется.
+    """
+    key = _row_key(user_id, version)
+    row = cache.get(key) if version else None
+    if row is None:
+        fields = [field.attname for field in User._meta.concrete_fields]
+        row = (
+            User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values(*fields)
+            .first()
+        )
+        if row is not None and version:
+            cache.set(key, row, get_row_timeout())
+    return row
+
+
+def _from_row(model, row):
+    # from_db ждёт значения в порядке полей модели
+    fields = [
+        field.attname for field in model._meta.concrete_fields if field.attname in row
+    ]
+    return model.from_db(
+        router.db_for_read(model), fields, [row[name] for name in fields]
+    )
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication без SELECT из auth_user на каждый запрос: request.user
+    собирается из claims access-токена (ClaimsUser), роль берёт get_role из
+    того же токена.
+
+    Claims доверяются, только если версия claims токена совпадает с
+    UserProfile.claims_version (users.roles.is_token_current): деактивация,
+    снятие is_staff и смена роли поднимают версию. Токен без claims, с
+    прежней версией или без профиля проверяется по строке из get_user_row -
+    в том числе на is_active.
+
+    Включается JWT_STATELESS_USER=True; по умолчанию и с CHECK_REVOKE_TOKEN
+    (хеш пароля сверяется с базой) работает как JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if not is_stateless_enabled() or api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        has_claims = all(claim in validated_token for claim in USER_CLAIMS)
+        if (
+            has_claims
+            and validated_token["is_active"]
+            and is_token_current(validated_token, user_id)
+        ):
+            claims = {claim: validated_token[claim] for claim in USER_CLAIMS}
+            row = {
+                api_settings.USER_ID_FIELD: User._meta.get_field(
+                    api_settings.USER_ID_FIELD
+                ).to_python(user_id),
+                **claims,
+            }
+            user = _from_row(ClaimsUser, row)
+            user.claims_version = validated_token[CLAIMS_VERSION_CLAIM]
+            return user
+
+        row = get_user_row(user_id, get_claims_version(user_id))
+        if row is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        user = _from_row(User, row)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    # Та же схема jwtAuth в OpenAPI, что и у JWTAuthentication
+    target_class = StatelessJWTAuthentication
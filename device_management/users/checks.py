@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .roles import get_claims_cache
+
+
+@register()
+def check_claims_cache(app_configs, **kwargs):
+    # Без общего кэша версий каждый запрос с JWT читает users_userprofile,
+    # и JWT_STATELESS_USER только меняет один SELECT на другой
+    if not getattr(settings, "JWT_STATELESS_USER", False):
+        return []
+    if get_claims_cache() is not None:
+        return []
+    return [
+        Error(
+            "JWT_STATELESS_USER requires a shared claims cache.",
+            hint=(
+                "Set CLAIMS_CACHE_ALIAS to a cache shared by all workers "
+                "(file-based, redis or memcached), not empty or locmem."
+            ),
+            obj="settings.CLAIMS_CACHE_ALIAS",
+            id="users.E001",
+        )
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:37
+
+import django.contrib.auth.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0002_userprofile"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClaimsUser",
+            fields=[],
+            options={
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("auth.user",),
+            managers=[
+                ("objects", django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
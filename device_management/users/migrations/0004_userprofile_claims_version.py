@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_claimsuser"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="claims_version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
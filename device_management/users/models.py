@@ -29,6 +29,9 @@ class UserProfile(models.Model):
     role = models.ForeignKey(Role, on_delete=models.SET_NULL, null=True, blank=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     department = models.CharField(max_length=100, blank=True, null=True)
+    # Версия claims JWT (users.roles): растёт при правке пользователя,
+    # профиля и его роли, токены с прежней версией проверяются по базе
+    claims_version = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -38,3 +41,38 @@ class UserProfile(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.role}"
+
+
+class ClaimsUser(User):
+    """
+    Пользователь из claims access-токена (users.authentication): загружены
+    id, username, is_staff, is_superuser и is_active, остальные поля отложены.
+    claims_version - версия claims токена, по которой проверены эти поля.
+    Как обычный User подходит для FK, фильтров и сравнения с obj.user.
+
+    Первое обращение к отложенному полю (email, last_login...) подгружает
+    всю строку разом из короткого кэша users.authentication.get_user_row,
+    а не по запросу на поле.
+    """
+
+    claims_version = 0
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if from_queryset is not None or not fields or not deferred.issuperset(fields):
+            return super().refresh_from_db(using, fields, from_queryset)
+
+        from .authentication import get_user_row
+
+        row = get_user_row(self.pk, self.claims_version)
+        if row is None:
+            raise self.DoesNotExist("User matching token does not exist.")
+        for attname in deferred:
+            setattr(self, attname, row[attname])
+
+    def save(self, *args, **kwargs):
+        # Поля из claims и кэша могут отставать от базы - не записываем их
+        raise TypeError("ClaimsUser is read-only, load User to save changes.")
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_simplejwt.tokens import Token
+
+from .models import UserProfile
+
+MANAGER_ROLES = ("MANAGER", "ADMIN")
+
+# Имя роли в access-токене (users.tokens)
+ROLE_CLAIM = "role"
+
+# UserProfile.claims_version на момент выдачи токена. Версия растёт с каждой
+# правкой пользователя, его профиля или роли (users.signals) - claims токена
+# с другой версией не используются
+CLAIMS_VERSION_CLAIM = "claims_version"
+
+CLAIMS_VERSION_KEY = "claims-version"
+
+_UNRESOLVED = object()
+
+
+def get_claims_cache():
+    """
+    Кэш версий claims или None - тогда версия читается из базы на каждый
+    запрос. Нужен общий для всех воркеров бэкенд (файловый, redis,
+    memcached): locmem не видит правок из других процессов и не используется.
+    """
+    alias = getattr(settings, "CLAIMS_CACHE_ALIAS", "")
+    if not alias:
+        return None
+    cache = caches[alias]
+    if isinstance(cache, LocMemCache):
+        return None
+    return cache
+
+
+def get_claims_cache_timeout():
+    return getattr(settings, "CLAIMS_CACHE_TIMEOUT", 300)
+
+
+def _version_key(user_id):
+    return f"{CLAIMS_VERSION_KEY}:{user_id}"
+
+
+def get_claims_version(user_id):
+    # 0 - профиля нет: выданные токены несут версию не меньше 1
+    cache = get_claims_cache()
+    if cache is not None:
+        version = cache.get(_version_key(user_id))
+        if version is not None:
+            return version
+
+    version = (
+        UserProfile.objects.filter(user_id=user_id)
+        .values_list("claims_version", flat=True)
+        .first()
+    ) or 0
+    if cache is not None:
+        # add, а не set: значение, прочитанное до коммита правки, не затирает
+        # версию, которую publish_claims_versions записал после него
+        cache.add(_version_key(user_id), version, get_claims_cache_timeout())
+    return version
+
+
+def publish_claims_versions(versions):
+    # Вызывается после коммита: {user_id: новая версия}
+    cache = get_claims_cache()
+    if cache is not None and versions:
+        cache.set_many(
+            {_version_key(user_id): version for user_id, version in versions.items()},
+            get_claims_cache_timeout(),
+        )
+
+
+def is_token_current(token, user_id):
+    """
+    Совпадает ли версия claims токена с версией в общем кэше версий (в
+    базе - только при промахе кэша). Токен без версии, пользователь без
+    профиля и пропавшая из кэша запись дают проверку по базе, а не доверие
+    токену.
+    """
+    # Токен создаётся на каждый запрос: аутентификация, get_role и все
+    # проверки прав запроса спрашивают о нём - одна проверка на запрос
+    current = getattr(token, "_is_current", None)
+    if current is None:
+        issued = token.get(CLAIMS_VERSION_CLAIM)
+        current = bool(issued) and issued == get_claims_version(user_id)
+        token._is_current = current
+    return current
+
+
+def role_for_user(user_id):
+    # Один запрос с JOIN вместо user.profile и profile.role
+    return (
+        UserProfile.objects.filter(user_id=user_id)
+        .values_list("role__name", flat=True)
+        .first()
+    )
+
+
+def _role_from_token(request, user):
+    token = getattr(request, "auth", None)
+    if not isinstance(token, Token) or ROLE_CLAIM not in token:
+        return _UNRESOLVED
+    if not is_token_current(token, user.pk):
+        return _UNRESOLVED
+    return token[ROLE_CLAIM]
+
+
+def get_role(request):
+    """
+    Имя роли пользователя запроса или None. Считается один раз на запрос:
+    из claim JWT, если версия claims токена совпадает с текущей, иначе
+    одним запросом к профилю.
+    """
+    # Request DRF и HttpRequest под ним - один запрос для кэша роли
+    holder = getattr(request, "_request", request)
+    role = getattr(holder, "_role", _UNRESOLVED)
+    if role is not _UNRESOLVED:
+        return role
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        role = None
+    else:
+        role = _role_from_token(request, user)
+        if role is _UNRESOLVED:
+            role = role_for_user(user.pk)
+    holder._role = role
+    return role
+
+
+def is_manager(request):
+    user = request.user
+    if not user or not user.is_authenticated:
+        return False
+    return user.is_staff or get_role(request) in MANAGER_ROLES
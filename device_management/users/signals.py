@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Role, UserProfile
+from .roles import publish_claims_versions
+
+
+def bump_claims_versions(**filters):
+    """
+    Поднимает claims_version профилей в той же транзакции, что и правка:
+    токены с прежней версией перестают быть доверенными сразу после коммита
+    во всех воркерах. Массовые QuerySet.update() пользователей, профилей и
+    ролей сигналов не шлют - после них нужно вызвать эту функцию.
+    """
+    profiles = UserProfile.objects.filter(**filters)
+    profiles.update(claims_version=F("claims_version") + 1)
+    versions = dict(profiles.values_list("user_id", "claims_version"))
+    transaction.on_commit(lambda: publish_claims_versions(versions))
+
+
+@receiver(pre_save, sender=UserProfile)
+def bump_profile_claims_version(sender, instance, **kwargs):
+    # От версии в базе, а не в памяти: устаревший экземпляр не откатит её назад
+    stored = (
+        UserProfile.objects.filter(pk=instance.pk)
+        .values_list("claims_version", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+    instance.claims_version = max(stored or 0, instance.claims_version) + 1
+
+
+@receiver(post_save, sender=UserProfile)
+def publish_profile_claims_version(sender, instance, **kwargs):
+    versions = {instance.user_id: instance.claims_version}
+    transaction.on_commit(lambda: publish_claims_versions(versions))
+
+
+@receiver(post_delete, sender=UserProfile)
+def forget_profile_claims_version(sender, instance, **kwargs):
+    # 0 - профиля нет, ни один выданный токен с этой версией не совпадёт
+    versions = {instance.user_id: 0}
+    transaction.on_commit(lambda: publish_claims_versions(versions))
+
+
+@receiver(post_save, sender=Role)
+@receiver(pre_delete, sender=Role)
+def invalidate_role(sender, instance, **kwargs):
+    # pre_delete: после удаления SET_NULL уже не найти профили с этой ролью
+    bump_claims_versions(role=instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, update_fields=None, **kwargs):
+    # Вход обновляет только last_login - claims токенов остаются верными
+    if created or (update_fields is not None and set(update_fields) == {"last_login"}):
+        return
+    bump_claims_versions(user_id=instance.pk)
@@ -1,3 +1,245 @@
-from django.test import TestCase
+import io
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from devices.permissions import IsManagerOrAdmin
+
+from .authentication import StatelessJWTAuthentication
+from .checks import check_claims_cache
+from .models import ClaimsUser, Role, UserProfile
+from .roles import get_claims_cache, get_claims_version, get_role, is_manager
+
+PASSWORD = "Pa55word!x"
+
+
+class TokenTestMixin:
+    def setUp(self):
+        self.manager_role = Role.objects.create(name="MANAGER")
+        self.user_role = Role.objects.create(name="USER")
+        # Общий кэш версий переживает тестовую базу - id пользователей нет
+        claims_cache = get_claims_cache()
+        if claims_cache is not None:
+            claims_cache.clear()
+            self.addCleanup(claims_cache.clear)
+
+    def create_user(self, username="user", role=None, **fields):
+        user = User.objects.create_user(username, password=PASSWORD, **fields)
+        UserProfile.objects.create(user=user, role=role or self.user_role)
+        return user
+
+    def obtain(self, user):
+        client = APIClient()
+        response = client.post(
+            "/api/token/",
+            {"username": user.username, "password": PASSWORD},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def client_for(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+
+class RoleClaimTests(TokenTestMixin, TestCase):
+    def test_token_carries_role_and_claims_version(self):
+        user = self.create_user(role=self.manager_role)
+        token = AccessToken(self.obtain(user)["access"])
+        self.assertEqual(token["role"], "MANAGER")
+        self.assertEqual(token["claims_version"], get_claims_version(user.pk))
+
+    def test_manager_check_uses_claim(self):
+        user = self.create_user(role=self.manager_role)
+        client = self.client_for(self.obtain(user)["access"])
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get("/api/loans/")
+        self.assertEqual(response.status_code, 200)
+        # Роль из claim, без запроса к users_role
+        tables = " ".join(query["sql"] for query in captured.captured_queries)
+        self.assertNotIn("users_role", tables)
+
+    def test_role_change_invalidates_issued_token(self):
+        user = self.create_user(role=self.manager_role)
+        tokens = self.obtain(user)
+        client = self.client_for(tokens["access"])
+        self.assertEqual(client.get("/api/loans/").status_code, 200)
+
+        profile = user.profile
+        profile.role = self.user_role
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(client.get("/api/loans/").status_code, 403)
+
+        refreshed = APIClient().post(
+            "/api/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(AccessToken(refreshed.data["access"])["role"], "USER")
+
+    def test_role_rename_invalidates_issued_token(self):
+        user = self.create_user(role=self.manager_role)
+        token = AccessToken(self.obtain(user)["access"])
+        self.manager_role.description = "changed"
+        self.manager_role.save()
+        self.assertNotEqual(token["claims_version"], get_claims_version(user.pk))
+
+    def test_last_login_update_keeps_token_current(self):
+        user = self.create_user(role=self.manager_role)
+        token = AccessToken(self.obtain(user)["access"])
+        user.save(update_fields=["last_login"])
+        self.assertEqual(token["claims_version"], get_claims_version(user.pk))
+
+    @override_settings(CLAIMS_CACHE_ALIAS="default")
+    def test_locmem_claims_cache_is_ignored(self):
+        self.assertIsNone(get_claims_cache())
+
+    def test_claims_cache_is_shared_by_default(self):
+        self.assertIsNotNone(get_claims_cache())
+
+    def test_cached_version_skips_profile_query(self):
+        user = self.create_user(role=self.manager_role)
+        token = AccessToken(self.obtain(user)["access"])
+        get_claims_version(user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(token["claims_version"], get_claims_version(user.pk))
+
+    @override_settings(JWT_STATELESS_USER=True, CLAIMS_CACHE_ALIAS="")
+    def test_stateless_without_shared_cache_fails_check(self):
+        self.assertEqual(
+            [error.id for error in check_claims_cache(None)], ["users.E001"]
+        )
+
+    @override_settings(JWT_STATELESS_USER=True)
+    def test_stateless_with_shared_cache_passes_check(self):
+        self.assertEqual(check_claims_cache(None), [])
+
+    def test_benchmark_claims_mode_saves_queries(self):
+        # Команда сама падает, если claims-режим не экономит запрос
+        out = io.StringIO()
+        call_command("benchmark_auth", requests=2, stdout=out)
+        self.assertIn("claims:", out.getvalue())
+
+    def test_missing_cache_entry_falls_back_to_database(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+                "claims": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                },
+            }
+            with override_settings(CACHES=caches, CLAIMS_CACHE_ALIAS="claims"):
+                user = self.create_user(role=self.manager_role)
+                client = self.client_for(self.obtain(user)["access"])
+                self.assertEqual(client.get("/api/loans/").status_code, 200)
+
+                # Запись вытеснена, а понижение прошло мимо сигналов
+                get_claims_cache().clear()
+                UserProfile.objects.filter(user=user).update(
+                    role=self.user_role, claims_version=F("claims_version") + 1
+                )
+                self.assertEqual(client.get("/api/loans/").status_code, 403)
+
+
+@override_settings(JWT_STATELESS_USER=True)
+class StatelessAuthenticationTests(TokenTestMixin, TestCase):
+    def authenticate(self, access):
+        authentication = StatelessJWTAuthentication()
+        return authentication.get_user(
+            authentication.get_validated_token(access.encode())
+        )
+
+    def test_user_built_from_claims(self):
+        user = self.create_user(email="user@example.com")
+        access = self.obtain(user)["access"]
+        with self.assertNumQueries(1):
+            claims_user = self.authenticate(access)
+        self.assertIsInstance(claims_user, ClaimsUser)
+        self.assertEqual(claims_user, user)
+        self.assertEqual(claims_user.username, "user")
+        self.assertIn("email", claims_user.get_deferred_fields())
+
+    def test_deactivation_rejects_token(self):
+        user = self.create_user()
+        client = self.client_for(self.obtain(user)["access"])
+        self.assertEqual(client.get("/api/payments/").status_code, 200)
+
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        response = client.get("/api/payments/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["code"], "user_inactive")
+
+    def test_is_staff_change_invalidates_claims(self):
+        user = self.create_user(is_staff=True)
+        client = self.client_for(self.obtain(user)["access"])
+        self.assertEqual(client.get("/api/loans/").status_code, 200)
+
+        user.is_staff = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(client.get("/api/loans/").status_code, 403)
+
+    def test_role_gated_endpoint_authorizes_without_queries(self):
+        user = self.create_user(role=self.manager_role)
+        access = self.obtain(user)["access"]
+        # Первый запрос кладёт версию claims в общий кэш
+        self.assertEqual(self.client_for(access).get("/api/devices/").status_code, 200)
+
+        request = Request(
+            APIRequestFactory().get(
+                "/api/devices/", HTTP_AUTHORIZATION=f"Bearer {access}"
+            ),
+            authenticators=[StatelessJWTAuthentication()],
+        )
+        # Аутентификация и IsManagerOrAdmin - только claims токена и кэш
+        with self.assertNumQueries(0):
+            self.assertTrue(IsManagerOrAdmin().has_permission(request, None))
+            self.assertTrue(is_manager(request))
+        self.assertIsInstance(request.user, ClaimsUser)
+        self.assertEqual(get_role(request), "MANAGER")
+
+    def test_save_raises(self):
+        user = self.create_user()
+        claims_user = self.authenticate(self.obtain(user)["access"])
+        with self.assertRaises(TypeError):
+            claims_user.save()
+
+    def test_refresh_from_db_loads_row_once(self):
+        user = self.create_user(email="user@example.com")
+        access = self.obtain(user)["access"]
+        claims_user = self.authenticate(access)
+        with self.assertNumQueries(1):
+            self.assertEqual(claims_user.email, "user@example.com")
+            self.assertEqual(claims_user.date_joined, user.date_joined)
+        self.assertEqual(claims_user.get_deferred_fields(), set())
+
+        # Второй запрос с тем же токеном берёт строку из кэша
+        other = self.authenticate(access)
+        with self.assertNumQueries(0):
+            self.assertEqual(other.email, "user@example.com")
+
+    def test_explicit_refresh_reads_database(self):
+        user = self.create_user(email="user@example.com")
+        claims_user = self.authenticate(self.obtain(user)["access"])
+        User.objects.filter(pk=user.pk).update(first_name="Changed")
+        claims_user.refresh_from_db(fields=["username", "first_name"])
+        self.assertEqual(claims_user.first_name, "Changed")
+
+    @override_settings(JWT_STATELESS_USER=False)
+    def test_disabled_loads_user_from_database(self):
+        user = self.create_user()
+        claims_user = self.authenticate(self.obtain(user)["access"])
+        self.assertNotIsInstance(claims_user, ClaimsUser)
+        self.assertEqual(claims_user, user)
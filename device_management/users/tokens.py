@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db.models import F
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .roles import CLAIMS_VERSION_CLAIM, ROLE_CLAIM
+
+# Поля пользователя в access-токене, из них собирается ClaimsUser
+USER_CLAIMS = ("username", "is_staff", "is_superuser", "is_active")
+
+
+def claims_for_user(user_id):
+    # Один запрос с JOIN на пользователя, профиль и роль
+    return (
+        User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        .values(
+            *USER_CLAIMS,
+            **{
+                ROLE_CLAIM: F("profile__role__name"),
+                CLAIMS_VERSION_CLAIM: F("profile__claims_version"),
+            },
+        )
+        .first()
+    )
+
+
+class RoleRefreshToken(RefreshToken):
+    @property
+    def access_token(self):
+        access = super().access_token
+        # Claims перечитываются из базы при каждой выдаче access-токена, а iat -
+        # время его выдачи, а не refresh: правка пользователя или роли после
+        # входа не переживает обновление
+        claims = claims_for_user(self[api_settings.USER_ID_CLAIM])
+        if claims is not None:
+            for claim, value in claims.items():
+                access[claim] = value
+        access.set_iat()
+        return access
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RoleRefreshToken